@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures read_dspf() on a synthetic QRC DSPF file.
+
+The file has the given number of resistors and capacitors, written in the format of
+qrc.custom.cmd: every resistor is a segment of a net with layer, width, and length comments,
+some resistors are explicit vias written with a model name and an r= value, and every
+capacitor couples a sub-node to ground or to another net.  The read time, the size of the
+result arrays, and the peak memory usage are printed.
+
+Usage: python bench_dspf.py [--num 1000000] [--keep FILE]
+"""
+
+import time
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+from templates_cds_ff_mpt.verification.dspf import read_dspf
+
+_seg_per_net = 20
+_chunk_size = 100000
+
+
+def write_dspf(fname: Path, num: int) -> None:
+    """Write a synthetic DSPF file with num resistors and num capacitors."""
+    num_nets = -(-num // _seg_per_net)
+    with open(fname, 'w', buffering=1 << 20) as f:
+        f.write('*|DSPF 1.3\n*|DESIGN "top"\n.SUBCKT top VDD VSS\n')
+        for start in range(0, num, _chunk_size):
+            stop = min(start + _chunk_size, num)
+            lines = []
+            for idx in range(start, stop):
+                net, seg = divmod(idx, _seg_per_net)
+                if seg == 0:
+                    lines.append(f'*|NET n{net} {1 + net % 7}.5f\n')
+                if seg % 5 == 4:
+                    lines.append(f'R{idx} n{net}:{seg} n{net}:{seg + 1} rv{seg % 3} '
+                                 f'r={0.5 + seg % 3} $lvl=V{seg % 3}\n')
+                else:
+                    lines.append(f'R{idx} n{net}:{seg} n{net}:{seg + 1} {1 + idx % 97}.25 '
+                                 f'$lvl=M{1 + seg % 8} $w=0.032 $l={0.1 + seg * 0.05:.3f}\n')
+                other = f'n{(net + 1) % num_nets}:{seg}' if idx & 1 else 'VSS'
+                lines.append(f'C{idx} n{net}:{seg} {other} {1 + idx % 13}.1e-17 '
+                             f'$lvl=M{1 + seg % 8}\n')
+            f.write(''.join(lines))
+        f.write('.ENDS\n')
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the DSPF reader.')
+    parser.add_argument('--num', type=int, default=1000000,
+                        help='number of resistors and of capacitors.')
+    parser.add_argument('--keep', default='', help='write the DSPF file here and keep it.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = Path(args.keep) if args.keep else Path(tmp_dir, 'top.spf')
+        start = time.perf_counter()
+        write_dspf(fname, args.num)
+        t_write = time.perf_counter() - start
+        size_mb = fname.stat().st_size / (1 << 20)
+
+        start = time.perf_counter()
+        data = read_dspf(fname)
+        t_read = time.perf_counter() - start
+
+    arr_mb = sum(getattr(data, name).nbytes for name in
+                 ('res_nodes', 'res_val', 'res_layer', 'res_w', 'res_l', 'cap_nodes',
+                  'cap_val', 'cap_layer')) / (1 << 20)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'write: {size_mb:.1f} MB in {t_write:.2f} s')
+    print(f'read: {data.num_res} resistors, {data.num_cap} capacitors, '
+          f'{len(data.node_names)} nodes in {t_read:.2f} s')
+    print(f'result arrays: {arr_mb:.1f} MB, peak RSS: {peak_mb:.0f} MB')
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures get_fill_info() over a grid of fill tile sizes.
+
+The sweep is run twice: once with the X/Y interval solver caches cleared before every tile,
+which reproduces solving both intervals for every tile, and once with the caches kept.  The
+number of X and Y solver runs and the total time are printed for both.
+
+Usage: python bench_fill_sweep.py [--num 50]
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+from bag.io import read_yaml
+from bag.util.immutable import Param
+
+from templates_cds_ff_mpt.tech import TechInfoCDSFFMPT
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def _sweep(fill_tech, w_list, h_list, clear_solvers: bool) -> None:
+    edge = Param()
+    fill_tech.reset_fill_cache()
+    start = time.perf_counter()
+    num_x = num_y = 0
+    for w in w_list:
+        for h in h_list:
+            if clear_solvers:
+                stats = fill_tech.fill_cache_stats
+                num_x += stats.num_x_solve
+                num_y += stats.num_y_solve
+                fill_tech.reset_fill_cache()
+            fill_tech.get_fill_info('nch', 'standard', w, h, edge, edge, edge, edge)
+    stats = fill_tech.fill_cache_stats
+    num_x += stats.num_x_solve
+    num_y += stats.num_y_solve
+    t_tot = time.perf_counter() - start
+    name = 'uncached' if clear_solvers else 'memoized'
+    print(f'{name}: {len(w_list) * len(h_list)} tiles, {num_x} X solves, {num_y} Y solves, '
+          f'{t_tot:.3f} s')
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark fill interval solver caching.')
+    parser.add_argument('--num', type=int, default=50, help='number of widths and heights.')
+    args = parser.parse_args()
+
+    tech_info = TechInfoCDSFFMPT(read_yaml(_root_dir / 'tech_config.yaml'))
+    fill_tech = tech_info.get_device_tech('fill')
+    fill_config = tech_info.config['fill']
+    sd_pitch: int = fill_config['sd_pitch']
+    fin_p: int = fill_config['mos_pitch']
+    w_list = [2000 + idx * sd_pitch for idx in range(args.num)]
+    h_list = [2000 + idx * fin_p for idx in range(args.num)]
+
+    _sweep(fill_tech, w_list, h_list, True)
+    _sweep(fill_tech, w_list, h_list, False)
+
+
+if __name__ == '__main__':
+    run_main()
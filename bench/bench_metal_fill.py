@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures MetalFillGenerator on a 2 mm x 2 mm block with random blockages.
+
+Usage: python bench_metal_fill.py [--size 2000] [--num-blk 2000]
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from pybag.core import BBox
+
+from bag.io import read_yaml
+
+from templates_cds_ff_mpt import config
+from templates_cds_ff_mpt.fill.metal import MetalFillGenerator
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark metal fill generation.')
+    parser.add_argument('--size', type=float, default=2000, help='block size, in microns.')
+    parser.add_argument('--num-blk', type=int, default=2000, help='number of blockages.')
+    parser.add_argument('--seed', type=int, default=0, help='random seed.')
+    args = parser.parse_args()
+
+    tech_params = read_yaml(_root_dir / 'tech_config.yaml')
+    size = int(round(args.size / config['resolution']))
+    bbox = BBox(0, 0, size, size)
+    rng = np.random.default_rng(args.seed)
+    xy = rng.integers(0, size, size=(args.num_blk, 2))
+    wh = rng.integers(1000, 40000, size=(args.num_blk, 2))
+    blockages = [BBox(int(x), int(y), int(x + w), int(y + h))
+                 for (x, y), (w, h) in zip(xy.tolist(), wh.tolist())]
+
+    gen = MetalFillGenerator(config, tech_params)
+    t_tot = 0.0
+    for layer_id in sorted(tech_params['fill']):
+        start = time.perf_counter()
+        tables = gen.get_fill(layer_id, bbox, blockages)
+        t_lay = time.perf_counter() - start
+        t_tot += t_lay
+        num_arr = sum(table.shape[0] for table in tables.values())
+        num_rect = sum(int((table[:, 4] * table[:, 5]).sum()) for table in tables.values())
+        print(f'layer {layer_id}: {num_arr} arrays, {num_rect} rectangles, {t_lay:.3f} s')
+    print(f'total: {t_tot:.3f} s')
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures PrimNetlistWriter on a flat netlist of transistors.
+
+The drain and source nets are generated lazily, the widths and finger counts are NumPy
+columns, and the gate and bulk nets are shared by all instances.  The write time, output
+size, and peak memory usage are printed.
+
+Usage: python bench_netlist_writer.py [--num 10000000] [--format cdl]
+"""
+
+import time
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from pybag.enum import DesignOutput
+
+from templates_cds_ff_mpt.netlist.writer import compile_templates, PrimNetlistWriter
+
+_root_dir = Path(__file__).resolve().parents[1]
+_tech_name = 'cds_ff_mpt'
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the flat primitive netlist writer.')
+    parser.add_argument('--num', type=int, default=10_000_000, help='number of devices.')
+    parser.add_argument('--format', default='cdl', choices=('cdl', 'spectre'),
+                        help='netlist format.')
+    args = parser.parse_args()
+
+    num = args.num
+    output = DesignOutput[args.format.upper()]
+    rng = np.random.default_rng(0)
+    w_col = rng.integers(2, 9, size=num)
+    nf_col = rng.integers(1, 5, size=num)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # prim_files are relative to the workspace, which links the technology directory
+        work_dir = Path(tmp_dir)
+        (work_dir / _tech_name).symlink_to(_root_dir)
+        start = time.perf_counter()
+        templates = compile_templates(_root_dir / 'netlist_setup' / 'netlist_setup.yaml',
+                                      output, work_dir)
+        t_compile = time.perf_counter() - start
+
+        out_fname = work_dir / 'netlist.out'
+        start = time.perf_counter()
+        with PrimNetlistWriter(out_fname, templates) as writer:
+            writer.write_instances('nmos4_standard', range(num),
+                                   dict(B='VSS', D=map('d{}'.format, range(num)), G='in',
+                                        S=map('s{}'.format, range(num))),
+                                   dict(l='20n', w=w_col, nf=nf_col))
+        t_write = time.perf_counter() - start
+        size = out_fname.stat().st_size
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'compile: {t_compile * 1e3:.1f} ms')
+    print(f'write: {num} devices, {size / (1 << 20):.1f} MB, {t_write:.2f} s, '
+          f'{num / t_write / 1e6:.2f} M lines/s')
+    print(f'peak RSS: {peak_mb:.0f} MB')
+
+
+if __name__ == '__main__':
+    run_main()
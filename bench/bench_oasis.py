@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares GDSWriter and OASISWriter on a large transistor array drawn by MOSTechCDSFFMPT.
+
+One transistor row of the given number of segments is drawn with get_mos_conn_info(), and its
+rectangle arrays are stacked into the given number of rows, as in a large MOS array flattened
+into a single cell.  The same rectangle arrays are written through GDSWriter and OASISWriter,
+and the file size and write time of each are printed.
+
+Usage: python bench_oasis.py [--seg 2000] [--rows 500] [--w 4]
+"""
+
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from bag.io import read_yaml
+from bag.util.immutable import ImmutableList, Param
+
+from xbase.layout.enum import MOSType
+from xbase.layout.mos.data import MOSRowSpecs
+
+from templates_cds_ff_mpt.tech import TechInfoCDSFFMPT
+from templates_cds_ff_mpt.util import get_rect_arrays, YL, YH, NX, NY, SPY
+from templates_cds_ff_mpt.gds.layermap import LayerMap
+from templates_cds_ff_mpt.gds.writer import GDSWriter
+from templates_cds_ff_mpt.gds.oasis import OASISWriter
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def _stack_rows(table: np.ndarray, num: int, pitch: int) -> np.ndarray:
+    """Stack the rectangle arrays of one row into num rows with the given pitch."""
+    single = table[:, NY] == 1
+    ans = table[single].copy()
+    ans[:, NY] = num
+    ans[:, SPY] = pitch
+    multi = table[~single]
+    if multi.shape[0] == 0:
+        return ans
+    copies = np.repeat(multi[np.newaxis, :, :], num, axis=0)
+    copies[:, :, YL] += np.arange(num)[:, np.newaxis] * pitch
+    copies[:, :, YH] += np.arange(num)[:, np.newaxis] * pitch
+    return np.concatenate((ans, copies.reshape(-1, table.shape[1])), axis=0)
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the OASIS writer against GDS.')
+    parser.add_argument('--seg', type=int, default=2000, help='number of segments per row.')
+    parser.add_argument('--rows', type=int, default=500, help='number of rows.')
+    parser.add_argument('--w', type=int, default=4, help='transistor width, in fins.')
+    args = parser.parse_args()
+
+    tech_info = TechInfoCDSFFMPT(read_yaml(_root_dir / 'tech_config.yaml'))
+    mos_tech = tech_info.get_device_tech('mos')
+    specs = MOSRowSpecs(mos_type=MOSType.nch, width=args.w, threshold='standard',
+                        bot_wires=ImmutableList(), top_wires=ImmutableList(), options=Param(),
+                        flip=False, sub_width=args.w)
+    start = time.perf_counter()
+    row_info = mos_tech.get_mos_row_info(1, specs, MOSType.nch, MOSType.nch, Param())
+    mos_info = mos_tech.get_mos_conn_info(row_info, 1, args.seg, args.w, 1, False, Param())
+    tables = {lay_purp: _stack_rows(table, args.rows, row_info.height)
+              for lay_purp, table in get_rect_arrays(mos_info.lay_info).items()}
+    t_draw = time.perf_counter() - start
+    num_arr = sum(table.shape[0] for table in tables.values())
+    num_rect = sum(int((table[:, NX] * table[:, NY]).sum()) for table in tables.values())
+    print(f'draw: {num_arr} rect arrays, {num_rect} rectangles in {t_draw:.2f} s')
+
+    layer_map = LayerMap.from_file(_root_dir / 'gds_setup' / 'gds.layermap')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, fname, writer_cls, kwargs in (
+                ('GDS', 'mos.gds', GDSWriter, {}),
+                ('OASIS', 'mos.oas', OASISWriter, {}),
+                ('OASIS, uncompressed', 'mos_raw.oas', OASISWriter, dict(compress=False)),
+        ):
+            fname = Path(tmp_dir, fname)
+            start = time.perf_counter()
+            with writer_cls(fname, layer_map, **kwargs) as writer:
+                writer.add_rect_arrays('mos_array', tables)
+            t_write = time.perf_counter() - start
+            print(f'{name}: {fname.stat().st_size} bytes in {t_write:.3f} s')
+
+
+if __name__ == '__main__':
+    run_main()
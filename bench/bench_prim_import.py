@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the import time of the BAG_prim design modules.
+
+Each measurement runs in a fresh interpreter, so no module is cached from a previous run.
+The first measurement only imports BAG_prim.schematic.  The second also imports every
+primitive design module, which synthesizes its class and imports bag.design.module.
+
+Usage: python bench_prim_import.py [--repeat 5]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+_import_pkg = """
+import time
+start = time.perf_counter()
+import BAG_prim.schematic
+print(time.perf_counter() - start)
+"""
+
+_import_all = """
+import time
+import importlib
+start = time.perf_counter()
+import BAG_prim.schematic
+for cell_name in BAG_prim.schematic._cell_table:
+    mod = importlib.import_module(f'BAG_prim.schematic.{cell_name}')
+    getattr(mod, f'BAG_prim__{cell_name}')
+print(time.perf_counter() - start)
+"""
+
+
+def _run(code: str, repeat: int) -> float:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(_root_dir / 'src'),
+                                                      env.get('PYTHONPATH', '')]))
+    times = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                              text=True, env=env)
+        times.append(float(proc.stdout.split()[-1]))
+    return min(times)
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark BAG_prim design module imports.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of interpreter runs.')
+    args = parser.parse_args()
+
+    t_pkg = _run(_import_pkg, args.repeat)
+    print(f'import BAG_prim.schematic: {t_pkg * 1e3:.2f} ms')
+    try:
+        t_all = _run(_import_all, args.repeat)
+    except subprocess.CalledProcessError as ex:
+        print(f'all design modules: failed, bag must be importable.\n{ex.stderr}')
+    else:
+        print(f'all design modules: {t_all * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    run_main()
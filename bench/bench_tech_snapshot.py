@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the per-task overhead of shipping device techs to a process pool.
+
+Each task receives either the full TechInfoCDSFFMPT or its TechSnapshot, builds the MOS,
+fill, and metal resistor device techs from it, and queries one rule of each.
+
+Usage: python bench_tech_snapshot.py [--workers 32] [--tasks 2048]
+"""
+
+import time
+import pickle
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from bag.io import read_yaml
+
+from templates_cds_ff_mpt.tech import TechInfoCDSFFMPT
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def _run_task(tech) -> int:
+    mos_tech = tech.get_device_tech('mos')
+    res_tech = tech.get_device_tech('res', metal=True)
+    fill_tech = tech.get_device_tech('fill')
+    return mos_tech.blk_h_pitch + res_tech.min_size[1] + len(fill_tech.mos_type_default)
+
+
+def _bench(tech, num_workers: int, num_tasks: int) -> float:
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        # warm up the workers, so process startup is not counted
+        list(pool.map(int, range(num_workers)))
+        start = time.perf_counter()
+        list(pool.map(_run_task, [tech] * num_tasks))
+        return (time.perf_counter() - start) / num_tasks
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark TechSnapshot in a process pool.')
+    parser.add_argument('--workers', type=int, default=32, help='number of worker processes.')
+    parser.add_argument('--tasks', type=int, default=2048, help='number of tasks.')
+    args = parser.parse_args()
+
+    tech_info = TechInfoCDSFFMPT(read_yaml(_root_dir / 'tech_config.yaml'))
+    snapshot = tech_info.get_snapshot()
+    print(f'pickled size: TechInfo {len(pickle.dumps(tech_info))} B, '
+          f'TechSnapshot {len(pickle.dumps(snapshot))} B')
+    for name, tech in (('TechInfo', tech_info), ('TechSnapshot', snapshot)):
+        t_task = _bench(tech, args.workers, args.tasks)
+        print(f'{name}: {t_task * 1e6:.1f} us/task with {args.workers} workers')
+
+
+if __name__ == '__main__':
+    run_main()
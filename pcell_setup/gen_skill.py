@@ -13,79 +13,181 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from jinja2 import Template
-
-tech_lib = 'cds_ff_mpt'
-mos_w_default = '4'
-mos_l_default = '18n'
-res_w_default = '1u'
-res_l_default = '2u'
-res_metal_w_default = '400n'
-res_metal_l_default = '1u'
-dio_w_default = '4'
-dio_l_default = '4'
-
-mos_list = [
-    ('nmos4', 'standard', 'n1svt'),
-    ('nmos4', 'low_power', 'n1hvt'),
-    ('nmos4', 'fast', 'n1lvt'),
-    ('nmos4', 'svt', 'n1svt'),
-    ('nmos4', 'hvt', 'n1hvt'),
-    ('nmos4', 'lvt', 'n1lvt'),
-    ('pmos4', 'standard', 'p1svt'),
-    ('pmos4', 'low_power', 'p1hvt'),
-    ('pmos4', 'fast', 'p1lvt'),
-    ('pmos4', 'svt', 'p1svt'),
-    ('pmos4', 'hvt', 'p1hvt'),
-    ('pmos4', 'lvt', 'p1lvt'),
-]
+"""Renders all BAG primitive setup files from prim_catalog.yaml.
 
-res_list = [
-    ('standard', 'rspp'),
-]
+An output is only re-rendered if its template, the catalog entries it depends on, or the
+output file itself changed since the last run.  These are tracked by hashes stored in
+gen_stamps.json.
 
-res_metal_list = [
-    ('1', 'resm1', 0.0736),
-    ('2', 'resm2', 0.0604),
-    ('3', 'resm3', 0.0604),
-    ('4', 'resm4', 0.0604),
-    ('5', 'resm5', 0.0604),
-    ('6', 'resm6', 0.0604),
-    ('7', 'resm7', 0.0604),
-    ('8', 'resmt', 0.0214),
-]
+Some outputs are blocks inside hand-maintained files, delimited by '# BEGIN GENERATED <name>'
+and '# END GENERATED <name>' comment lines.  Only the lines between the markers are rendered
+and hashed.
+"""
+
+from typing import Any, Dict, List, Tuple, Mapping, Optional, Sequence
+
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+import yaml
+from jinja2 import Environment
+
+root_dir = Path(__file__).resolve().parent.parent
+setup_dir = root_dir / 'pcell_setup'
+catalog_fname = setup_dir / 'prim_catalog.yaml'
+stamp_fname = setup_dir / 'gen_stamps.json'
 
-dio_list = [
-    ('ndio', 'standard', 'nd1svt'),
-    ('pdio', 'standard', 'pd1svt'),
+# list of (template, output, catalog dependencies, block name), with file names relative to
+# root_dir.  Each dependency is a catalog section and the cell fields used, or None for the
+# whole section.  The block name is None if the template renders the whole output file.
+artifact_list = [
+    ('pcell_setup/prim_pcell_jinja2.il', 'pcell_setup/prim_pcell.il',
+     (('tech_lib', None), ('mos', None), ('res', None), ('res_metal', None), ('dio', None)),
+     None),
+    ('pcell_setup/gen_config_jinja2.yaml', 'netlist_setup/gen_config.yaml',
+     (('mos', ('name', 'model')), ('res_metal', ('name', 'layer', 'model', 'rsq')),
+      ('dio', ('name', 'netlist_model'))), None),
+    ('pcell_setup/bag_prim_jinja2.scs', 'netlist_setup/bag_prim.scs',
+     (('tech_lib', None), ('mos', ('name', 'model')), ('res_metal', ('name', 'layer'))), None),
+    ('pcell_setup/bag_prim_jinja2.cdl', 'netlist_setup/bag_prim.cdl',
+     (('mos', ('name', 'model')), ('res_metal', ('name', 'model', 'rsq'))), None),
+    ('pcell_setup/netlist_setup_jinja2.yaml', 'netlist_setup/netlist_setup.yaml',
+     (('mos', ('name',)), ('res_metal', ('name',)), ('dio', ('name',))), None),
+    ('pcell_setup/schematic_init_jinja2.py.in', 'src/BAG_prim/schematic/__init__.py',
+     (('mos', ('name',)), ('res', ('name',)), ('res_metal', ('name',))), None),
+    ('pcell_setup/tech_params_sheet_res_jinja2.yaml',
+     'src/templates_cds_ff_mpt/data/tech_params.yaml', (('res_metal', ('layer', 'rsq')),),
+     'sheet_res'),
 ]
 
+# device categories, in catalog order
+dev_categories = ('mos', 'res', 'res_metal', 'dio')
+
+
+def get_render_context(catalog: Mapping[str, Any]) -> Dict[str, Any]:
+    ans = dict(tech_lib=catalog['tech_lib'])
+    for key in dev_categories:
+        cat_info = dict(catalog[key])
+        cat_info['cells'] = cells = [dict(cell, category=key, module=cat_info.get('module', ''),
+                                          terms=cat_info['terms'], props=cat_info['props'])
+                                     for cell in cat_info['cells']]
+        cat_info['subckt_params'] = [val for _, val in cat_info['params']
+                                     if not _is_yaml_literal(val)]
+        ans[key] = cat_info
+
+        # legacy PCell template variables
+        ans[f'{key}_w_default'] = cat_info['w_default']
+        ans[f'{key}_l_default'] = cat_info['l_default']
+        pcells = [cell for cell in cells if cell.get('pcell', True)]
+        if key == 'res_metal':
+            ans['res_metal_list'] = [(str(cell['layer']), cell['model'], cell['rsq'])
+                                     for cell in pcells]
+        elif key == 'res':
+            ans['res_list'] = [(cell['name'].split('_', 1)[1], cell['model'])
+                               for cell in pcells]
+        else:
+            ans[f'{key}_list'] = [tuple(cell['name'].split('_', 1)) + (cell['model'],)
+                                  for cell in pcells]
+
+    all_cells = [cell for key in dev_categories for cell in ans[key]['cells']]
+    ans['netlist_cells'] = sorted((cell for cell in all_cells if cell['category'] != 'res'),
+                                  key=lambda x: x['name'])
+    ans['module_cells'] = sorted((cell for cell in all_cells if cell['module']),
+                                 key=lambda x: x['name'])
+    return ans
+
+
+def get_stamp(template: str, catalog: Mapping[str, Any],
+              deps: Sequence[Tuple[str, Optional[Sequence[str]]]]) -> str:
+    data = [template]
+    for key, fields in deps:
+        val = catalog[key]
+        if fields is not None:
+            val = dict(val, cells=[{name: cell[name] for name in fields if name in cell}
+                                   for cell in val['cells']])
+        data.append(val)
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def render_all(force: bool = False) -> List[str]:
+    """Render all outdated outputs.  Returns the list of rendered outputs."""
+    with open(catalog_fname, 'r') as f:
+        catalog = yaml.safe_load(f)
+    stamps: Dict[str, Tuple[str, str]] = {}
+    if stamp_fname.is_file():
+        with open(stamp_fname, 'r') as f:
+            stamps = {key: tuple(val) for key, val in json.load(f).items()}
+
+    env = Environment(keep_trailing_newline=True)
+    env.filters['yaml_scalar'] = _yaml_scalar
+    context = None
+    ans = []
+    for temp_name, out_name, deps, block in artifact_list:
+        template = (root_dir / temp_name).read_text()
+        in_stamp = get_stamp(template, catalog, deps)
+        out_path = root_dir / out_name
+        stamp_key = out_name if block is None else f'{out_name}:{block}'
+        if out_path.is_file():
+            head, content, tail = _split_output(out_path.read_text(), out_name, block)
+        elif block is None:
+            head = content = tail = ''
+        else:
+            raise ValueError(f'Cannot render block {block}: {out_name} does not exist.')
+        if (not force and out_path.is_file() and
+                stamps.get(stamp_key, None) == (in_stamp, _get_text_hash(content))):
+            continue
+
+        if context is None:
+            context = get_render_context(catalog)
+        content = env.from_string(template).render(**context)
+        if block is not None and not content.endswith('\n'):
+            content += '\n'
+        out_path.write_text(head + content + tail)
+        stamps[stamp_key] = (in_stamp, _get_text_hash(content))
+        ans.append(stamp_key)
+
+    if ans:
+        with open(stamp_fname, 'w') as f:
+            json.dump(stamps, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return ans
+
+
+def _get_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _split_output(text: str, out_name: str, block: Optional[str]) -> Tuple[str, str, str]:
+    """Split an output file into (text before, rendered content, text after)."""
+    if block is None:
+        return '', text, ''
+    lines = text.splitlines(keepends=True)
+    start = stop = -1
+    for idx, line in enumerate(lines):
+        marker = line.strip()
+        if marker.startswith(f'# BEGIN GENERATED {block}'):
+            start = idx + 1
+        elif marker.startswith(f'# END GENERATED {block}'):
+            stop = idx
+    if start < 0 or stop < start:
+        raise ValueError(f'Generated block markers for {block} not found in {out_name}.')
+    return ''.join(lines[:start]), ''.join(lines[start:stop]), ''.join(lines[stop:])
+
+
+def _is_yaml_literal(val: Any) -> bool:
+    return not isinstance(yaml.safe_load(str(val)), str)
+
+
+def _yaml_scalar(val: Any) -> str:
+    val = str(val)
+    return f"'{val}'" if _is_yaml_literal(val) else val
+
 
 def run_main() -> None:
-    in_fname = 'prim_pcell_jinja2.il'
-    out_fname = 'prim_pcell.il'
-
-    with open(in_fname, 'r') as f:
-        content = f.read()
-
-    result = Template(content).render(
-        tech_lib=tech_lib,
-        mos_list=mos_list,
-        mos_w_default=mos_w_default,
-        mos_l_default=mos_l_default,
-        res_list=res_list,
-        res_w_default=res_w_default,
-        res_l_default=res_l_default,
-        res_metal_list=res_metal_list,
-        res_metal_w_default=res_metal_w_default,
-        res_metal_l_default=res_metal_l_default,
-        dio_list=dio_list,
-        dio_w_default=dio_w_default,
-        dio_l_default=dio_l_default,
-    )
-
-    with open(out_fname, 'w') as f:
-        f.write(result)
+    for out_name in render_all(force='--force' in sys.argv[1:]):
+        print(f'rendered {out_name}')
 
 
 if __name__ == '__main__':
@@ -14,3 +14,99 @@
 # limitations under the License.
 
 
+"""Design modules of the BAG_prim library.
+
+All primitives only forward to a base design module, so their modules are synthesized on
+first import from the table below instead of being stored as individual files.  The table
+holds every primitive catalog cell with a base design module; cells without one, such as the
+diodes, have no design module.
+"""
+
+from typing import Any, Dict
+
+import sys
+import importlib
+import importlib.util
+
+# map from primitive cell name to its base design module class in bag.design.module
+_cell_table: Dict[str, str] = {
+    'nmos4_18': 'MosModuleBase',
+    'nmos4_fast': 'MosModuleBase',
+    'nmos4_hvt': 'MosModuleBase',
+    'nmos4_low_power': 'MosModuleBase',
+    'nmos4_lvt': 'MosModuleBase',
+    'nmos4_standard': 'MosModuleBase',
+    'nmos4_svt': 'MosModuleBase',
+    'pmos4_18': 'MosModuleBase',
+    'pmos4_fast': 'MosModuleBase',
+    'pmos4_hvt': 'MosModuleBase',
+    'pmos4_low_power': 'MosModuleBase',
+    'pmos4_lvt': 'MosModuleBase',
+    'pmos4_standard': 'MosModuleBase',
+    'pmos4_svt': 'MosModuleBase',
+    'res_metal_1': 'ResMetalModule',
+    'res_metal_2': 'ResMetalModule',
+    'res_metal_3': 'ResMetalModule',
+    'res_metal_4': 'ResMetalModule',
+    'res_metal_5': 'ResMetalModule',
+    'res_metal_6': 'ResMetalModule',
+    'res_metal_7': 'ResMetalModule',
+    'res_metal_8': 'ResMetalModule',
+    'res_standard': 'ResPhysicalModuleBase',
+}
+
+_lib_name = 'BAG_prim'
+
+
+def _make_class(cell_name: str, mod_name: str) -> type:
+    from bag.design import module
+
+    base_cls = getattr(module, _cell_table[cell_name])
+    cls_name = f'{_lib_name}__{cell_name}'
+
+    def __init__(self, database, params, **kwargs: Any) -> None:
+        base_cls.__init__(self, '', database, params, **kwargs)
+
+    return type(cls_name, (base_cls,), {
+        '__init__': __init__,
+        '__doc__': f'design module for {cls_name}.\n    ',
+        '__module__': mod_name,
+        '__qualname__': cls_name,
+    })
+
+
+class _PrimModuleFinder:
+    """Meta path finder and loader that synthesizes the BAG_prim.schematic.<cell_name> modules."""
+
+    def find_spec(self, fullname, path, target=None):
+        pkg_name, _, cell_name = fullname.rpartition('.')
+        if pkg_name == __name__ and cell_name in _cell_table:
+            return importlib.util.spec_from_loader(fullname, self)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module) -> None:
+        mod_name = module.__name__
+        cell_name = mod_name.rpartition('.')[2]
+        cls = _make_class(cell_name, mod_name)
+        setattr(module, cls.__name__, cls)
+
+
+if not any(isinstance(finder, _PrimModuleFinder) for finder in sys.meta_path):
+    sys.meta_path.append(_PrimModuleFinder())
+
+
+def __getattr__(name: str) -> Any:
+    if name in _cell_table:
+        return importlib.import_module(f'{__name__}.{name}')
+    prefix = _lib_name + '__'
+    if name.startswith(prefix) and name[len(prefix):] in _cell_table:
+        cell_name = name[len(prefix):]
+        return getattr(importlib.import_module(f'{__name__}.{cell_name}'), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_cell_table))
@@ -0,0 +1,272 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module computes windowed OD/PO density maps of placed layouts."""
+
+from typing import Any, Dict, List, Tuple, Mapping, Sequence, Optional
+
+import numpy as np
+
+from pybag.core import BBox
+
+from xbase.layout.data import LayoutInfo
+
+from ..util import get_rect_arrays, expand_rect_arrays
+from .tech import FillArrayInfo
+
+
+class DensityMap:
+    """A rasterized coverage map of a single layer.
+
+    Each pixel stores the exact area of the pixel covered by the union of all rectangles.
+    Rectangles are accumulated in a difference array as they are added; overlapping
+    rectangles are found when the coverage is computed, and the area counted more than once
+    is removed.
+
+    Parameters
+    ----------
+    bbox : BBox
+        the region covered by this map.
+    pixel : int
+        the pixel size, in resolution units.
+    """
+
+    def __init__(self, bbox: BBox, pixel: int) -> None:
+        self._x0 = bbox.xl
+        self._y0 = bbox.yl
+        self._pixel = pixel
+        self._nx = -(-(bbox.xh - bbox.xl) // pixel)
+        self._ny = -(-(bbox.yh - bbox.yl) // pixel)
+        # second-order difference array of the covered area, with overlaps counted repeatedly.
+        self._diff = np.zeros((self._ny + 2, self._nx + 2), dtype=np.int64)
+        # the clipped rectangles added so far, relative to the map origin
+        self._rects: List[np.ndarray] = []
+        self._coverage: Optional[np.ndarray] = None
+
+    @property
+    def pixel(self) -> int:
+        return self._pixel
+
+    @property
+    def coverage(self) -> np.ndarray:
+        """The covered area of each pixel, as a (ny, nx) array."""
+        if self._coverage is None:
+            diff = self._diff
+            if len(self._rects) > 0:
+                rects = np.concatenate(self._rects)
+                self._rects = [rects]
+                remove, add = _get_overlap_fix(rects)
+                if remove.size:
+                    diff = diff.copy()
+                    _add_rect_diff(diff, remove, self._pixel, -1)
+                    _add_rect_diff(diff, add, self._pixel, 1)
+            cov = np.cumsum(np.cumsum(diff, axis=0), axis=1)[:self._ny, :self._nx]
+            self._coverage = cov
+        return self._coverage
+
+    def add_rects(self, rects: np.ndarray) -> None:
+        """Add an (N, 4) table of (xl, yl, xh, yh) rectangles to this map."""
+        p = self._pixel
+        xmax = self._nx * p
+        ymax = self._ny * p
+        xl = np.clip(rects[:, 0] - self._x0, 0, xmax)
+        yl = np.clip(rects[:, 1] - self._y0, 0, ymax)
+        xh = np.clip(rects[:, 2] - self._x0, 0, xmax)
+        yh = np.clip(rects[:, 3] - self._y0, 0, ymax)
+        valid = (xl < xh) & (yl < yh)
+        if not np.any(valid):
+            return
+
+        rects = np.stack((xl[valid], yl[valid], xh[valid], yh[valid]), axis=1)
+        _add_rect_diff(self._diff, rects, p, 1)
+        self._rects.append(rects)
+        self._coverage = None
+
+    def add_layout_info(self, info: LayoutInfo, lp_set: Sequence[Any], dx: int = 0, dy: int = 0,
+                        nx: int = 1, ny: int = 1, spx: int = 0, spy: int = 0) -> None:
+        """Add the given layers of a placed (and optionally arrayed) LayoutInfo to this map."""
+        for table in get_rect_arrays(info, lp_set).values():
+            self.add_rects(expand_rect_arrays(table, dx=dx, dy=dy, nx=nx, ny=ny, spx=spx, spy=spy))
+
+    def get_window_density(self, win_w: int, win_h: int, step_x: int, step_y: int
+                           ) -> np.ndarray:
+        """Returns the density of all windows of the given size and step.
+
+        All dimensions are in resolution units, and are rounded down to pixel size.  Entry
+        (j, i) of the result is the density of the window with lower-left corner at
+        (i * step_x, j * step_y) relative to the map origin.  If the map size is not a
+        multiple of the step, the last row and column of windows are aligned to the top and
+        right edges of the map instead.
+        """
+        p = self._pixel
+        xl, yl, wx, wy = self._get_windows(win_w, win_h, step_x, step_y)
+        integ = np.zeros((self._ny + 1, self._nx + 1), dtype=np.int64)
+        integ[1:, 1:] = np.cumsum(np.cumsum(self.coverage, axis=0), axis=1)
+
+        xh = xl + wx
+        yh = yl + wy
+        total = (integ[np.ix_(yh, xh)] - integ[np.ix_(yl, xh)] - integ[np.ix_(yh, xl)] +
+                 integ[np.ix_(yl, xl)])
+        return total / float(wx * wy * p * p)
+
+    def get_low_density_windows(self, win_w: int, win_h: int, step_x: int, step_y: int,
+                                density_min: float) -> List[BBox]:
+        """Returns the bounding boxes of all windows with density less than density_min."""
+        p = self._pixel
+        density = self.get_window_density(win_w, win_h, step_x, step_y)
+        xl, yl, wx, wy = self._get_windows(win_w, win_h, step_x, step_y)
+        ans = []
+        for j, i in zip(*np.nonzero(density < density_min)):
+            box_xl = self._x0 + int(xl[i]) * p
+            box_yl = self._y0 + int(yl[j]) * p
+            ans.append(BBox(box_xl, box_yl, box_xl + wx * p, box_yl + wy * p))
+        return ans
+
+    def _get_windows(self, win_w: int, win_h: int, step_x: int, step_y: int
+                     ) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """Returns the window column/row start indices and the window size, in pixels."""
+        p = self._pixel
+        wx = min(max(win_w // p, 1), self._nx)
+        wy = min(max(win_h // p, 1), self._ny)
+        return (_get_window_starts(self._nx, wx, max(step_x // p, 1)),
+                _get_window_starts(self._ny, wy, max(step_y // p, 1)), wx, wy)
+
+
+class FEOLDensityAnalyzer:
+    """Computes OD and PO density maps of a placed layout, including dummy shapes.
+
+    Parameters
+    ----------
+    config : Mapping[str, Any]
+        the technology configuration dictionary.
+    bbox : BBox
+        the region to analyze.
+    pixel : int
+        the raster pixel size, in resolution units.
+    """
+
+    def __init__(self, config: Mapping[str, Any], bbox: BBox, pixel: int) -> None:
+        mos_lay_table = config['mos_lay_table']
+        od_lay = mos_lay_table['OD'][0]
+        po_lay = mos_lay_table['PO'][0]
+
+        self._fill_config = config['fill']
+        self._lp_table = {
+            'od': {lp for lp in mos_lay_table.values() if lp[0] == od_lay},
+            'po': {lp for lp in mos_lay_table.values() if lp[0] == po_lay},
+        }
+        self._maps = {key: DensityMap(bbox, pixel) for key in self._lp_table}
+
+    @property
+    def maps(self) -> Mapping[str, DensityMap]:
+        return self._maps
+
+    def add_layout_info(self, info: LayoutInfo, dx: int = 0, dy: int = 0, nx: int = 1,
+                        ny: int = 1, spx: int = 0, spy: int = 0) -> None:
+        for key, dmap in self._maps.items():
+            dmap.add_layout_info(info, self._lp_table[key], dx=dx, dy=dy, nx=nx, ny=ny,
+                                 spx=spx, spy=spy)
+
+    def add_fill_arrays(self, arr_list: Sequence[FillArrayInfo]) -> None:
+        for arr in arr_list:
+            self.add_layout_info(arr.info, dx=arr.xl, dy=arr.yl, nx=arr.nx, ny=arr.ny,
+                                 spx=arr.spx, spy=arr.spy)
+
+    def get_low_density_windows(self, win_w: int, win_h: int, step_x: int, step_y: int
+                                ) -> Dict[str, List[BBox]]:
+        """Returns windows that violate the od_density_min/po_density_min fill parameters.
+
+        po_density_min is optional; PO density is not checked if it is not specified.
+        """
+        ans = {}
+        for key, dmap in self._maps.items():
+            density_min: float = self._fill_config.get(f'{key}_density_min', 0.0)
+            if density_min > 0:
+                ans[key] = dmap.get_low_density_windows(win_w, win_h, step_x, step_y,
+                                                        density_min)
+            else:
+                ans[key] = []
+        return ans
+
+
+def _get_window_starts(num: int, size: int, step: int) -> np.ndarray:
+    """Returns the start indices of windows stepping over num pixels, ending at the edge."""
+    ans = np.arange(0, num - size + 1, step)
+    if ans[-1] + size < num:
+        ans = np.append(ans, num - size)
+    return ans
+
+
+def _add_rect_diff(diff: np.ndarray, rects: np.ndarray, p: int, sign: int) -> None:
+    """Add the covered area of an (N, 4) rectangle table to a second-order difference array."""
+    # the area of a rectangle covering [x, inf) in each pixel along one axis is
+    # described by two difference entries: (p - r) at pixel x // p, and r at the next one.
+    x_idx, x_val = _get_edge_diff(rects[:, 0], rects[:, 2], p)
+    y_idx, y_val = _get_edge_diff(rects[:, 1], rects[:, 3], p)
+    rows = np.broadcast_to(y_idx[:, :, np.newaxis], (y_idx.shape[0], 4, 4))
+    cols = np.broadcast_to(x_idx[:, np.newaxis, :], (x_idx.shape[0], 4, 4))
+    vals = y_val[:, :, np.newaxis] * x_val[:, np.newaxis, :]
+    if sign < 0:
+        vals = -vals
+    np.add.at(diff, (rows.ravel(), cols.ravel()), vals.ravel())
+
+
+def _get_overlap_fix(rects: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the rectangles to remove from and add to rects to cover their union once.
+
+    The rectangles are cut into horizontal slabs at every distinct y coordinate.  In each
+    slab, overlapping x intervals are merged; the pieces of every merged group of more than
+    one piece are returned as the rectangles to remove, and the merged intervals as the
+    rectangles to add.  Both tables are empty if no two rectangles overlap.
+    """
+    xl, yl, xh, yh = rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+    y_list = np.unique(np.concatenate((yl, yh)))
+    slab_lo = np.searchsorted(y_list, yl)
+    counts = np.searchsorted(y_list, yh) - slab_lo
+    rect_idx = np.repeat(np.arange(rects.shape[0]), counts)
+    slab = (np.arange(rect_idx.size) - np.repeat(np.cumsum(counts) - counts, counts) +
+            slab_lo[rect_idx])
+    order = np.lexsort((xl[rect_idx], slab))
+    slab = slab[order]
+    rect_idx = rect_idx[order]
+    pxl = xl[rect_idx]
+    pxh = xh[rect_idx]
+
+    # offset x coordinates by slab so a running maximum never crosses slabs.
+    span = int(xh.max()) + 1
+    run_max = np.maximum.accumulate(slab * span + pxh)
+    is_start = np.ones(slab.size, dtype=bool)
+    is_start[1:] = slab[1:] * span + pxl[1:] >= run_max[:-1]
+    start_idx = np.flatnonzero(is_start)
+    group_size = np.diff(np.append(start_idx, slab.size))
+    is_multi = group_size > 1
+    in_multi = np.repeat(is_multi, group_size)
+
+    rm_slab = slab[in_multi]
+    remove = np.stack((pxl[in_multi], y_list[rm_slab], pxh[in_multi], y_list[rm_slab + 1]),
+                      axis=1)
+    add_slab = slab[start_idx[is_multi]]
+    add_xh = np.maximum.reduceat(pxh, start_idx)[is_multi] if start_idx.size else pxh[:0]
+    add = np.stack((pxl[start_idx[is_multi]], y_list[add_slab], add_xh,
+                    y_list[add_slab + 1]), axis=1)
+    return remove, add
+
+
+def _get_edge_diff(lo: np.ndarray, hi: np.ndarray, p: int):
+    lo_q, lo_r = np.divmod(lo, p)
+    hi_q, hi_r = np.divmod(hi, p)
+    idx = np.stack((lo_q, lo_q + 1, hi_q, hi_q + 1), axis=1)
+    val = np.stack((p - lo_r, lo_r, hi_r - p, -hi_r), axis=1)
+    return idx, val
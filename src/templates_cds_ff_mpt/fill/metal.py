@@ -0,0 +1,242 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module generates track-aligned metal fill from the tech_config fill parameters."""
+
+from typing import Any, Dict, List, Tuple, Mapping, Sequence
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from pybag.core import BBox
+
+
+@dataclass(frozen=True)
+class MetalFillInfo:
+    lp_list: List[Tuple[str, str]]
+    is_vertical: bool
+    w: int
+    pitch: int
+    tr_step: int
+    seg_len: int
+    seg_sp: int
+    len_min: int
+    margin_u: int
+    margin_v: int
+
+
+class MetalFillGenerator:
+    """Generates metal fill as arrays of track-aligned rectangles.
+
+    For each metal layer, the fill parameters (sp_x, sp_y, margin_x, margin_y, density) in
+    tech_config.yaml define the maximum space between fill shapes, the space between fill and
+    existing shapes, and the target fill density.  Fill wires are drawn on every tr_step-th
+    routing track, broken into segments along the track to meet the target density.  If the
+    target needs every track to be fully filled, seg_len is 0 and fill wires run across each
+    free region, as long as they meet the minimum length rule.  On colored
+    layers, fill on even tracks is drawn on the first color and fill on odd tracks on the second.
+
+    Parameters
+    ----------
+    config : Mapping[str, Any]
+        the technology configuration dictionary (tech_params.yaml).
+    tech_params : Mapping[str, Any]
+        the process parameters dictionary (tech_config.yaml).
+    """
+
+    def __init__(self, config: Mapping[str, Any], tech_params: Mapping[str, Any]) -> None:
+        self._config = config
+        self._tech_params = tech_params
+        self._info_table: Dict[int, MetalFillInfo] = {}
+
+    def get_fill_info(self, layer_id: int) -> MetalFillInfo:
+        ans = self._info_table.get(layer_id, None)
+        if ans is None:
+            ans = self._info_table[layer_id] = self._compute_fill_info(layer_id)
+        return ans
+
+    def get_fill(self, layer_id: int, bbox: BBox, blockages: Sequence[BBox] = ()
+                 ) -> Dict[Tuple[str, str], np.ndarray]:
+        """Compute metal fill on the given layer.
+
+        Parameters
+        ----------
+        layer_id : int
+            the metal layer ID.
+        bbox : BBox
+            the region to fill.
+        blockages : Sequence[BBox]
+            bounding boxes of existing shapes on this layer.
+
+        Returns
+        -------
+        ans : Dict[Tuple[str, str], np.ndarray]
+            map from layer/purpose pair to rectangle array table, with columns
+            (xl, yl, xh, yh, nx, ny, spx, spy).
+        """
+        info = self.get_fill_info(layer_id)
+        if info.is_vertical:
+            u0, v0, u1, v1 = bbox.xl, bbox.yl, bbox.xh, bbox.yh
+            blk = np.array([(b.xl, b.yl, b.xh, b.yh) for b in blockages],
+                           dtype=np.int64).reshape(-1, 4)
+        else:
+            u0, v0, u1, v1 = bbox.yl, bbox.xl, bbox.yh, bbox.xh
+            blk = np.array([(b.yl, b.xl, b.yh, b.xh) for b in blockages],
+                           dtype=np.int64).reshape(-1, 4)
+        # expand blockages by fill margin
+        blk = blk + np.array([-info.margin_u, -info.margin_v, info.margin_u, info.margin_v],
+                             dtype=np.int64)
+
+        num_color = len(info.lp_list)
+        tr_pitch = info.pitch * info.tr_step
+        if num_color > 1 and info.tr_step % 2 == 1:
+            arr_pitch = 2 * tr_pitch
+        else:
+            arr_pitch = tr_pitch
+            num_color = 1
+        seg_pitch = info.seg_len + info.seg_sp
+        w2 = info.w // 2
+        tr_off = info.pitch // 2
+
+        rows = {lp: [] for lp in info.lp_list}
+        for fu0, fu1, fv0, fv1 in _get_free_rects(u0, u1, v0, v1, blk):
+            # first/last track fully inside the free region
+            tr0 = -(-(fu0 + w2 - tr_off) // tr_pitch)
+            tr1 = (fu1 - w2 - tr_off) // tr_pitch
+            if info.seg_len == 0:
+                seg_v = fv0
+                seg_len = fv1 - fv0
+                nseg = 1
+                if tr1 < tr0 or seg_len < info.len_min:
+                    continue
+            else:
+                seg0 = -(-fv0 // seg_pitch)
+                seg1 = (fv1 - info.seg_len) // seg_pitch
+                if tr1 < tr0 or seg1 < seg0:
+                    continue
+                seg_v = seg0 * seg_pitch
+                seg_len = info.seg_len
+                nseg = seg1 - seg0 + 1
+            for color in range(num_color):
+                first = tr0 + color
+                if first > tr1:
+                    continue
+                tr_idx = first * info.tr_step
+                ntr = (tr1 - first) // num_color + 1
+                tr_u = tr_idx * info.pitch + tr_off - w2
+                lp = info.lp_list[tr_idx % len(info.lp_list)]
+                if info.is_vertical:
+                    rows[lp].append((tr_u, seg_v, tr_u + info.w, seg_v + seg_len,
+                                     ntr, nseg, arr_pitch, seg_pitch))
+                else:
+                    rows[lp].append((seg_v, tr_u, seg_v + seg_len, tr_u + info.w,
+                                     nseg, ntr, seg_pitch, arr_pitch))
+
+        return {lp: np.array(val, dtype=np.int64).reshape(-1, 8) for lp, val in rows.items()}
+
+    def _compute_fill_info(self, layer_id: int) -> MetalFillInfo:
+        sp_x, sp_y, margin_x, margin_y, density = self._tech_params['fill'][layer_id]
+        tr_dir, tr_w, tr_sp = self._tech_params['routing_grid'][layer_id]
+        lp_list = [tuple(lp) for lp in self._config['lay_purp_list'][layer_id]]
+
+        is_vertical = (tr_dir == 'y')
+        pitch = tr_w + tr_sp
+        if is_vertical:
+            sp_u, sp_v, margin_u, margin_v = sp_x, sp_y, margin_x, margin_y
+        else:
+            sp_u, sp_v, margin_u, margin_v = sp_y, sp_x, margin_y, margin_x
+
+        # use the sparsest track step that can still meet the density target and the
+        # maximum space rule between tracks.
+        tr_step = 1
+        while ((tr_step + 1) * pitch - tr_w <= sp_u and
+               tr_w >= density * (tr_step + 1) * pitch):
+            tr_step += 1
+
+        lay_purp = lp_list[0]
+        sp_le = _get_rule_value(self._config['sp_le_min'][lay_purp], tr_w)
+        len_min = _get_min_length(self._config['len_min'][lay_purp], tr_w)
+
+        # break fill wires into segments to get close to the density target
+        frac = density * tr_step * pitch / tr_w
+        if frac >= 1:
+            # fill each track across the whole free region; wires only end at blockages.
+            seg_sp = sp_le
+            seg_len = 0
+        else:
+            seg_sp = max(sp_le, 1)
+            seg_len = max(len_min, int(round(frac * seg_sp / (1 - frac))))
+            seg_sp = min(max(int(round(seg_len * (1 - frac) / frac)), sp_le), sp_v)
+
+        return MetalFillInfo(lp_list, is_vertical, tr_w, pitch, tr_step, seg_len, seg_sp,
+                             len_min, margin_u, margin_v)
+
+
+def _get_rule_value(table: Sequence[Tuple[float, int]], w: int) -> int:
+    for w_max, val in table:
+        if w <= w_max:
+            return val
+    raise ValueError(f'No rule for width {w}')
+
+
+def _get_min_length(len_config: Mapping[str, Any], w: int) -> int:
+    for w_max, area_min, *_ in len_config['w_al_list']:
+        if w <= w_max:
+            return -(-area_min // w)
+    return 0
+
+
+def _get_free_rects(u0: int, u1: int, v0: int, v1: int, blk: np.ndarray
+                    ) -> List[Tuple[int, int, int, int]]:
+    """Decompose the region minus blockages into (u0, u1, v0, v1) rectangles.
+
+    The region is cut into slabs along u at blockage edges, and the free intervals along v
+    are computed for each slab.  Adjacent slabs with identical free intervals are merged.
+    """
+    blk = blk[(blk[:, 0] < u1) & (blk[:, 2] > u0) & (blk[:, 1] < v1) & (blk[:, 3] > v0)]
+    if blk.shape[0] == 0:
+        return [(u0, u1, v0, v1)]
+
+    cuts = np.unique(np.concatenate(([u0, u1], np.clip(blk[:, [0, 2]].ravel(), u0, u1))))
+    ans = []
+    prev_ivals = None
+    prev_u0 = u0
+    for su0, su1 in zip(cuts[:-1], cuts[1:]):
+        mask = (blk[:, 0] < su1) & (blk[:, 2] > su0)
+        sub = blk[mask]
+        ivals = []
+        if sub.shape[0] == 0:
+            ivals.append((v0, v1))
+        else:
+            order = np.argsort(sub[:, 1], kind='stable')
+            cur = v0
+            for bv0, bv1 in zip(sub[order, 1].tolist(), sub[order, 3].tolist()):
+                if bv0 > cur:
+                    ivals.append((cur, min(bv0, v1)))
+                cur = max(cur, bv1)
+                if cur >= v1:
+                    break
+            if cur < v1:
+                ivals.append((cur, v1))
+
+        if ivals != prev_ivals:
+            if prev_ivals:
+                ans.extend((prev_u0, int(su0), a, b) for a, b in prev_ivals)
+            prev_ivals = ivals
+            prev_u0 = int(su0)
+    if prev_ivals:
+        ans.extend((prev_u0, u1, a, b) for a, b in prev_ivals)
+    return ans
@@ -13,10 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Tuple
+from typing import Any, List, Tuple, Set, Dict, Optional, Sequence, Mapping, Iterable, Callable
 
-from math import ceil
+from math import gcd
+from fractions import Fraction
 from itertools import chain
+from functools import lru_cache, partial
+from dataclasses import dataclass
 
 from pybag.core import BBox
 
@@ -47,11 +50,72 @@ def _get_fin_y(num: int, fin_p: int, fin_h: int, top_edge: bool = False) -> int:
     return num * fin_p + (fin_p + (2 * top_edge - 1) * fin_h) // 2
 
 
+FillKeyType = Tuple[str, str, int, int, int, int, int, int]
+TileIdxType = Tuple[int, int]
+LpType = Tuple[str, str]
+# (PO dummy, OD dummy, FB, threshold/implant/well layers) of a fill tile
+TileLayersType = Tuple[LpType, LpType, LpType, Tuple[LpType, ...]]
+
+
+@dataclass(frozen=True)
+class FillArrayInfo:
+    """An array of identical fill tiles, with lower-left corner at (xl, yl)."""
+    info: LayoutInfo
+    xl: int
+    yl: int
+    nx: int
+    ny: int
+    spx: int
+    spy: int
+
+
+@dataclass(frozen=True)
+class FillCacheStats:
+    """Fill tile cache statistics.
+
+    misses is the number of unique tiles computed; a tile evicted from the cache and
+    requested again is counted again.  currsize is the number of tiles in the cache.
+    """
+    num_tiles: int
+    hits: int
+    misses: int
+    currsize: int
+    num_x_solve: int
+    num_y_solve: int
+
+
+class _FillCache:
+    """The fill tile cache and X/Y fill interval caches of one fill configuration."""
+
+    def __init__(self, fill_config: Mapping[str, Any]) -> None:
+        cache_size: int = fill_config.get('cache_size', 1024)
+        # X/Y fill intervals are independent, so cache them separately.
+        self.get_od_x_list = lru_cache(maxsize=cache_size)(partial(_get_od_x_list, fill_config))
+        self.get_od_y_list = lru_cache(maxsize=cache_size)(partial(_get_od_y_list, fill_config))
+        self.get_fill_info = lru_cache(maxsize=cache_size)(
+            partial(_get_fill_info, fill_config, self.get_od_x_list, self.get_od_y_list))
+
+
+# get_device_tech() creates a new FillTechCDSFFMPT on every call, so the caches are kept
+# here, one per fill configuration, to be shared across calls.
+_fill_cache_table: Dict[Tuple[Tuple[str, Any], ...], _FillCache] = {}
+
+
+def _get_fill_cache(fill_config: Mapping[str, Any]) -> _FillCache:
+    key = tuple(sorted(fill_config.items()))
+    ans = _fill_cache_table.get(key, None)
+    if ans is None:
+        ans = _fill_cache_table[key] = _FillCache(fill_config)
+    return ans
+
+
 class FillTechCDSFFMPT(FillTech):
 
     def __init__(self, tech_info: TechInfo) -> None:
         FillTech.__init__(self, tech_info)
         self._fill_config = tech_info.config['fill']
+        self._cache = _get_fill_cache(self._fill_config)
+        self._tile_layers: Dict[Tuple[str, str], TileLayersType] = {}
 
     @property
     def mos_type_default(self) -> str:
@@ -61,128 +125,482 @@ class FillTechCDSFFMPT(FillTech):
     def threshold_default(self) -> str:
         return 'standard'
 
+    @property
+    def fill_cache_stats(self) -> FillCacheStats:
+        """Statistics of get_fill_info() calls since the last reset_fill_cache().
+
+        The cache is shared by all fill technology objects with the same fill configuration.
+        """
+        cache = self._cache
+        info = cache.get_fill_info.cache_info()
+        x_info = cache.get_od_x_list.cache_info()
+        y_info = cache.get_od_y_list.cache_info()
+        return FillCacheStats(info.hits + info.misses, info.hits, info.misses, info.currsize,
+                              x_info.misses, y_info.misses)
+
+    def reset_fill_cache(self) -> None:
+        cache = self._cache
+        cache.get_fill_info.cache_clear()
+        cache.get_od_x_list.cache_clear()
+        cache.get_od_y_list.cache_clear()
+
     def get_fill_info(self, mos_type: str, threshold: str, w: int, h: int,
                       el: Param, eb: Param, er: Param, et: Param) -> LayoutInfo:
-        fin_p: int = self._fill_config['mos_pitch']
-        fin_h: int = self._fill_config['fin_h']
-        lch: int = self._fill_config['lch']
-        po_od_exty: int = self._fill_config['po_od_exty']
-        po_spy: int = self._fill_config['po_spy']
-        sd_pitch: int = self._fill_config['sd_pitch']
-        od_spx: int = self._fill_config['od_spx']
-        od_density_min: float = self._fill_config['od_density_min']
-        imp_od_encx: int = self._fill_config['imp_od_encx']
-        imp_po_ency: int = self._fill_config['imp_po_ency']
-        fin_p2 = fin_p // 2
-        fin_h2 = fin_h // 2
-        od_edge_margin = max(imp_od_encx, od_spx // 2)
-        po_edge_margin = max(imp_po_ency, po_spy // 2)
-
-        mos_layer_table = self.tech_info.config['mos_lay_table']
-        po_lp = mos_layer_table['PO_DUMMY']
-        od_lp = mos_layer_table['OD_DUMMY']
-        fb_lp = mos_layer_table['FB']
-
-        builder = LayoutInfoBuilder()
-
-        # compute fill X intervals
-        bnd_xl = el.get('delta', 0)
-        bnd_xr = w - er.get('delta', 0)
-        bnd_yb = eb.get('delta', 0)
-        bnd_yt = h - et.get('delta', 0)
-        bbox = BBox(bnd_xl, bnd_yb, bnd_xr, bnd_yt)
-        fill_xl = bnd_xl + od_edge_margin
-        fill_xh = bnd_xr - od_edge_margin
-        fill_yl = bnd_yb + po_edge_margin
-        fill_yh = bnd_yt - po_edge_margin
-
-        # compute fill X/Y intervals
-        od_x_list, od_x_density = self._get_od_x_list(w, fill_xl, fill_xh, sd_pitch, lch, od_spx)
-        if not od_x_list:
-            return builder.get_info(bbox)
-
-        od_y_density = od_density_min / od_x_density
-        od_y_list = self._get_od_y_list(h, fill_yl, fill_yh, fin_p, fin_h, od_y_density)
-
-        if not od_y_list:
-            return builder.get_info(bbox)
-
-        # draw fills
-        ny = len(od_y_list)
-        for idx, (od_yb, od_yt) in enumerate(od_y_list):
-            po_yb = fill_yl if idx == 0 else od_yb - po_od_exty
-            po_yt = fill_yh if idx == ny - 1 else od_yt + po_od_exty
-            for od_xl, od_xr in od_x_list:
-                builder.add_rect_arr(od_lp, BBox(od_xl, od_yb, od_xr, od_yt))
-                nx = 1 + (od_xr - od_xl - lch) // sd_pitch
-                builder.add_rect_arr(po_lp, BBox(od_xl, po_yb, od_xl + lch, po_yt),
-                                     nx=nx, spx=sd_pitch)
-
-        # draw other layers
-        fin_yb = ((bnd_yb - fin_p2 + fin_h2) // fin_p) * fin_p + fin_p2 - fin_h2
-        fin_yt = -(-(bnd_yt - fin_p2 - fin_h2) // fin_p) * fin_p + fin_p2 + fin_h2
-        for imp_lp in self._thres_imp_well_layers_iter(mos_type, threshold):
-            builder.add_rect_arr(imp_lp, BBox(bnd_xl, bnd_yb, bnd_xr, bnd_yt))
-        builder.add_rect_arr(fb_lp, BBox(bnd_xl, fin_yb, bnd_xr, fin_yt))
-
-        return builder.get_info(bbox)
-
-    def _get_od_x_list(self, blk_w: int, fill_xl: int, fill_xh: int, sd_pitch: int, lch: int,
-                       od_spx: int) -> Tuple[List[Tuple[int, int]], float]:
-        num_sd_min: int = self._fill_config['num_sd_min']
-        num_sd_max: int = self._fill_config['num_sd_max']
-
-        fill_w = fill_xh - fill_xl
-
-        dum_spx = max(od_spx, sd_pitch - lch)
-        num_sd_sep = -(-(dum_spx + lch) // sd_pitch)
-
-        od_w_min = _get_od_w(num_sd_min, sd_pitch, lch)
-        if fill_w < od_w_min:
-            # too narrow; cannot draw anything
-            return [], 0.0
-        num_sd_tot = _get_num_sd(fill_w, sd_pitch, lch, round_up=False)
-        row_w = _get_od_w(num_sd_tot, sd_pitch, lch)
-        row_xl = (fill_xl + fill_xh - row_w) // 2
-        if num_sd_tot <= num_sd_max:
-            # we can just draw one dummy per row
-            od_x_list = [(row_xl, row_xl + row_w)]
-            od_x_density = row_w / blk_w
-        else:
-            # we need multiple dummies per row
-            info = fill_symmetric_max_density_info(num_sd_tot, num_sd_min, num_sd_max, num_sd_sep,
-                                                   [(num_sd_tot, 1, 0)],
-                                                   fill_on_edge=True, cyclic=False)
-            od_x_list = fill_symmetric_interval(info, d0=row_xl, d1=row_xl+lch, scale=sd_pitch)
-            od_x_density = info.get_fill_area(sd_pitch, lch) / blk_w
-
-        return od_x_list, od_x_density
-
-    def _get_od_y_list(self, blk_h: int, yl: int, yh: int, fin_p: int, fin_h: int,
-                       od_y_density: float) -> List[Tuple[int, int]]:
-        po_od_exty: int = self._fill_config['po_od_exty']
-        po_spy: int = self._fill_config['po_spy']
-        nfin_min: int = self._fill_config['nfin_min']
-        nfin_max: int = self._fill_config['nfin_max']
-        od_spy_max: int = self._fill_config['od_spy_max']
-
-        fin_h2 = fin_h // 2
-        fin_sep_min = -(-(fin_h + po_spy + 2 * po_od_exty) // fin_p)
-        fin_sep_max = (od_spy_max + fin_h) // fin_p
-
-        fin_start = _get_fin_num(yl + po_od_exty + fin_h2, fin_p, round_up=True)
-        fin_stop = _get_fin_num(yh - po_od_exty - fin_h2, fin_p, round_up=False)
-        fin_area = fin_stop - fin_start
-        area_specs = [(int(ceil(blk_h * od_y_density)), fin_p, fin_h)]
-        info = fill_symmetric_min_density_info(fin_area, nfin_min - 1, nfin_max - 1, fin_sep_min,
-                                               area_specs, sp_max=fin_sep_max, fill_on_edge=True,
-                                               cyclic=False)
-        d0 = fin_p * fin_start + (fin_p - fin_h) // 2
-        d1 = fin_p * fin_start + (fin_p + fin_h) // 2
-        return fill_symmetric_interval(info, d0=d0, d1=d1, scale=fin_p)
+        return self.get_fill_tile((mos_type, threshold, w, h, el.get('delta', 0),
+                                   eb.get('delta', 0), er.get('delta', 0), et.get('delta', 0)))
+
+    def get_fill_tile(self, key: FillKeyType) -> LayoutInfo:
+        """Returns the fill tile with the given key, as returned by get_tile_keys()."""
+        return self._cache.get_fill_info(self._get_tile_layers(key[0], key[1]), *key[2:])
+
+    def fill_region(self, bbox: BBox, tile_w: int, tile_h: int, keepouts: Sequence[BBox] = (),
+                    mos_type: str = '', threshold: str = '') -> List[FillArrayInfo]:
+        """Fill the given region with FEOL dummy fill tiles.
+
+        The region is divided into tiles of size tile_w x tile_h, starting from the lower-left
+        corner.  Tiles that intersect a keepout on one side are shrunk away from it, other
+        tiles that intersect a keepout are skipped.  Each distinct tile is computed once, and
+        identical tiles are returned as arrays.
+        """
+        tile_keys = self.get_tile_keys(bbox, tile_w, tile_h, keepouts, mos_type, threshold)
+        ans = []
+        for key, row_cols in _group_tiles(tile_keys).items():
+            row_runs = {row: _get_row_runs(cols) for row, cols in row_cols.items()}
+            ans.extend(_get_fill_arrays(self.get_fill_tile(key), bbox, tile_w, tile_h,
+                                        row_runs))
+        return ans
+
+    def get_fill_region(self, bbox: BBox, tile_w: int, tile_h: int,
+                        keepouts: Sequence[BBox] = (), mos_type: str = '', threshold: str = ''
+                        ) -> 'FillRegion':
+        """Like fill_region(), but returns a FillRegion that supports incremental updates."""
+        return FillRegion(self, bbox, tile_w, tile_h, keepouts,
+                          mos_type or self.mos_type_default, threshold or self.threshold_default)
+
+    def get_tile_keys(self, bbox: BBox, tile_w: int, tile_h: int, keepouts: Sequence[BBox] = (),
+                      mos_type: str = '', threshold: str = '') -> Dict[TileIdxType, FillKeyType]:
+        """Returns the key of each fill tile of the given region, in row-major order.
+
+        Tiles are indexed by (column, row), and tiles that cannot be filled are omitted.  See
+        fill_region() for how the region is tiled.
+        """
+        mos_type = mos_type or self.mos_type_default
+        threshold = threshold or self.threshold_default
+        ncol = -(-(bbox.xh - bbox.xl) // tile_w)
+        nrow = -(-(bbox.yh - bbox.yl) // tile_h)
+        tile_keys = {}
+        for row in range(nrow):
+            yl = bbox.yl + row * tile_h
+            yh = min(yl + tile_h, bbox.yh)
+            row_keepouts = [box for box in keepouts if box.yl < yh and box.yh > yl]
+            for col in range(ncol):
+                key = _get_tile_key(bbox, tile_w, tile_h, col, row, row_keepouts, mos_type,
+                                    threshold)
+                if key is not None:
+                    tile_keys[(col, row)] = key
+        return tile_keys
+
+    def _get_tile_layers(self, mos_type: str, threshold: str) -> TileLayersType:
+        key = (mos_type, threshold)
+        ans = self._tile_layers.get(key, None)
+        if ans is None:
+            mos_layer_table = self.tech_info.config['mos_lay_table']
+            ans = self._tile_layers[key] = (
+                mos_layer_table['PO_DUMMY'], mos_layer_table['OD_DUMMY'], mos_layer_table['FB'],
+                tuple(self._thres_imp_well_layers_iter(mos_type, threshold)))
+        return ans
 
     def _thres_imp_well_layers_iter(self, mos_type_name: str, threshold: str):
         tech_info = self.tech_info
         return chain(tech_info.get_threshold_layers(mos_type_name, threshold),
                      tech_info.get_implant_layers(mos_type_name),
                      tech_info.get_well_layers(mos_type_name))
+
+
+class FillRegion:
+    """The fill tiles of a region, supporting incremental updates after layout edits.
+
+    The fill geometry and tile arrays of each tile class are kept by this object, so updates
+    only compute tiles whose class changed, and only re-merge the rows containing them.
+
+    Parameters
+    ----------
+    tech : FillTechCDSFFMPT
+        the fill technology object.
+    bbox : BBox
+        the region to fill.
+    tile_w : int
+        the tile width.
+    tile_h : int
+        the tile height.
+    keepouts : Sequence[BBox]
+        the fill keepout regions.
+    mos_type : str
+        the fill transistor type.
+    threshold : str
+        the fill transistor threshold.
+    """
+
+    def __init__(self, tech: FillTechCDSFFMPT, bbox: BBox, tile_w: int, tile_h: int,
+                 keepouts: Sequence[BBox], mos_type: str, threshold: str) -> None:
+        self._tech = tech
+        self._bbox = bbox
+        self._tile_w = tile_w
+        self._tile_h = tile_h
+        self._keepouts = list(keepouts)
+        self._mos_type = mos_type
+        self._threshold = threshold
+        self._ncol = -(-(bbox.xh - bbox.xl) // tile_w)
+        self._nrow = -(-(bbox.yh - bbox.yl) // tile_h)
+
+        self._tile_keys = tech.get_tile_keys(bbox, tile_w, tile_h, self._keepouts, mos_type,
+                                             threshold)
+        # map from tile class to the columns of its tiles in each row
+        self._row_cols = _group_tiles(self._tile_keys)
+        # map from tile class to the (column, nx) runs of its tiles in each row
+        self._row_runs: Dict[FillKeyType, Dict[int, List[Tuple[int, int]]]] = {}
+        # map from tile class to the rows whose runs are out of date
+        self._dirty_rows: Dict[FillKeyType, Set[int]] = {key: set(row_cols) for key, row_cols
+                                                         in self._row_cols.items()}
+        self._key_arrays: Dict[FillKeyType, List[FillArrayInfo]] = {}
+        self._info_table: Dict[FillKeyType, LayoutInfo] = {}
+        self._arrays: Optional[List[FillArrayInfo]] = None
+
+    @property
+    def keepouts(self) -> List[BBox]:
+        return self._keepouts
+
+    @property
+    def tile_keys(self) -> Dict[TileIdxType, FillKeyType]:
+        return self._tile_keys
+
+    @property
+    def arrays(self) -> List[FillArrayInfo]:
+        """The fill tile arrays of this region."""
+        if self._dirty_rows:
+            bbox = self._bbox
+            for key, rows in self._dirty_rows.items():
+                row_cols = self._row_cols.get(key, None)
+                if row_cols is None:
+                    # no tiles of this class are left
+                    self._row_runs.pop(key, None)
+                    self._key_arrays.pop(key, None)
+                    self._info_table.pop(key, None)
+                    continue
+                row_runs = self._row_runs.setdefault(key, {})
+                for row in rows:
+                    cols = row_cols.get(row, None)
+                    if cols is None:
+                        row_runs.pop(row, None)
+                    else:
+                        row_runs[row] = _get_row_runs(cols)
+                info = self._info_table.get(key, None)
+                if info is None:
+                    info = self._info_table[key] = self._tech.get_fill_tile(key)
+                self._key_arrays[key] = _get_fill_arrays(info, bbox, self._tile_w, self._tile_h,
+                                                         row_runs)
+            self._dirty_rows.clear()
+            self._arrays = None
+        if self._arrays is None:
+            self._arrays = list(chain.from_iterable(self._key_arrays.values()))
+        return self._arrays
+
+    def update(self, changed: Sequence[BBox], keepouts: Sequence[BBox]) -> List[TileIdxType]:
+        """Update the fill after a layout edit.
+
+        Only tiles intersecting one of the changed regions are recomputed with the new
+        keepouts.  For a moved block, both its old and new bounding boxes should be given.
+
+        Parameters
+        ----------
+        changed : Sequence[BBox]
+            the changed regions.
+        keepouts : Sequence[BBox]
+            the new fill keepout regions.
+
+        Returns
+        -------
+        idx_list : List[TileIdxType]
+            the (column, row) indices of tiles that changed.
+        """
+        bbox = self._bbox
+        tile_w = self._tile_w
+        tile_h = self._tile_h
+        self._keepouts = keepouts = list(keepouts)
+
+        idx_set = set()
+        for box in changed:
+            col0 = max((box.xl - bbox.xl) // tile_w, 0)
+            col1 = min((box.xh - 1 - bbox.xl) // tile_w, self._ncol - 1)
+            row0 = max((box.yl - bbox.yl) // tile_h, 0)
+            row1 = min((box.yh - 1 - bbox.yl) // tile_h, self._nrow - 1)
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    idx_set.add((col, row))
+
+        ans = []
+        for idx in sorted(idx_set, key=lambda v: (v[1], v[0])):
+            col, row = idx
+            yl = bbox.yl + row * tile_h
+            yh = yl + tile_h
+            xl = bbox.xl + col * tile_w
+            xh = xl + tile_w
+            tile_keepouts = [b for b in keepouts
+                             if b.yl < yh and b.yh > yl and b.xl < xh and b.xh > xl]
+            key = _get_tile_key(bbox, tile_w, tile_h, col, row, tile_keepouts, self._mos_type,
+                                self._threshold)
+            old_key = self._tile_keys.get(idx, None)
+            if key != old_key:
+                if old_key is not None:
+                    self._remove_tile(old_key, col, row)
+                if key is None:
+                    del self._tile_keys[idx]
+                else:
+                    self._tile_keys[idx] = key
+                    self._row_cols.setdefault(key, {}).setdefault(row, set()).add(col)
+                    self._dirty_rows.setdefault(key, set()).add(row)
+                ans.append(idx)
+
+        return ans
+
+    def _remove_tile(self, key: FillKeyType, col: int, row: int) -> None:
+        row_cols = self._row_cols[key]
+        cols = row_cols[row]
+        cols.discard(col)
+        if not cols:
+            del row_cols[row]
+            if not row_cols:
+                del self._row_cols[key]
+        self._dirty_rows.setdefault(key, set()).add(row)
+
+
+def _get_tile_key(bbox: BBox, tile_w: int, tile_h: int, col: int, row: int,
+                  keepouts: Sequence[BBox], mos_type: str, threshold: str
+                  ) -> Optional[FillKeyType]:
+    xl = bbox.xl + col * tile_w
+    xh = min(xl + tile_w, bbox.xh)
+    yl = bbox.yl + row * tile_h
+    yh = min(yl + tile_h, bbox.yh)
+    deltas = _get_keepout_deltas(xl, yl, xh, yh, keepouts)
+    if deltas is None:
+        return None
+    return (mos_type, threshold, xh - xl, yh - yl) + deltas
+
+
+def _get_keepout_deltas(xl: int, yl: int, xh: int, yh: int, keepouts: Sequence[BBox]
+                        ) -> Optional[Tuple[int, int, int, int]]:
+    """Returns the (left, bottom, right, top) edge deltas that clear all keepouts.
+
+    Returns None if the tile cannot be filled.
+    """
+    dxl = dyb = dxr = dyt = 0
+    for box in keepouts:
+        ixl = max(xl, box.xl)
+        ixh = min(xh, box.xh)
+        iyl = max(yl, box.yl)
+        iyh = min(yh, box.yh)
+        if ixl >= ixh or iyl >= iyh:
+            continue
+        full_x = ixl == xl and ixh == xh
+        full_y = iyl == yl and iyh == yh
+        if full_x and full_y:
+            return None
+        if full_y and ixl == xl:
+            dxl = max(dxl, ixh - xl)
+        elif full_y and ixh == xh:
+            dxr = max(dxr, xh - ixl)
+        elif full_x and iyl == yl:
+            dyb = max(dyb, iyh - yl)
+        elif full_x and iyh == yh:
+            dyt = max(dyt, yh - iyl)
+        else:
+            return None
+
+    if dxl + dxr >= xh - xl or dyb + dyt >= yh - yl:
+        return None
+    return dxl, dyb, dxr, dyt
+
+
+def _group_tiles(tile_keys: Mapping[TileIdxType, FillKeyType]
+                 ) -> Dict[FillKeyType, Dict[int, Set[int]]]:
+    """Group tiles by key, as the set of tile columns in each row."""
+    ans: Dict[FillKeyType, Dict[int, Set[int]]] = {}
+    for (col, row), key in tile_keys.items():
+        ans.setdefault(key, {}).setdefault(row, set()).add(col)
+    return ans
+
+
+def _get_row_runs(cols: Iterable[int]) -> List[Tuple[int, int]]:
+    """Merge the tile columns of one row into (col, nx) runs of consecutive columns."""
+    ans = []
+    col0 = nx = 0
+    for col in sorted(cols):
+        if nx and col == col0 + nx:
+            nx += 1
+        else:
+            if nx:
+                ans.append((col0, nx))
+            col0 = col
+            nx = 1
+    if nx:
+        ans.append((col0, nx))
+    return ans
+
+
+def _get_fill_arrays(info: LayoutInfo, bbox: BBox, tile_w: int, tile_h: int,
+                     row_runs: Mapping[int, List[Tuple[int, int]]]) -> List[FillArrayInfo]:
+    """Merge identical runs in consecutive rows into fill tile arrays."""
+    run_table: Dict[Tuple[int, int], List[int]] = {}
+    for row in sorted(row_runs):
+        for run in row_runs[row]:
+            run_table.setdefault(run, []).append(row)
+
+    ans = []
+    for (col0, nx), row_list in run_table.items():
+        row0 = row_list[0]
+        ny = 1
+        for row in row_list[1:]:
+            if row == row0 + ny:
+                ny += 1
+            else:
+                ans.append(FillArrayInfo(info, bbox.xl + col0 * tile_w, bbox.yl + row0 * tile_h,
+                                         nx, ny, tile_w, tile_h))
+                row0 = row
+                ny = 1
+        ans.append(FillArrayInfo(info, bbox.xl + col0 * tile_w, bbox.yl + row0 * tile_h,
+                                 nx, ny, tile_w, tile_h))
+    return ans
+
+
+def _get_fill_info(fill_config: Mapping[str, Any],
+                   get_od_x_list: Callable[[int, int, int], Tuple[List[Tuple[int, int]], Fraction]],
+                   get_od_y_list: Callable[[int, int, int], List[Tuple[int, int]]],
+                   layers: TileLayersType, w: int, h: int, dxl: int, dyb: int, dxr: int, dyt: int
+                   ) -> LayoutInfo:
+    fin_p: int = fill_config['mos_pitch']
+    fin_h: int = fill_config['fin_h']
+    lch: int = fill_config['lch']
+    po_od_exty: int = fill_config['po_od_exty']
+    po_spy: int = fill_config['po_spy']
+    sd_pitch: int = fill_config['sd_pitch']
+    od_spx: int = fill_config['od_spx']
+    od_density_min: float = fill_config['od_density_min']
+    imp_od_encx: int = fill_config['imp_od_encx']
+    imp_po_ency: int = fill_config['imp_po_ency']
+    fin_p2 = fin_p // 2
+    fin_h2 = fin_h // 2
+    od_edge_margin = max(imp_od_encx, od_spx // 2)
+    po_edge_margin = max(imp_po_ency, po_spy // 2)
+
+    po_lp, od_lp, fb_lp, imp_lps = layers
+
+    builder = LayoutInfoBuilder()
+
+    # compute fill X intervals
+    bnd_xl = dxl
+    bnd_xr = w - dxr
+    bnd_yb = dyb
+    bnd_yt = h - dyt
+    bbox = BBox(bnd_xl, bnd_yb, bnd_xr, bnd_yt)
+    fill_xl = bnd_xl + od_edge_margin
+    fill_xh = bnd_xr - od_edge_margin
+    fill_yl = bnd_yb + po_edge_margin
+    fill_yh = bnd_yt - po_edge_margin
+
+    # compute fill X/Y intervals
+    od_x_list, od_x_density = get_od_x_list(fill_xl, fill_xh, w)
+    if not od_x_list:
+        return builder.get_info(bbox)
+
+    # the Y solution only depends on the target OD area.  Fill areas are multiples of
+    # gcd(fin_p, fin_h), so rounding the target up to that leaves the solution unchanged
+    # and lets tiles of different widths share it.  The target is computed in exact
+    # arithmetic, so float rounding never moves it to a different cache key.
+    area_q = gcd(fin_p, fin_h)
+    area_frac = h * Fraction(str(od_density_min)) / od_x_density
+    od_area_min = -(-area_frac.numerator // (area_frac.denominator * area_q)) * area_q
+    od_y_list = get_od_y_list(fill_yl, fill_yh, od_area_min)
+
+    if not od_y_list:
+        return builder.get_info(bbox)
+
+    # draw fills
+    ny = len(od_y_list)
+    for idx, (od_yb, od_yt) in enumerate(od_y_list):
+        po_yb = fill_yl if idx == 0 else od_yb - po_od_exty
+        po_yt = fill_yh if idx == ny - 1 else od_yt + po_od_exty
+        for od_xl, od_xr in od_x_list:
+            builder.add_rect_arr(od_lp, BBox(od_xl, od_yb, od_xr, od_yt))
+            nx = 1 + (od_xr - od_xl - lch) // sd_pitch
+            builder.add_rect_arr(po_lp, BBox(od_xl, po_yb, od_xl + lch, po_yt),
+                                 nx=nx, spx=sd_pitch)
+
+    # draw other layers
+    fin_yb = ((bnd_yb - fin_p2 + fin_h2) // fin_p) * fin_p + fin_p2 - fin_h2
+    fin_yt = -(-(bnd_yt - fin_p2 - fin_h2) // fin_p) * fin_p + fin_p2 + fin_h2
+    for imp_lp in imp_lps:
+        builder.add_rect_arr(imp_lp, BBox(bnd_xl, bnd_yb, bnd_xr, bnd_yt))
+    builder.add_rect_arr(fb_lp, BBox(bnd_xl, fin_yb, bnd_xr, fin_yt))
+
+    return builder.get_info(bbox)
+
+
+def _get_od_x_list(fill_config: Mapping[str, Any], fill_xl: int, fill_xh: int, blk_w: int
+                   ) -> Tuple[List[Tuple[int, int]], Fraction]:
+    lch: int = fill_config['lch']
+    sd_pitch: int = fill_config['sd_pitch']
+    od_spx: int = fill_config['od_spx']
+    num_sd_min: int = fill_config['num_sd_min']
+    num_sd_max: int = fill_config['num_sd_max']
+
+    fill_w = fill_xh - fill_xl
+
+    dum_spx = max(od_spx, sd_pitch - lch)
+    num_sd_sep = -(-(dum_spx + lch) // sd_pitch)
+
+    od_w_min = _get_od_w(num_sd_min, sd_pitch, lch)
+    if fill_w < od_w_min:
+        # too narrow; cannot draw anything
+        return [], Fraction(0)
+    num_sd_tot = _get_num_sd(fill_w, sd_pitch, lch, round_up=False)
+    row_w = _get_od_w(num_sd_tot, sd_pitch, lch)
+    row_xl = (fill_xl + fill_xh - row_w) // 2
+    if num_sd_tot <= num_sd_max:
+        # we can just draw one dummy per row
+        od_x_list = [(row_xl, row_xl + row_w)]
+        od_x_density = Fraction(row_w, blk_w)
+    else:
+        # we need multiple dummies per row
+        info = fill_symmetric_max_density_info(num_sd_tot, num_sd_min, num_sd_max, num_sd_sep,
+                                               [(num_sd_tot, 1, 0)],
+                                               fill_on_edge=True, cyclic=False)
+        od_x_list = fill_symmetric_interval(info, d0=row_xl, d1=row_xl+lch, scale=sd_pitch)
+        od_x_density = Fraction(info.get_fill_area(sd_pitch, lch), blk_w)
+
+    return od_x_list, od_x_density
+
+
+def _get_od_y_list(fill_config: Mapping[str, Any], yl: int, yh: int, od_area_min: int
+                   ) -> List[Tuple[int, int]]:
+    fin_p: int = fill_config['mos_pitch']
+    fin_h: int = fill_config['fin_h']
+    po_od_exty: int = fill_config['po_od_exty']
+    po_spy: int = fill_config['po_spy']
+    nfin_min: int = fill_config['nfin_min']
+    nfin_max: int = fill_config['nfin_max']
+    od_spy_max: int = fill_config['od_spy_max']
+
+    fin_h2 = fin_h // 2
+    fin_sep_min = -(-(fin_h + po_spy + 2 * po_od_exty) // fin_p)
+    fin_sep_max = (od_spy_max + fin_h) // fin_p
+
+    fin_start = _get_fin_num(yl + po_od_exty + fin_h2, fin_p, round_up=True)
+    fin_stop = _get_fin_num(yh - po_od_exty - fin_h2, fin_p, round_up=False)
+    fin_area = fin_stop - fin_start
+    area_specs = [(od_area_min, fin_p, fin_h)]
+    info = fill_symmetric_min_density_info(fin_area, nfin_min - 1, nfin_max - 1, fin_sep_min,
+                                           area_specs, sp_max=fin_sep_max, fill_on_edge=True,
+                                           cyclic=False)
+    d0 = fin_p * fin_start + (fin_p - fin_h) // 2
+    d1 = fin_p * fin_start + (fin_p + fin_h) // 2
+    return fill_symmetric_interval(info, d0=d0, d1=d1, scale=fin_p)
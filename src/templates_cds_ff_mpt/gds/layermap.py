@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module compiles Virtuoso stream layer map files into lookup tables."""
+
+from typing import Dict, Tuple, Union
+
+import os
+from pathlib import Path
+from functools import lru_cache
+
+LpType = Tuple[str, str]
+GdsLayerType = Tuple[int, int]
+
+
+class LayerMap:
+    """A compiled (layer, purpose) to (stream layer, datatype) table.
+
+    Entries with extra attributes (e.g. 'mask1Color locked') are stored separately, keyed by
+    (layer, purpose, attributes).  If a (layer, purpose) pair appears more than once without
+    attributes, the first entry is used.
+
+    Parameters
+    ----------
+    table : Dict[LpType, GdsLayerType]
+        the plain layer/purpose table.
+    attr_table : Dict[Tuple[str, str, str], GdsLayerType]
+        the table of entries with attributes.
+    """
+
+    def __init__(self, table: Dict[LpType, GdsLayerType],
+                 attr_table: Dict[Tuple[str, str, str], GdsLayerType]) -> None:
+        self._table = table
+        self._attr_table = attr_table
+
+    @property
+    def table(self) -> Dict[LpType, GdsLayerType]:
+        return self._table
+
+    def __contains__(self, lay_purp: LpType) -> bool:
+        return lay_purp in self._table
+
+    def __getitem__(self, lay_purp: LpType) -> GdsLayerType:
+        ans = self._table.get(lay_purp, None)
+        if ans is None:
+            raise ValueError(f'Layer/purpose {lay_purp} not found in layer map.')
+        return ans
+
+    def get_attr_layer(self, layer: str, purpose: str, attrs: str) -> GdsLayerType:
+        return self._attr_table[(layer, purpose, attrs)]
+
+    @classmethod
+    def from_file(cls, fname: Union[str, Path]) -> 'LayerMap':
+        """Returns the compiled layer map of the given file.
+
+        Compiled layer maps are cached, and only recompiled if the file is modified.
+        """
+        fname = os.path.abspath(fname)
+        return _compile_layermap(fname, os.stat(fname).st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _compile_layermap(fname: str, mtime: int) -> LayerMap:
+    table = {}
+    attr_table = {}
+    with open(fname, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            parts = line.split()
+            if len(parts) < 4:
+                continue
+            layer, purpose = parts[0], parts[1]
+            gds_lay = (int(parts[2]), int(parts[3]))
+            if len(parts) > 4:
+                attr_table.setdefault((layer, purpose, ' '.join(parts[4:])), gds_lay)
+            else:
+                table.setdefault((layer, purpose), gds_lay)
+    return LayerMap(table, attr_table)
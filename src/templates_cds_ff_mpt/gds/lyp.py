@@ -0,0 +1,244 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module indexes KLayout layer properties (.lyp) files.
+
+The XML file is parsed incrementally, and each element is discarded once its entry is
+recorded, so the full DOM is never built.  The index is cached in a binary sidecar file,
+keyed by the SHA-256 hash of the .lyp file, so later loads only hash the file and unpickle
+the index.
+"""
+
+from typing import Dict, Tuple, Mapping, Optional, Union
+
+import os
+import pickle
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass
+from xml.etree.ElementTree import iterparse
+
+from .layermap import LpType, GdsLayerType
+
+_index_version = 1
+_hash_chunk_size = 1 << 20
+
+
+@dataclass(frozen=True)
+class LypEntry:
+    name: str
+    source: str
+    frame_color: str
+    fill_color: str
+    frame_brightness: int
+    fill_brightness: int
+    dither_pattern: str
+    line_style: str
+    valid: bool
+    visible: bool
+    transparent: bool
+    width: int
+    marked: bool
+    xfill: bool
+    animation: int
+
+
+@dataclass(frozen=True)
+class LypStyle:
+    """A custom dither pattern or line style."""
+    name: str
+    order: int
+    pattern: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class LypIndex:
+    """The index of a layer properties file.
+
+    Entries whose name is not of the form 'layer.purpose - lay/dt' are only found in
+    name_table.  Custom styles are keyed by their order, which is the number in 'C<order>'
+    style references.
+    """
+    name_table: Mapping[str, LypEntry]
+    lp_table: Mapping[LpType, LypEntry]
+    gds_table: Mapping[GdsLayerType, LypEntry]
+    dither_patterns: Mapping[int, LypStyle]
+    line_styles: Mapping[int, LypStyle]
+
+
+class LayerProperties:
+    """Display property lookups on a KLayout layer properties file.
+
+    The index is only loaded on the first lookup, from the sidecar file if it matches the
+    hash of the .lyp file, and otherwise by parsing the .lyp file and rewriting the sidecar.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the .lyp file name.
+    cache_fname : Optional[Union[str, Path]]
+        the sidecar file name.  Defaults to the .lyp file name with an '.idx' suffix appended.
+    """
+
+    def __init__(self, fname: Union[str, Path],
+                 cache_fname: Optional[Union[str, Path]] = None) -> None:
+        self._fname = Path(fname)
+        if cache_fname is None:
+            self._cache_fname = self._fname.with_name(self._fname.name + '.idx')
+        else:
+            self._cache_fname = Path(cache_fname)
+        self._index: Optional[LypIndex] = None
+
+    @property
+    def index(self) -> LypIndex:
+        if self._index is None:
+            self._index = self._load()
+        return self._index
+
+    def __contains__(self, lay_purp: LpType) -> bool:
+        return lay_purp in self.index.lp_table
+
+    def get_entry(self, layer: str, purpose: str) -> LypEntry:
+        ans = self.index.lp_table.get((layer, purpose), None)
+        if ans is None:
+            raise ValueError(f'Layer/purpose ({layer}, {purpose}) not found in {self._fname}.')
+        return ans
+
+    def get_entry_by_gds(self, gds_lay: int, gds_dt: int) -> LypEntry:
+        ans = self.index.gds_table.get((gds_lay, gds_dt), None)
+        if ans is None:
+            raise ValueError(f'GDS layer {gds_lay}/{gds_dt} not found in {self._fname}.')
+        return ans
+
+    def get_dither_pattern(self, entry: LypEntry) -> Optional[LypStyle]:
+        """Returns the custom dither pattern of the given entry, None if it is built-in."""
+        return _get_style(self.index.dither_patterns, entry.dither_pattern)
+
+    def get_line_style(self, entry: LypEntry) -> Optional[LypStyle]:
+        """Returns the custom line style of the given entry, None if it is built-in."""
+        return _get_style(self.index.line_styles, entry.line_style)
+
+    def _load(self) -> LypIndex:
+        file_hash = _get_file_hash(self._fname)
+        if self._cache_fname.is_file():
+            try:
+                with open(self._cache_fname, 'rb') as f:
+                    content = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                content = None
+            if (isinstance(content, dict) and content.get('version') == _index_version and
+                    content.get('hash') == file_hash):
+                return content['index']
+
+        index = parse_lyp(self._fname)
+        content = dict(version=_index_version, hash=file_hash, index=index)
+        tmp_fname = self._cache_fname.with_name(self._cache_fname.name + '.tmp')
+        try:
+            with open(tmp_fname, 'wb') as f:
+                pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fname, self._cache_fname)
+        except OSError:
+            # the .lyp file may live in a read-only install directory
+            pass
+        return index
+
+
+def parse_lyp(fname: Union[str, Path]) -> LypIndex:
+    """Parse the given .lyp file into an index, without building the full XML DOM."""
+    name_table: Dict[str, LypEntry] = {}
+    lp_table: Dict[LpType, LypEntry] = {}
+    gds_table: Dict[GdsLayerType, LypEntry] = {}
+    dither_patterns: Dict[int, LypStyle] = {}
+    line_styles: Dict[int, LypStyle] = {}
+
+    for _, elem in iterparse(str(fname), events=('end',)):
+        tag = elem.tag
+        if tag == 'properties':
+            entry = _get_entry(elem)
+            name_table.setdefault(entry.name, entry)
+            lay_purp, gds_lay = _parse_entry_name(entry.name)
+            if lay_purp is not None:
+                lp_table.setdefault(lay_purp, entry)
+                gds_table.setdefault(gds_lay, entry)
+            elem.clear()
+        elif tag == 'custom-dither-pattern':
+            style = _get_style_def(elem, tuple(line.text or '' for line in elem.iter('line')))
+            dither_patterns[style.order] = style
+            elem.clear()
+        elif tag == 'custom-line-style':
+            style = _get_style_def(elem, (elem.findtext('pattern', ''),))
+            line_styles[style.order] = style
+            elem.clear()
+
+    return LypIndex(name_table, lp_table, gds_table, dither_patterns, line_styles)
+
+
+def _get_entry(elem) -> LypEntry:
+    def _text(tag: str) -> str:
+        return elem.findtext(tag, '').strip()
+
+    def _bool(tag: str) -> bool:
+        return _text(tag) == 'true'
+
+    def _int(tag: str) -> int:
+        val = _text(tag)
+        return int(val) if val else 0
+
+    return LypEntry(
+        name=_text('name'),
+        source=_text('source'),
+        frame_color=_text('frame-color'),
+        fill_color=_text('fill-color'),
+        frame_brightness=_int('frame-brightness'),
+        fill_brightness=_int('fill-brightness'),
+        dither_pattern=_text('dither-pattern'),
+        line_style=_text('line-style'),
+        valid=_bool('valid'),
+        visible=_bool('visible'),
+        transparent=_bool('transparent'),
+        width=_int('width'),
+        marked=_bool('marked'),
+        xfill=_bool('xfill'),
+        animation=_int('animation'),
+    )
+
+
+def _get_style_def(elem, pattern: Tuple[str, ...]) -> LypStyle:
+    return LypStyle(elem.findtext('name', '').strip(), int(elem.findtext('order', '0')),
+                    pattern)
+
+
+def _parse_entry_name(name: str) -> Tuple[Optional[LpType], Optional[GdsLayerType]]:
+    """Parse names of the form 'layer.purpose - lay/dt'."""
+    lp_str, sep, gds_str = name.rpartition(' - ')
+    layer, dot, purpose = lp_str.partition('.')
+    lay_str, slash, dt_str = gds_str.partition('/')
+    if not sep or not dot or not slash or not lay_str.isdigit() or not dt_str.isdigit():
+        return None, None
+    return (layer, purpose), (int(lay_str), int(dt_str))
+
+
+def _get_style(table: Mapping[int, LypStyle], ref: str) -> Optional[LypStyle]:
+    if ref.startswith('C') and ref[1:].isdigit():
+        return table.get(int(ref[1:]), None)
+    return None
+
+
+def _get_file_hash(fname: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(_hash_chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,267 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module streams LayoutInfo rectangle arrays out to OASIS files.
+
+Rectangle arrays are written as single RECTANGLE records with OASIS repetitions, and
+rectangles of the same size or pitch only store their position through modal variables.
+The records of each cell are encoded with vectorized NumPy operations, then
+DEFLATE-compressed in a CBLOCK.
+"""
+
+from typing import Mapping, Union
+
+import zlib
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from xbase.layout.data import LayoutInfo
+
+from ..util import get_rect_arrays, normalize_rect_arrays, XL, YL, XH, YH, NX, NY, SPX, SPY
+from .layermap import LayerMap, LpType
+
+_magic = b'%SEMI-OASIS\r\n'
+
+# record IDs
+_START = 1
+_END = 2
+_CELL_NAME = 14
+_RECTANGLE = 20
+_CBLOCK = 34
+
+# RECTANGLE info byte bits
+_BIT_W = 0x40
+_BIT_H = 0x20
+_BIT_X = 0x10
+_BIT_Y = 0x08
+_BIT_R = 0x04
+_BIT_D = 0x02
+_BIT_L = 0x01
+
+_end_size = 256
+
+
+class OASISWriter:
+    """Writes an OASIS file, one cell at a time.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the output file name.
+    layer_map : LayerMap
+        the compiled layer map.
+    resolution : float
+        the layout resolution, in layout units.  The layout unit is assumed to be microns.
+    compress : bool
+        True to compress the records of each cell in a CBLOCK.
+    buffering : int
+        the file buffer size, in bytes.
+    """
+
+    def __init__(self, fname: Union[str, Path], layer_map: LayerMap, resolution: float = 0.0005,
+                 compress: bool = True, buffering: int = 1 << 20) -> None:
+        self._lay_map = layer_map
+        self._compress = compress
+        self._cell_names = set()
+        self._stream = open(fname, 'wb', buffering=buffering)
+
+        self._stream.write(_magic)
+        data = bytearray()
+        _put_uint(data, _START)
+        _put_bstr(data, b'1.0')
+        _put_real(data, 1 / resolution)
+        # table offsets are stored in the END record
+        _put_uint(data, 1)
+        self._stream.write(data)
+
+    def __enter__(self) -> 'OASISWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+        data = bytearray()
+        _put_uint(data, _END)
+        for _ in range(12):
+            _put_uint(data, 0)
+        # pad the END record to exactly 256 bytes; the last byte is the validation scheme
+        pad_len = _end_size - len(data) - 1
+        pad_len -= 1 if pad_len < 128 else 2
+        _put_uint(data, pad_len)
+        data.extend(b'\0' * pad_len)
+        _put_uint(data, 0)
+        self._stream.write(data)
+        self._stream.close()
+
+    def add_layout_info(self, cell_name: str, info: LayoutInfo) -> None:
+        self.add_rect_arrays(cell_name, get_rect_arrays(info))
+
+    def add_rect_arrays(self, cell_name: str, tables: Mapping[LpType, np.ndarray]) -> None:
+        """Write a cell containing the given rectangle arrays.
+
+        tables maps each layer/purpose pair to a table with columns
+        (xl, yl, xh, yh, nx, ny, spx, spy).
+        """
+        if cell_name in self._cell_names:
+            raise ValueError(f'Duplicate cell name: {cell_name}')
+        self._cell_names.add(cell_name)
+
+        data = bytearray()
+        _put_uint(data, _CELL_NAME)
+        _put_bstr(data, cell_name.encode('ascii'))
+
+        for lay_purp, table in tables.items():
+            gds_lay, gds_dt = self._lay_map[lay_purp]
+            data.extend(_get_rectangle_bytes(normalize_rect_arrays(table), gds_lay, gds_dt))
+
+        if self._compress:
+            comp = zlib.compressobj(6, zlib.DEFLATED, -15)
+            comp_data = comp.compress(bytes(data)) + comp.flush()
+            header = bytearray()
+            _put_uint(header, _CBLOCK)
+            _put_uint(header, 0)
+            _put_uint(header, len(data))
+            _put_uint(header, len(comp_data))
+            self._stream.write(header)
+            self._stream.write(comp_data)
+        else:
+            self._stream.write(data)
+
+
+def _get_rectangle_bytes(table: np.ndarray, gds_lay: int, gds_dt: int) -> bytes:
+    """Encode the given rectangle arrays as RECTANGLE records on a single layer.
+
+    Rows are sorted so that consecutive records can reuse the modal width, height and
+    repetition.  All record fields are unsigned integers, so the records are first laid out
+    as an (N, 13) table of field values, then varint-encoded in one pass.
+    """
+    num = table.shape[0]
+    if num == 0:
+        return b''
+    # flip negative pitches so the origin is the lower-left element
+    neg_x = table[:, SPX] < 0
+    shift_x = (table[neg_x, NX] - 1) * table[neg_x, SPX]
+    table[neg_x, XL] += shift_x
+    table[neg_x, XH] += shift_x
+    table[neg_x, SPX] *= -1
+    neg_y = table[:, SPY] < 0
+    shift_y = (table[neg_y, NY] - 1) * table[neg_y, SPY]
+    table[neg_y, YL] += shift_y
+    table[neg_y, YH] += shift_y
+    table[neg_y, SPY] *= -1
+
+    w = table[:, XH] - table[:, XL]
+    h = table[:, YH] - table[:, YL]
+    order = np.lexsort((table[:, SPY], table[:, SPX], table[:, NY], table[:, NX], h, w))
+    table = table[order]
+    w = w[order]
+    h = h[order]
+    nx = table[:, NX]
+    ny = table[:, NY]
+    spx = table[:, SPX]
+    spy = table[:, SPY]
+
+    new_w = np.ones(num, dtype=bool)
+    new_w[1:] = w[1:] != w[:-1]
+    new_h = np.ones(num, dtype=bool)
+    new_h[1:] = h[1:] != h[:-1]
+    is_rep = (nx > 1) | (ny > 1)
+    rep_idx = np.flatnonzero(is_rep)
+    new_rep = np.zeros(num, dtype=bool)
+    if rep_idx.size:
+        rep_params = table[rep_idx, NX:]
+        new_rep[rep_idx[0]] = True
+        new_rep[rep_idx[1:]] = np.any(rep_params[1:] != rep_params[:-1], axis=1)
+    rep_both = new_rep & (nx > 1) & (ny > 1)
+    rep_x = new_rep & (ny == 1)
+    rep_y = new_rep & (nx == 1)
+
+    vals = np.zeros((num, 13), dtype=np.int64)
+    mask = np.zeros((num, 13), dtype=bool)
+    vals[:, 0] = _RECTANGLE
+    vals[:, 1] = (_BIT_X | _BIT_Y | np.where(new_w, _BIT_W, 0) | np.where(new_h, _BIT_H, 0) |
+                  np.where(is_rep, _BIT_R, 0))
+    vals[0, 1] |= _BIT_L | _BIT_D
+    vals[0, 2] = gds_lay
+    vals[0, 3] = gds_dt
+    vals[:, 4] = w
+    vals[:, 5] = h
+    vals[:, 6] = _sint_to_uint(table[:, XL])
+    vals[:, 7] = _sint_to_uint(table[:, YL])
+    mask[:, [0, 1, 6, 7]] = True
+    mask[0, 2:4] = True
+    mask[:, 4] = new_w
+    mask[:, 5] = new_h
+
+    # repetition type 0 reuses the previous repetition
+    vals[:, 8] = np.select([rep_both, rep_x, rep_y], [1, 2, 3], 0)
+    mask[:, 8] = is_rep
+    vals[:, 9] = np.where(nx > 1, nx - 2, ny - 2)
+    vals[:, 10] = np.select([rep_both, rep_x], [ny - 2, spx], spy)
+    vals[:, 11] = spx
+    vals[:, 12] = spy
+    mask[:, 9] = new_rep
+    mask[:, 10] = new_rep
+    mask[:, 11] = rep_both
+    mask[:, 12] = rep_both
+    return _encode_uints(vals[mask])
+
+
+def _sint_to_uint(vals: np.ndarray) -> np.ndarray:
+    """Map signed integers to the OASIS signed-integer encoding."""
+    return np.where(vals < 0, (-vals << 1) | 1, vals << 1)
+
+
+def _encode_uints(vals: np.ndarray) -> bytes:
+    """Varint-encode the given array of non-negative integers."""
+    nbytes = np.ones(vals.size, dtype=np.int64)
+    rem = vals >> 7
+    while np.any(rem):
+        nbytes += rem > 0
+        rem >>= 7
+    pos = np.cumsum(nbytes) - nbytes
+    ans = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        sel = nbytes > k
+        cont = np.where(nbytes[sel] > k + 1, 0x80, 0)
+        ans[pos[sel] + k] = ((vals[sel] >> (7 * k)) & 0x7F) | cont
+    return ans.tobytes()
+
+
+def _put_uint(data: bytearray, val: int) -> None:
+    while val >= 0x80:
+        data.append((val & 0x7F) | 0x80)
+        val >>= 7
+    data.append(val)
+
+
+def _put_bstr(data: bytearray, val: bytes) -> None:
+    _put_uint(data, len(val))
+    data.extend(val)
+
+
+def _put_real(data: bytearray, val: float) -> None:
+    ival = int(round(val))
+    if ival >= 0 and abs(val - ival) < 1e-9 * max(1.0, abs(val)):
+        _put_uint(data, 0)
+        _put_uint(data, ival)
+    else:
+        _put_uint(data, 7)
+        data.extend(struct.pack('<d', val))
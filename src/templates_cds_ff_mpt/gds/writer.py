@@ -0,0 +1,222 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module streams LayoutInfo rectangle arrays out to GDSII files.
+
+Single rectangles are written as BOUNDARY elements.  Rectangle arrays are written as AREF
+elements of shared unit cells containing a single rectangle, so the file size does not
+grow with the number of array elements.
+"""
+
+from typing import Dict, List, Tuple, Mapping, Union
+
+import time
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from xbase.layout.data import LayoutInfo
+
+from ..util import get_rect_arrays, normalize_rect_arrays, XL, YL, XH, YH, NX, NY
+from .layermap import LayerMap, LpType
+
+# maximum number of rows/columns of an AREF
+_max_colrow = 32767
+
+# record types
+_HEADER = 0x0002
+_BGNLIB = 0x0102
+_LIBNAME = 0x0206
+_UNITS = 0x0305
+_ENDLIB = 0x0400
+_BGNSTR = 0x0502
+_STRNAME = 0x0606
+_ENDSTR = 0x0700
+_BOUNDARY = 0x0800
+_AREF = 0x0B00
+_LAYER = 0x0D02
+_DATATYPE = 0x0E02
+_XY = 0x1003
+_ENDEL = 0x1100
+_SNAME = 0x1206
+_COLROW = 0x1302
+
+# fixed-size BOUNDARY element, written with a single vectorized fill.
+_boundary_dtype = np.dtype([('bnd', '>u2', 2), ('lay_hdr', '>u2', 2), ('lay', '>i2'),
+                            ('dt_hdr', '>u2', 2), ('dt', '>i2'), ('xy_hdr', '>u2', 2),
+                            ('xy', '>i4', 10), ('endel', '>u2', 2)])
+
+
+class GDSWriter:
+    """Writes a GDSII library, one structure at a time.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the output file name.
+    layer_map : LayerMap
+        the compiled layer map.
+    lib_name : str
+        the GDSII library name.
+    resolution : float
+        the layout resolution, in layout units.
+    layout_unit : float
+        the layout unit, in meters.
+    buffering : int
+        the file buffer size, in bytes.
+    """
+
+    def __init__(self, fname: Union[str, Path], layer_map: LayerMap, lib_name: str = 'BAG_prim',
+                 resolution: float = 0.0005, layout_unit: float = 1.0e-6,
+                 buffering: int = 1 << 20) -> None:
+        self._lay_map = layer_map
+        self._stream = open(fname, 'wb', buffering=buffering)
+        self._timestamp = _get_timestamp()
+        # map from (gds layer, gds datatype, w, h) to unit cell name
+        self._unit_table: Dict[Tuple[int, int, int, int], str] = {}
+        self._cell_names = set()
+
+        self._write(_HEADER, struct.pack('>h', 600))
+        self._write(_BGNLIB, self._timestamp)
+        self._write(_LIBNAME, _pack_str(lib_name))
+        self._write(_UNITS, _pack_real8(resolution) + _pack_real8(resolution * layout_unit))
+
+    def __enter__(self) -> 'GDSWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+        for (gds_lay, gds_dt, w, h), name in self._unit_table.items():
+            self._begin_struct(name)
+            rect = np.array([[0, 0, w, h]], dtype=np.int64)
+            self._stream.write(_get_boundary_bytes(rect, gds_lay, gds_dt))
+            self._write(_ENDSTR)
+        self._write(_ENDLIB)
+        self._stream.close()
+
+    def add_layout_info(self, cell_name: str, info: LayoutInfo) -> None:
+        self.add_rect_arrays(cell_name, get_rect_arrays(info))
+
+    def add_rect_arrays(self, cell_name: str, tables: Mapping[LpType, np.ndarray]) -> None:
+        """Write a structure containing the given rectangle arrays.
+
+        tables maps each layer/purpose pair to a table with columns
+        (xl, yl, xh, yh, nx, ny, spx, spy).
+        """
+        self._begin_struct(cell_name)
+        for lay_purp, table in tables.items():
+            gds_lay, gds_dt = self._lay_map[lay_purp]
+            table = normalize_rect_arrays(table)
+            is_single = (table[:, NX] == 1) & (table[:, NY] == 1)
+            if np.any(is_single):
+                self._stream.write(_get_boundary_bytes(table[is_single, :4], gds_lay, gds_dt))
+            for row in table[~is_single].tolist():
+                self._write_aref(gds_lay, gds_dt, row)
+        self._write(_ENDSTR)
+
+    def _begin_struct(self, name: str) -> None:
+        if name in self._cell_names:
+            raise ValueError(f'Duplicate structure name: {name}')
+        self._cell_names.add(name)
+        self._write(_BGNSTR, self._timestamp)
+        self._write(_STRNAME, _pack_str(name))
+
+    def _write_aref(self, gds_lay: int, gds_dt: int, row: List[int]) -> None:
+        xl, yl, xh, yh, nx, ny, spx, spy = row
+        key = (gds_lay, gds_dt, xh - xl, yh - yl)
+        unit_name = self._unit_table.get(key, None)
+        if unit_name is None:
+            unit_name = self._unit_table[key] = f'__rect_L{gds_lay}_D{gds_dt}_{key[2]}x{key[3]}'
+        sname = _pack_str(unit_name)
+        for x0 in range(0, nx, _max_colrow):
+            ncol = min(nx - x0, _max_colrow)
+            for y0 in range(0, ny, _max_colrow):
+                nrow = min(ny - y0, _max_colrow)
+                ox = xl + x0 * spx
+                oy = yl + y0 * spy
+                self._write(_AREF)
+                self._write(_SNAME, sname)
+                self._write(_COLROW, struct.pack('>hh', ncol, nrow))
+                self._write(_XY, struct.pack('>6i', ox, oy, ox + ncol * spx, oy, ox,
+                                             oy + nrow * spy))
+                self._write(_ENDEL)
+
+    def _write(self, rtype: int, data: bytes = b'') -> None:
+        self._stream.write(struct.pack('>HH', len(data) + 4, rtype))
+        self._stream.write(data)
+
+
+def _get_boundary_bytes(rects: np.ndarray, gds_lay: int, gds_dt: int) -> bytes:
+    num = rects.shape[0]
+    data = np.empty(num, dtype=_boundary_dtype)
+    data['bnd'] = (4, _BOUNDARY)
+    data['lay_hdr'] = (6, _LAYER)
+    data['lay'] = gds_lay
+    data['dt_hdr'] = (6, _DATATYPE)
+    data['dt'] = gds_dt
+    data['xy_hdr'] = (44, _XY)
+    data['endel'] = (4, _ENDEL)
+    xy = data['xy']
+    xl = rects[:, XL]
+    yl = rects[:, YL]
+    xh = rects[:, XH]
+    yh = rects[:, YH]
+    xy[:, 0] = xl
+    xy[:, 1] = yl
+    xy[:, 2] = xh
+    xy[:, 3] = yl
+    xy[:, 4] = xh
+    xy[:, 5] = yh
+    xy[:, 6] = xl
+    xy[:, 7] = yh
+    xy[:, 8] = xl
+    xy[:, 9] = yl
+    return data.tobytes()
+
+
+def _pack_str(val: str) -> bytes:
+    ans = val.encode('ascii')
+    return ans + b'\0' if len(ans) % 2 else ans
+
+
+def _pack_real8(val: float) -> bytes:
+    """Encode a float in the GDSII 8-byte excess-64 base-16 format."""
+    if val == 0:
+        return b'\0' * 8
+    sign = 0x80 if val < 0 else 0
+    val = abs(val)
+    exp = 64
+    while val >= 1:
+        val /= 16
+        exp += 1
+    while val < 1 / 16:
+        val *= 16
+        exp -= 1
+    mant = int(round(val * (1 << 56)))
+    if mant >= (1 << 56):
+        mant >>= 4
+        exp += 1
+    return struct.pack('>Q', ((sign | exp) << 56) | mant)
+
+
+def _get_timestamp() -> bytes:
+    t = time.localtime()
+    stamp = (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+    return struct.pack('>12h', *stamp, *stamp)
@@ -0,0 +1,126 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module writes netlists with primitive instances grouped by parameter values."""
+
+from typing import Any, Dict, List, Tuple, Mapping, Iterable, Iterator, Union
+
+from pathlib import Path
+
+from pybag.enum import DesignOutput
+
+from .writer import PrimTemplate, PrimNetlistWriter, get_column
+
+ParamKeyType = Tuple[str, Tuple[Any, ...]]
+
+
+class DedupNetlistBuilder:
+    """Groups primitive instances into shared specialized subckts.
+
+    Each unique (cell, parameter values) combination is written once as a specialized subckt
+    with the parameter values baked in.  Instances of the same specialized subckt connected
+    to the same nets are parallel devices, and are merged into a single instance with an
+    m multiplier.
+
+    Parameters
+    ----------
+    templates : Mapping[str, PrimTemplate]
+        the primitive templates, from compile_templates().
+    output : DesignOutput
+        the netlist format.  Must match the format of templates.
+    """
+
+    def __init__(self, templates: Mapping[str, PrimTemplate], output: DesignOutput) -> None:
+        if output is not DesignOutput.SPECTRE and output is not DesignOutput.CDL:
+            raise ValueError(f'Unsupported netlist format: {output.name}')
+        self._templates = templates
+        self._output = output
+        self._subckt_table: Dict[ParamKeyType, str] = {}
+        # map from (subckt name, nets) to [instance name, multiplier]
+        self._inst_table: Dict[Tuple[str, Tuple[Any, ...]], List[Any]] = {}
+        self._num_inst = 0
+
+    @property
+    def num_subckts(self) -> int:
+        return len(self._subckt_table)
+
+    @property
+    def num_instances(self) -> int:
+        """Number of instances added, before merging parallel devices."""
+        return self._num_inst
+
+    @property
+    def num_merged(self) -> int:
+        """Number of instances after merging parallel devices."""
+        return len(self._inst_table)
+
+    def add_instances(self, cell_name: str, names: Iterable[Any], terms: Mapping[str, Any],
+                      params: Mapping[str, Any]) -> None:
+        """Add instances of the given primitive.
+
+        See PrimTemplate.format_lines() for the format of names, terms, and params.
+        """
+        temp = self._templates[cell_name]
+        term_cols = [get_column(terms[name], broadcast=True) for name in temp.terms]
+        param_cols = [get_column(params[name], broadcast=True) for name in temp.params]
+        num_terms = len(term_cols)
+
+        subckt_table = self._subckt_table
+        inst_table = self._inst_table
+        num = 0
+        for name, *row in zip(get_column(names), *term_cols, *param_cols):
+            param_key = (cell_name, tuple(row[num_terms:]))
+            subckt_name = subckt_table.get(param_key, None)
+            if subckt_name is None:
+                subckt_name = subckt_table[param_key] = f'{cell_name}_p{len(subckt_table)}'
+            inst_key = (subckt_name, tuple(row[:num_terms]))
+            inst_info = inst_table.get(inst_key, None)
+            if inst_info is None:
+                inst_table[inst_key] = [name, 1]
+            else:
+                inst_info[1] += 1
+            num += 1
+        self._num_inst += num
+
+    def write(self, fname: Union[str, Path], **kwargs: Any) -> None:
+        """Write the subckt definitions followed by the instances to the given file.
+
+        kwargs are passed to PrimNetlistWriter.
+        """
+        with PrimNetlistWriter(fname, self._templates, **kwargs) as writer:
+            writer.write_lines(self._subckt_lines())
+            writer.write_lines(self._inst_lines())
+
+    def _subckt_lines(self) -> Iterator[str]:
+        is_cdl = self._output is DesignOutput.CDL
+        for (cell_name, param_vals), subckt_name in self._subckt_table.items():
+            temp = self._templates[cell_name]
+            ports = ' '.join(temp.terms)
+            body = temp.fmt.format('0', *temp.terms, *param_vals)
+            if is_cdl:
+                pin_info = ' '.join((f'{term}:B' for term in temp.terms))
+                yield f'\n.SUBCKT {subckt_name} {ports}\n*.PININFO {pin_info}\n{body}.ENDS\n'
+            else:
+                yield f'\nsubckt {subckt_name} {ports}\n{body}ends {subckt_name}\n'
+        yield '\n'
+
+    def _inst_lines(self) -> Iterator[str]:
+        if self._output is DesignOutput.CDL:
+            fmt = 'X{} {} {}{}\n'
+        else:
+            fmt = 'X{} ({}) {}{}\n'
+        for (subckt_name, nets), (name, mult) in self._inst_table.items():
+            m_str = f' m={mult}' if mult > 1 else ''
+            yield fmt.format(name, ' '.join(map(str, nets)), subckt_name, m_str)
@@ -0,0 +1,188 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module compiles netlist_setup.yaml and gen_config.yaml into a binary lookup index.
+
+Run this module as a script to build the index:
+
+    python -m templates_cds_ff_mpt.netlist.index netlist_setup.yaml gen_config.yaml out.pkl
+"""
+
+from typing import Any, Dict, Tuple, Mapping, Optional, Union
+
+import os
+import pickle
+import argparse
+from pathlib import Path
+from dataclasses import dataclass
+
+from bag.io import read_yaml
+
+IndexKeyType = Tuple[str, str]
+SourceInfoType = Tuple[int, int]
+
+_index_version = 1
+# gen_config.yaml sections that are not device categories
+_gen_skip_keys = {'header'}
+
+
+@dataclass(frozen=True)
+class NetlistIndexEntry:
+    lib_name: str
+    cell_name: str
+    terms: Tuple[str, ...]
+    is_prim: bool
+    props: Tuple[str, ...]
+    dev_type: str
+    model: str
+    port_order: Tuple[str, ...]
+    params: Mapping[str, Tuple[Tuple[str, str], ...]]
+
+
+class NetlistIndex:
+    """A (lib, cell) lookup index of netlist_setup.yaml and gen_config.yaml.
+
+    The index file is only read on the first lookup.  If source file names are given, the
+    index is rebuilt from them (and saved) when it is missing or older than the sources.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the index file name.
+    setup_fname : Optional[Union[str, Path]]
+        the netlist_setup.yaml file name.
+    gen_fname : Optional[Union[str, Path]]
+        the gen_config.yaml file name.
+    """
+
+    def __init__(self, fname: Union[str, Path], setup_fname: Optional[Union[str, Path]] = None,
+                 gen_fname: Optional[Union[str, Path]] = None) -> None:
+        self._fname = Path(fname)
+        self._setup_fname = setup_fname
+        self._gen_fname = gen_fname
+        self._table: Optional[Dict[IndexKeyType, NetlistIndexEntry]] = None
+
+    @property
+    def table(self) -> Mapping[IndexKeyType, NetlistIndexEntry]:
+        if self._table is None:
+            self._table = self._load()
+        return self._table
+
+    def __contains__(self, key: IndexKeyType) -> bool:
+        return key in self.table
+
+    def get_entry(self, lib_name: str, cell_name: str) -> NetlistIndexEntry:
+        ans = self.table.get((lib_name, cell_name), None)
+        if ans is None:
+            raise ValueError(f'Cell {lib_name}/{cell_name} not found in netlist index.')
+        return ans
+
+    def get_terms(self, lib_name: str, cell_name: str) -> Tuple[str, ...]:
+        return self.get_entry(lib_name, cell_name).terms
+
+    def get_port_order(self, lib_name: str, cell_name: str) -> Tuple[str, ...]:
+        return self.get_entry(lib_name, cell_name).port_order
+
+    def get_model(self, lib_name: str, cell_name: str) -> str:
+        return self.get_entry(lib_name, cell_name).model
+
+    def get_params(self, lib_name: str, cell_name: str, fmt: str
+                   ) -> Tuple[Tuple[str, str], ...]:
+        return self.get_entry(lib_name, cell_name).params.get(fmt, ())
+
+    def _load(self) -> Dict[IndexKeyType, NetlistIndexEntry]:
+        sources = None
+        if self._setup_fname is not None and self._gen_fname is not None:
+            sources = _get_source_info(self._setup_fname, self._gen_fname)
+
+        if self._fname.is_file():
+            with open(self._fname, 'rb') as f:
+                content = pickle.load(f)
+            if (content['version'] == _index_version and
+                    (sources is None or content['sources'] == sources)):
+                return content['table']
+        if sources is None:
+            raise ValueError(f'Netlist index {self._fname} is missing or out of date, '
+                             f'and source files are not given.')
+        return compile_netlist_index(self._setup_fname, self._gen_fname, self._fname)
+
+
+def compile_netlist_index(setup_fname: Union[str, Path], gen_fname: Union[str, Path],
+                          out_fname: Union[str, Path]) -> Dict[IndexKeyType, NetlistIndexEntry]:
+    """Compile the netlist index and write it to out_fname.  Returns the index table."""
+    table = build_netlist_table(read_yaml(setup_fname), read_yaml(gen_fname))
+    content = dict(version=_index_version, sources=_get_source_info(setup_fname, gen_fname),
+                   table=table)
+
+    out_fname = Path(out_fname)
+    out_fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fname = out_fname.with_name(out_fname.name + '.tmp')
+    with open(tmp_fname, 'wb') as f:
+        pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_fname, out_fname)
+    return table
+
+
+def build_netlist_table(setup: Mapping[str, Any], gen_config: Mapping[str, Any]
+                        ) -> Dict[IndexKeyType, NetlistIndexEntry]:
+    # map from primitive cell name to (device type, model name)
+    model_table: Dict[str, Tuple[str, str]] = {}
+    for dev_type, dev_config in gen_config.items():
+        if dev_type not in _gen_skip_keys:
+            for cell_name, model in dev_config.get('types', []):
+                model_table[cell_name] = (dev_type, model)
+
+    table = {}
+    for lib_name, lib_table in setup['netlist_map'].items():
+        for cell_name, cell_info in lib_table.items():
+            terms = tuple(cell_info['in_terms']) + tuple(cell_info['out_terms'])
+            terms += tuple(cell_info['io_terms'])
+            props = tuple(cell_info['props'].keys())
+            dev_type = model = ''
+            port_order = terms
+            params = {}
+            if lib_name == 'BAG_prim' and cell_name in model_table:
+                dev_type, model = model_table[cell_name]
+                dev_config = gen_config[dev_type]
+                port_order = tuple(dev_config.get('port_order', {}).get(cell_name, terms))
+                params = {fmt: tuple((name, str(val)) for name, val in val_list)
+                          for fmt, val_list in dev_config.items()
+                          if fmt.isupper() and isinstance(val_list, list)}
+            table[(lib_name, cell_name)] = NetlistIndexEntry(
+                lib_name, cell_name, terms, cell_info['is_prim'], props, dev_type, model,
+                port_order, params)
+    return table
+
+
+def _get_source_info(*fnames: Union[str, Path]) -> Tuple[SourceInfoType, ...]:
+    ans = []
+    for fname in fnames:
+        stat = os.stat(fname)
+        ans.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(ans)
+
+
+def run_main() -> None:
+    parser = argparse.ArgumentParser(description='Compile the netlist lookup index.')
+    parser.add_argument('setup_fname', help='netlist_setup.yaml file name.')
+    parser.add_argument('gen_fname', help='gen_config.yaml file name.')
+    parser.add_argument('out_fname', help='output index file name.')
+    args = parser.parse_args()
+
+    compile_netlist_index(args.setup_fname, args.gen_fname, args.out_fname)
+
+
+if __name__ == '__main__':
+    run_main()
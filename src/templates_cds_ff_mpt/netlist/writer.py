@@ -0,0 +1,238 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module writes flat netlists of BAG primitives without building per-instance objects."""
+
+from typing import Any, Dict, Tuple, Mapping, Iterable, Iterator, Union
+
+import re
+from pathlib import Path
+from dataclasses import dataclass
+from itertools import islice, repeat
+
+import numpy as np
+
+from pybag.enum import DesignOutput
+
+from bag.io import read_yaml
+
+_prim_lib = 'BAG_prim'
+
+# subckt definition syntax of each supported netlist format.
+_subckt_syntax = {
+    DesignOutput.CDL: (re.compile(r'^\.SUBCKT\s+(\S+)\s*(.*)$', re.IGNORECASE),
+                       re.compile(r'^\.ENDS\b', re.IGNORECASE), '*'),
+    DesignOutput.SPECTRE: (re.compile(r'^subckt\s+(\S+)\s*(.*)$'),
+                           re.compile(r'^ends\b'), '//'),
+}
+
+
+@dataclass(frozen=True)
+class PrimTemplate:
+    """A precompiled instance line template of a single primitive.
+
+    fmt is a str.format() template with positional fields: field 0 is the instance name,
+    followed by the nets connected to terms, followed by the values of params.
+    """
+    cell_name: str
+    terms: Tuple[str, ...]
+    params: Tuple[str, ...]
+    fmt: str
+
+    def format_lines(self, names: Iterable[Any], terms: Mapping[str, Any],
+                     params: Mapping[str, Any]) -> Iterator[str]:
+        """Returns an iterator of instance lines from column data.
+
+        terms and params map each terminal/parameter name to either a column of values or a
+        single value shared by all instances.  The number of lines is the length of names.
+        """
+        cols = [get_column(names)]
+        cols.extend(get_column(terms[name], broadcast=True) for name in self.terms)
+        cols.extend(get_column(params[name], broadcast=True) for name in self.params)
+        return map(self.fmt.format, *cols)
+
+
+def compile_templates(setup_fname: Union[str, Path], output: DesignOutput,
+                      root_dir: Union[str, Path]) -> Dict[str, PrimTemplate]:
+    """Compile instance line templates of all BAG primitives for the given netlist format.
+
+    The primitive netlist file and the terminal/parameter names of each primitive are read
+    from netlist_setup.yaml.  Each primitive subckt in the primitive netlist file must contain
+    a single device, which is flattened into the instance line template.
+
+    Parameters
+    ----------
+    setup_fname : Union[str, Path]
+        the netlist_setup.yaml file name.
+    output : DesignOutput
+        the netlist format.  Only CDL and SPECTRE are supported.
+    root_dir : Union[str, Path]
+        the directory that paths in prim_files are relative to, usually the BAG workspace
+        directory.
+
+    Returns
+    -------
+    ans : Dict[str, PrimTemplate]
+        map from primitive cell name to its template.
+    """
+    syntax = _subckt_syntax.get(output, None)
+    if syntax is None:
+        raise ValueError(f'Unsupported netlist format: {output.name}')
+
+    setup = read_yaml(setup_fname)
+    prim_fname = setup['prim_files'][output.value]
+    if not prim_fname:
+        raise ValueError(f'No primitive netlist file for format: {output.name}')
+
+    cell_table: Mapping[str, Mapping[str, Any]] = setup['netlist_map'][_prim_lib]
+    with open(Path(root_dir, prim_fname), 'r') as f:
+        subckt_table = _parse_subckts(f, syntax)
+
+    ans = {}
+    for cell_name, (ports, body) in subckt_table.items():
+        cell_info = cell_table.get(cell_name, None)
+        if cell_info is None or len(body) != 1:
+            continue
+        param_names = tuple(sorted(cell_info['props'].keys()))
+        ans[cell_name] = _compile_line(cell_name, ports, param_names, body[0])
+    return ans
+
+
+class PrimNetlistWriter:
+    """Streams instance lines of BAG primitives to a buffered file.
+
+    Lines are formatted lazily from column data and written in chunks, so memory usage is
+    bounded by the chunk size regardless of the number of instances.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the output file name.
+    templates : Mapping[str, PrimTemplate]
+        the primitive templates, from compile_templates().
+    chunk_size : int
+        number of lines to write at once.
+    buffering : int
+        the file buffer size, in bytes.
+    """
+
+    def __init__(self, fname: Union[str, Path], templates: Mapping[str, PrimTemplate],
+                 chunk_size: int = 65536, buffering: int = 1 << 20) -> None:
+        self._templates = templates
+        self._chunk_size = chunk_size
+        self._stream = open(fname, 'w', buffering=buffering)
+        self._num_lines = 0
+
+    def __enter__(self) -> 'PrimNetlistWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def num_lines(self) -> int:
+        return self._num_lines
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def write_instances(self, cell_name: str, names: Iterable[Any], terms: Mapping[str, Any],
+                        params: Mapping[str, Any]) -> int:
+        """Write instances of the given primitive.  Returns the number of instances written.
+
+        See PrimTemplate.format_lines() for the format of names, terms, and params.
+        """
+        return self.write_lines(self._templates[cell_name].format_lines(names, terms, params))
+
+    def write_lines(self, lines: Iterable[str]) -> int:
+        """Write newline-terminated lines to file.  Returns the number of lines written."""
+        lines = iter(lines)
+        num = 0
+        while True:
+            chunk = list(islice(lines, self._chunk_size))
+            if not chunk:
+                break
+            self._stream.write(''.join(chunk))
+            num += len(chunk)
+        self._num_lines += num
+        return num
+
+
+def get_column(val: Any, broadcast: bool = False) -> Iterable[Any]:
+    """Returns the values of a column of instance data as an iterable.
+
+    NumPy arrays are converted to lists of Python scalars.  If broadcast is True, a single
+    string or number is repeated indefinitely, so it can be zipped with other columns.
+    """
+    if isinstance(val, np.ndarray):
+        return val.tolist()
+    if broadcast and isinstance(val, (str, int, float)):
+        return repeat(val)
+    return val
+
+
+def _parse_subckts(lines: Iterable[str], syntax: Tuple[Any, Any, str]
+                   ) -> Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    start_re, end_re, comment = syntax
+    ans = {}
+    cur_name = ''
+    cur_ports = ()
+    cur_body = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(comment):
+            continue
+        if cur_name:
+            if end_re.match(line):
+                ans[cur_name] = (cur_ports, tuple(cur_body))
+                cur_name = ''
+            elif not line.startswith('parameters '):
+                cur_body.append(line)
+        else:
+            match = start_re.match(line)
+            if match:
+                cur_name = match.group(1)
+                cur_ports = tuple(match.group(2).split())
+                cur_body = []
+    return ans
+
+
+def _compile_line(cell_name: str, ports: Tuple[str, ...], param_names: Tuple[str, ...],
+                  line: str) -> PrimTemplate:
+    port_idx = {name: idx + 1 for idx, name in enumerate(ports)}
+    param_idx = {name: idx + 1 + len(ports) for idx, name in enumerate(param_names)}
+    param_re = re.compile(r'\b({})\b'.format('|'.join(map(re.escape, param_names))))
+
+    def _sub_param(match) -> str:
+        return f'{{{param_idx[match.group(1)]}}}'
+
+    tokens = line.split()
+    # keep the device type letter so the instance name stays valid in CDL
+    parts = [_escape(tokens[0][0]) + '{0}']
+    for tok in tokens[1:]:
+        idx = port_idx.get(tok, None)
+        if idx is not None:
+            parts.append(f'{{{idx}}}')
+        elif '=' in tok and param_names:
+            key, val = tok.split('=', 1)
+            parts.append(f'{_escape(key)}={param_re.sub(_sub_param, _escape(val))}')
+        else:
+            parts.append(_escape(tok))
+
+    return PrimTemplate(cell_name, ports, param_names, ' '.join(parts) + '\n')
+
+
+def _escape(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
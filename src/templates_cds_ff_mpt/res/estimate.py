@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module estimates resistance and EM limits of metal resistors without layout."""
+
+from typing import Mapping, Union, Tuple
+
+from dataclasses import dataclass
+
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def get_res_em(w: ArrayLike, idc_scale: float, rms_dt: float
+               ) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+    """Returns (idc, irms, ipeak) of a single resistor strip of width w, in layout units."""
+    idc = 1.0e-3 * w * idc_scale
+    irms = 1e-3 * (0.02 * rms_dt * w * (w + 0.5)) ** 0.5
+    ipeak = 5e-3 * 2 * w
+    return idc, irms, ipeak
+
+
+@dataclass(frozen=True)
+class ResEstimate:
+    res: np.ndarray
+    idc: np.ndarray
+    irms: np.ndarray
+    ipeak: np.ndarray
+
+
+class MetalResEstimator:
+    """Vectorized resistance and EM estimator for metal resistor networks.
+
+    Parameters
+    ----------
+    sheet_res : Mapping[int, float]
+        map from metal layer ID to sheet resistance, in ohms per square.  This is
+        res_metal.sheet_res in tech_params.yaml, rendered from pcell_setup/prim_catalog.yaml.
+    idc_scale : float
+        the DC current temperature scale factor.
+    rms_dt : float
+        the allowed RMS current temperature rise.
+    """
+
+    def __init__(self, sheet_res: Mapping[int, float], idc_scale: float, rms_dt: float) -> None:
+        self._rsh_table = np.full(max(sheet_res) + 1, np.nan)
+        for lay_id, val in sheet_res.items():
+            self._rsh_table[lay_id] = val
+        self._idc_scale = idc_scale
+        self._rms_dt = rms_dt
+
+    def get_specs(self, layer: ArrayLike, w: ArrayLike, l: ArrayLike, nser: ArrayLike = 1,
+                  npar: ArrayLike = 1) -> ResEstimate:
+        """Estimate resistance and EM limits of resistor networks.
+
+        All arguments are broadcast against each other.  Each network consists of npar parallel
+        branches of nser resistors in series, each resistor having width w and length l in
+        layout units.  Current limits are those of the whole network.
+        """
+        layer, w, l, nser, npar = np.broadcast_arrays(
+            np.asarray(layer, dtype=np.int64), np.asarray(w, dtype=float),
+            np.asarray(l, dtype=float), np.asarray(nser, dtype=float),
+            np.asarray(npar, dtype=float))
+
+        # check bounds first, since negative indices would wrap around
+        if (np.any(layer < 0) or np.any(layer >= self._rsh_table.size) or
+                np.any(np.isnan(self._rsh_table[layer]))):
+            raise ValueError('Some layers do not have metal resistor sheet resistance.')
+        rsh = self._rsh_table[layer]
+
+        res = rsh * (l / w) * (nser / npar)
+        idc, irms, ipeak = get_res_em(w, self._idc_scale, self._rms_dt)
+        return ResEstimate(res, idc * npar, irms * npar, ipeak * npar)
@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Optional, List, Tuple
+from typing import Any, Optional, List, Tuple, Dict, Iterator
+
+from dataclasses import dataclass
 
 from pybag.enum import Orient2D
 from pybag.core import BBox
@@ -28,26 +30,98 @@ from xbase.layout.array.data import ArrayLayInfo, ArrayEndInfo
 from xbase.layout.res.tech import ResTech
 
 
+@dataclass(frozen=True)
+class ResArrayPlacement:
+    name: str
+    info: Any
+    xl: int
+    yl: int
+    orient: str
+    nx: int = 1
+    ny: int = 1
+    spx: int = 0
+    spy: int = 0
+
+
+@dataclass(frozen=True)
+class ResArrayInfo:
+    """A resistor array, described as one unit cell plus arrayed boundary cells."""
+    unit: ArrayLayInfo
+    edge: LayoutInfo
+    end: ArrayEndInfo
+    corner: LayoutInfo
+    nx: int
+    ny: int
+    w: int
+    h: int
+    edge_w: int
+    end_h: int
+
+    @property
+    def bound_box(self) -> BBox:
+        return BBox(0, 0, 2 * self.edge_w + self.nx * self.w, 2 * self.end_h + self.ny * self.h)
+
+    def iter_placements(self) -> Iterator[ResArrayPlacement]:
+        """Yields the instance arrays of this resistor array.
+
+        Placement coordinates are the lower-left corners of the instance bounding boxes.
+        """
+        nx = self.nx
+        ny = self.ny
+        w = self.w
+        h = self.h
+        ew = self.edge_w
+        eh = self.end_h
+        xr = ew + nx * w
+        yt = eh + ny * h
+        yield ResArrayPlacement('unit', self.unit, ew, eh, 'R0', nx=nx, ny=ny, spx=w, spy=h)
+        yield ResArrayPlacement('edge', self.edge, 0, eh, 'R0', ny=ny, spy=h)
+        yield ResArrayPlacement('edge', self.edge, xr, eh, 'MY', ny=ny, spy=h)
+        yield ResArrayPlacement('end', self.end, ew, 0, 'R0', nx=nx, spx=w)
+        yield ResArrayPlacement('end', self.end, ew, yt, 'MX', nx=nx, spx=w)
+        yield ResArrayPlacement('corner', self.corner, 0, 0, 'R0')
+        yield ResArrayPlacement('corner', self.corner, xr, 0, 'MY')
+        yield ResArrayPlacement('corner', self.corner, 0, yt, 'MX')
+        yield ResArrayPlacement('corner', self.corner, xr, yt, 'R180')
+
+
 class ResTechCDSFFMPT(ResTech):
     def __init__(self, tech_info: TechInfo, metal: bool = False) -> None:
         ResTech.__init__(self, tech_info, metal=metal)
 
-    @property
-    def min_size(self) -> Tuple[int, int]:
         x_pitch: int = self.res_config['x_pitch']
         y_pitch: int = self.res_config['y_pitch']
-        conn_w: int = self.res_config['conn_w']
-        min_len = self.tech_info.get_next_length('M1CA', 'drawing', Orient2D.y, conn_w, 0,
-                                                 even=True)
-        sp_le = self.tech_info.get_min_line_end_space('M1CA', conn_w, purpose='drawing', even=True)
-        h = -(-(sp_le + min_len) // y_pitch) * y_pitch
-        return 3 * x_pitch, h
+        self._blk_pitch = (x_pitch, y_pitch)
+        self._conn_rules: Optional[Tuple[int, int]] = None
+        self._min_size: Optional[Tuple[int, int]] = None
+        self._blk_info_cache: Dict[Tuple[int, int, int, str], ArrayLayInfo] = {}
+        # edges, ends, and corners are empty, so share one object per size.
+        self._empty_info_cache: Dict[Tuple[int, int], LayoutInfo] = {}
+        self._end_info_cache: Dict[Tuple[int, int], ArrayEndInfo] = {}
+
+    @property
+    def min_size(self) -> Tuple[int, int]:
+        if self._min_size is None:
+            x_pitch, y_pitch = self._blk_pitch
+            min_len, sp_le = self._get_conn_rules()
+            h = -(-(sp_le + min_len) // y_pitch) * y_pitch
+            self._min_size = (3 * x_pitch, h)
+        return self._min_size
 
     @property
     def blk_pitch(self) -> Tuple[int, int]:
-        x_pitch: int = self.res_config['x_pitch']
-        y_pitch: int = self.res_config['y_pitch']
-        return x_pitch, y_pitch
+        return self._blk_pitch
+
+    def _get_conn_rules(self) -> Tuple[int, int]:
+        """Returns minimum length and line-end spacing of resistor connection wires."""
+        if self._conn_rules is None:
+            conn_w: int = self.res_config['conn_w']
+            min_len = self.tech_info.get_next_length('M1CA', 'drawing', Orient2D.y, conn_w, 0,
+                                                     even=True)
+            sp_le = self.tech_info.get_min_line_end_space('M1CA', conn_w, purpose='drawing',
+                                                          even=True)
+            self._conn_rules = (min_len, sp_le)
+        return self._conn_rules
 
     def get_track_specs(self, conn_layer: int, top_layer: int) -> List[TrackSpec]:
         return []
@@ -74,27 +148,25 @@ class ResTechCDSFFMPT(ResTech):
         if res_type != 'metal':
             raise ValueError(f'unsupported resistor type: {res_type}')
 
+        # unit cell geometry does not depend on array size, so share it across arrays.
+        key = (conn_layer, w, h, res_type)
+        ans = self._blk_info_cache.get(key, None)
+        if ans is None:
+            ans = self._blk_info_cache[key] = self._get_blk_info_helper(w, h)
+        return ans
+
+    def _get_blk_info_helper(self, w: int, h: int) -> ArrayLayInfo:
         x_pitch: int = self.res_config['x_pitch']
         conn_w: int = self.res_config['conn_w']
 
-        sp_le = self.tech_info.get_min_line_end_space('M1CA', conn_w, purpose='drawing', even=True)
+        sp_le = self._get_conn_rules()[1]
 
         builder = LayoutInfoBuilder()
-        x0 = x_pitch // 2
+        for lay_purp, box, nx, spx in _get_unit_rects(w, h, x_pitch, conn_w, sp_le):
+            builder.add_rect_arr(lay_purp, BBox(*box), nx=nx, spx=spx)
+
         yl = sp_le
         yh = h - sp_le
-        x1 = w - x_pitch // 2
-        boxl = BBox(x0 - conn_w // 2, yl, x0 + conn_w // 2, yh)
-        builder.add_rect_arr(('M1CA', 'drawing'), boxl, nx=2, spx=x1 - x0)
-        xm = w // 2
-        boxm = BBox(xm - conn_w // 2, yl, xm + conn_w // 2, yh)
-        builder.add_rect_arr(('M1CA', 'drawing'), boxm)
-        boxr = BBox(boxm.xl, yl + conn_w, boxm.xh, yh - conn_w)
-        builder.add_rect_arr(('m1res', 'drawing'), boxr)
-        builder.add_rect_arr(('M1CA', 'drawing'), BBox(boxl.xl, yl, boxm.xh, yl + conn_w))
-        boxr = boxl.get_move_by(dx=x1 - x0)
-        builder.add_rect_arr(('M1CA', 'drawing'), BBox(boxm.xl, yh - conn_w, boxr.xh, yh))
-
         tidu = HalfInt(2 * ((w // x_pitch) - 1))
         return ArrayLayInfo(builder.get_info(BBox(0, 0, w, h)),
                             ImmutableSortedDict({'u': WireArrayInfo(1, tidu, yl, yh, 1, 1, 0),
@@ -104,15 +176,60 @@ class ResTechCDSFFMPT(ResTech):
 
     def get_edge_info(self, w: int, h: int, info: ImmutableSortedDict[str, Any], **kwargs: Any
                       ) -> LayoutInfo:
-        builder = LayoutInfoBuilder()
-        return builder.get_info(BBox(0, 0, w, h))
+        return self._get_empty_info(w, h)
 
     def get_end_info(self, w: int, h: int, info: ImmutableSortedDict[str, Any], **kwargs: Any
                      ) -> ArrayEndInfo:
-        builder = LayoutInfoBuilder()
-        return ArrayEndInfo(builder.get_info(BBox(0, 0, w, h)), ImmutableSortedDict())
+        key = (w, h)
+        ans = self._end_info_cache.get(key, None)
+        if ans is None:
+            ans = self._end_info_cache[key] = ArrayEndInfo(self._get_empty_info(w, h),
+                                                           ImmutableSortedDict())
+        return ans
 
     def get_corner_info(self, w: int, h: int, info: ImmutableSortedDict[str, Any], **kwargs: Any
                         ) -> LayoutInfo:
-        builder = LayoutInfoBuilder()
-        return builder.get_info(BBox(0, 0, w, h))
+        return self._get_empty_info(w, h)
+
+    def get_array_info(self, conn_layer: int, w: int, h: int, nx: int, ny: int,
+                       top_pitch: Tuple[int, int], **kwargs: Any) -> ResArrayInfo:
+        """Returns an nx x ny resistor array as a unit cell plus arrayed boundary cells.
+
+        top_pitch is the (x, y) block pitch of the top routing layer of the array.  Edge
+        widths and end heights are computed from it, so the array width is a multiple of it.
+        The cost of this method does not depend on the array size.
+        """
+        unit = self.get_blk_info(conn_layer, w, h, nx, ny, **kwargs)
+        info = ImmutableSortedDict(kwargs)
+        top_w, top_h = top_pitch
+        edge_w = self.get_edge_width(info, nx * w, top_w)
+        end_h = self.get_end_height(info, ny * h, top_h)
+        edge = self.get_edge_info(edge_w, h, info, **kwargs)
+        end = self.get_end_info(w, end_h, info, **kwargs)
+        corner = self.get_corner_info(edge_w, end_h, info, **kwargs)
+        return ResArrayInfo(unit, edge, end, corner, nx, ny, w, h, edge_w, end_h)
+
+    def _get_empty_info(self, w: int, h: int) -> LayoutInfo:
+        key = (w, h)
+        ans = self._empty_info_cache.get(key, None)
+        if ans is None:
+            ans = self._empty_info_cache[key] = LayoutInfoBuilder().get_info(BBox(0, 0, w, h))
+        return ans
+
+
+def _get_unit_rects(w: int, h: int, x_pitch: int, conn_w: int, sp_le: int
+                    ) -> List[Tuple[Tuple[str, str], Tuple[int, int, int, int], int, int]]:
+    """Returns the rectangles of a metal resistor unit cell, as (lay_purp, box, nx, spx)."""
+    x0 = x_pitch // 2
+    yl = sp_le
+    yh = h - sp_le
+    x1 = w - x_pitch // 2
+    xm = w // 2
+    hw = conn_w // 2
+    return [
+        (('M1CA', 'drawing'), (x0 - hw, yl, x0 + hw, yh), 2, x1 - x0),
+        (('M1CA', 'drawing'), (xm - hw, yl, xm + hw, yh), 1, 0),
+        (('m1res', 'drawing'), (xm - hw, yl + conn_w, xm + hw, yh - conn_w), 1, 0),
+        (('M1CA', 'drawing'), (x0 - hw, yl, xm + hw, yl + conn_w), 1, 0),
+        (('M1CA', 'drawing'), (xm - hw, yh - conn_w, x1 + hw, yh), 1, 0),
+    ]
@@ -0,0 +1,262 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module implements a content-addressed, size-bounded simulation result cache."""
+
+from typing import Any, Dict, List, Tuple, Mapping, Sequence, Optional, Union
+
+import os
+import re
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+
+import numpy as np
+
+_index_name = 'index.json'
+_arr_name = 'arrays.npz'
+_psf_name = 'psf'
+_hash_chunk_size = 1 << 20
+# Spectre and SPICE include statements
+_include_re = re.compile(r'^[ \t]*(?:ahdl_include|include|\.include|\.inc)[ \t]+'
+                         r'["\']?([^"\'\s]+)', re.M | re.I)
+
+
+def normalize_netlist(text: str) -> str:
+    """Returns the netlist with comments, blank lines, and redundant whitespace removed."""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//') and not line.startswith('*'):
+            lines.append(' '.join(line.split()))
+    return '\n'.join(lines)
+
+
+class SimResultCache:
+    """A least-recently-used cache of simulation results on disk.
+
+    Results are keyed by the normalized netlist content, the contents of all files it
+    includes, the corner sections and model file contents, and the simulator options, so
+    identical simulations hit the cache regardless of file names or netlist formatting.
+    Each entry stores a copy of the PSF result directory, a set of NumPy arrays, or both.
+
+    The index file is only rewritten when entries are added or removed, so cache hits do
+    not write to disk; their recency is saved with the next index update.
+
+    Parameters
+    ----------
+    root_dir : Union[str, Path]
+        the cache directory.
+    max_size : int
+        the maximum total size of cached results, in bytes.
+    """
+
+    def __init__(self, root_dir: Union[str, Path], max_size: int) -> None:
+        self._root_dir = Path(root_dir)
+        self._max_size = max_size
+        self._root_dir.mkdir(parents=True, exist_ok=True)
+        # map from key to entry size, from least to most recently used.
+        self._lru: OrderedDict[str, int] = OrderedDict()
+        # map from file name to ((mtime, size), content hash, included file names)
+        self._file_info: Dict[str, Tuple[Tuple[int, int], str, Tuple[str, ...]]] = {}
+
+        index_fname = self._root_dir / _index_name
+        if index_fname.is_file():
+            with open(index_fname, 'r') as f:
+                for key, size in json.load(f):
+                    if self._get_entry_dir(key).is_dir():
+                        self._lru[key] = size
+
+    @property
+    def size(self) -> int:
+        return sum(self._lru.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._lru
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get_key(self, netlist: Union[str, Path], corner: Sequence[Tuple[str, str]],
+                options: Sequence[str] = (), **kwargs: Any) -> str:
+        """Compute the cache key of a simulation.
+
+        Files included by the netlist or the model files, directly or indirectly, are hashed
+        by content.  Include file names are removed before hashing, and only the contents and
+        include order of the files enter the key, so a copy of the netlist and its include
+        files in another directory has the same key.  Relative include paths are resolved from
+        the directory of the including file, and missing included files are hashed as empty.
+
+        Parameters
+        ----------
+        netlist : Union[str, Path]
+            the netlist file name.
+        corner : Sequence[Tuple[str, str]]
+            the corner entry, as a list of (model file, section).
+        options : Sequence[str]
+            the simulator command line options.
+        **kwargs : Any
+            any other JSON-serializable simulation settings that affect the results.
+
+        Returns
+        -------
+        key : str
+            the cache key.
+        """
+        with open(netlist, 'r') as f:
+            text = f.read()
+        netlist_hash = hashlib.sha256(normalize_netlist(_strip_include_names(text)).encode('utf-8'))
+        netlist_dir = os.path.dirname(os.path.abspath(netlist))
+        include_info = self._get_include_hashes(_get_includes(text, netlist_dir))
+        corner_info = [(section, self._get_file_info(str(model))[1]) for model, section in corner]
+        model_info = self._get_include_hashes([inc for model, _ in corner
+                                               for inc in self._get_file_info(str(model))[2]])
+        data = json.dumps([netlist_hash.hexdigest(), include_info, corner_info, model_info,
+                           list(options), kwargs], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def get_psf_dir(self, key: str) -> Optional[Path]:
+        """Returns the cached PSF result directory, or None if not cached."""
+        path = self._get_entry_dir(key) / _psf_name
+        if key not in self._lru or not path.is_dir():
+            return None
+        self._touch(key)
+        return path
+
+    def get_arrays(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the cached result arrays, or None if not cached."""
+        path = self._get_entry_dir(key) / _arr_name
+        if key not in self._lru or not path.is_file():
+            return None
+        self._touch(key)
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    def put(self, key: str, psf_dir: Optional[Union[str, Path]] = None,
+            arrays: Optional[Mapping[str, np.ndarray]] = None) -> None:
+        """Store simulation results in the cache, evicting old entries if necessary."""
+        entry_dir = self._get_entry_dir(key)
+        tmp_dir = entry_dir.with_name(entry_dir.name + '.tmp')
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+        if psf_dir is not None:
+            shutil.copytree(psf_dir, tmp_dir / _psf_name)
+        if arrays is not None:
+            np.savez(tmp_dir / _arr_name, **arrays)
+
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+        self._lru.pop(key, None)
+        self._lru[key] = _get_dir_size(entry_dir)
+        self._evict()
+        self._save_index()
+
+    def remove(self, key: str) -> None:
+        if self._lru.pop(key, None) is not None:
+            shutil.rmtree(self._get_entry_dir(key), ignore_errors=True)
+            self._save_index()
+
+    def _get_entry_dir(self, key: str) -> Path:
+        return self._root_dir / key[:2] / key
+
+    def _get_include_hashes(self, fname_list: Sequence[str]) -> List[str]:
+        """Returns the content hashes of the given files and all files they include.
+
+        Files are listed in depth-first include order, and each file is listed once.
+        """
+        ans = []
+        visited = set()
+        stack = list(reversed(fname_list))
+        while stack:
+            fname = stack.pop()
+            if fname not in visited:
+                visited.add(fname)
+                try:
+                    _, file_hash, includes = self._get_file_info(fname)
+                except OSError:
+                    # the simulator will fail, so the result is never cached
+                    file_hash, includes = '', ()
+                ans.append(file_hash)
+                stack.extend(reversed(includes))
+        return ans
+
+    def _get_file_info(self, fname: str) -> Tuple[Tuple[int, int], str, Tuple[str, ...]]:
+        """Returns the stat key, the content hash, and the included files of a file.
+
+        The content hash does not depend on the file names of include statements.
+        """
+        stat = os.stat(fname)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        info = self._file_info.get(fname, None)
+        if info is None or info[0] != stat_key:
+            base_dir = os.path.dirname(os.path.abspath(fname))
+            hasher = hashlib.sha256()
+            includes = []
+            carry = b''
+            with open(fname, 'rb') as f:
+                for chunk in iter(lambda: f.read(_hash_chunk_size), b''):
+                    # only scan complete lines, the last line may continue in the next chunk
+                    chunk = carry + chunk
+                    pos = chunk.rfind(b'\n') + 1
+                    carry = chunk[pos:]
+                    _scan_text(chunk[:pos].decode('utf-8', 'replace'), base_dir, hasher,
+                               includes)
+            _scan_text(carry.decode('utf-8', 'replace'), base_dir, hasher, includes)
+            info = self._file_info[fname] = (stat_key, hasher.hexdigest(), tuple(includes))
+        return info
+
+    def _touch(self, key: str) -> None:
+        self._lru.move_to_end(key)
+
+    def _evict(self) -> None:
+        total = self.size
+        # never evict the most recently added entry
+        while total > self._max_size and len(self._lru) > 1:
+            key, size = self._lru.popitem(last=False)
+            shutil.rmtree(self._get_entry_dir(key), ignore_errors=True)
+            total -= size
+
+    def _save_index(self) -> None:
+        content: List[Tuple[str, int]] = list(self._lru.items())
+        index_fname = self._root_dir / _index_name
+        tmp_fname = index_fname.with_name(_index_name + '.tmp')
+        with open(tmp_fname, 'w') as f:
+            json.dump(content, f)
+        os.replace(tmp_fname, index_fname)
+
+
+def _get_dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def _get_includes(text: str, base_dir: str) -> List[str]:
+    """Returns the absolute names of the files included by the given netlist text."""
+    return [os.path.normpath(os.path.join(base_dir, os.path.expandvars(name)))
+            for name in _include_re.findall(text)]
+
+
+def _strip_include_names(text: str) -> str:
+    """Returns the netlist text with the file names of include statements removed."""
+    return _include_re.sub(lambda m: m.group(0)[:m.start(1) - m.start(0)], text)
+
+
+def _scan_text(text: str, base_dir: str, hasher: Any, includes: List[str]) -> None:
+    """Add the netlist text to the content hash, and its included files to includes."""
+    includes.extend(_get_includes(text, base_dir))
+    hasher.update(_strip_include_names(text).encode('utf-8'))
@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module runs corner sweeps of one netlist in a single Spectre process.
+
+All corners that load sections of the same model files are folded into one top-level
+netlist: the first corner is simulated nominally, and every other corner is an altergroup
+that re-includes the model files with its own sections.  Spectre then loads the model
+libraries and parses the netlist once for the whole sweep.
+
+The analyses are not repeated after the altergroups.  Spectre runs the analyses of the
+included netlist at the nominal corner, then re-runs every analysis that precedes an
+altergroup with the changes of that altergroup, prefixing its results with the altergroup
+name.  The included netlist must therefore contain all analyses.
+"""
+
+from typing import Dict, List, Tuple, Mapping, Sequence, Optional, Union
+
+import os
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+
+from bag.io import read_yaml
+
+ModelListType = Sequence[Tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class CornerBatch:
+    """A group of corners simulated by a single simulator invocation.
+
+    result_prefix maps each corner name to the prefix of its result files: the nominal
+    corner has no prefix, and the results of altergroup corners are named
+    '<corner>-<analysis>'.
+    """
+    top_fname: Path
+    raw_dir: Path
+    corners: Tuple[str, ...]
+    result_prefix: Mapping[str, str]
+
+
+def read_corners(fname: Union[str, Path]) -> Dict[str, List[Tuple[str, str]]]:
+    """Read the corners setup file, with environment variables in model paths expanded."""
+    content = read_yaml(fname)
+    return {corner: [(os.path.expandvars(model), section) for model, section in model_list]
+            for corner, model_list in content.items()}
+
+
+def group_corners(corner_table: Mapping[str, ModelListType], corners: Sequence[str]
+                  ) -> List[List[str]]:
+    """Group corners that can share a single simulator invocation.
+
+    Corners can be batched together if they use the same list of model files.  Corner order
+    is preserved within each group.
+    """
+    groups: Dict[Tuple[str, ...], List[str]] = {}
+    for corner in corners:
+        key = tuple(model for model, _ in corner_table[corner])
+        groups.setdefault(key, []).append(corner)
+    return list(groups.values())
+
+
+def get_batch_netlist(netlist_fname: Union[str, Path], corner_table: Mapping[str, ModelListType],
+                      corners: Sequence[str]) -> str:
+    """Returns the top-level Spectre netlist that simulates all given corners.
+
+    The altergroups are placed after the included netlist, so that Spectre re-runs all of its
+    analyses for each altergroup corner.
+    """
+    if not corners:
+        raise ValueError('No corners given.')
+
+    nom_corner = corners[0]
+    lines = ['simulator lang=spectre', '']
+    lines.extend(_get_include_lines(corner_table[nom_corner], ''))
+    lines.append(f'include "{netlist_fname}"')
+    for corner in corners[1:]:
+        lines.append('')
+        lines.append(f'{corner} altergroup {{')
+        lines.extend(_get_include_lines(corner_table[corner], '    '))
+        lines.append('}')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class CornerBatchRunner:
+    """Runs corner sweeps of a netlist with as few simulator invocations as possible.
+
+    Parameters
+    ----------
+    corner_table : Mapping[str, ModelListType]
+        map from corner name to list of (model file, section), from read_corners().
+    command : str
+        the simulator command.
+    options : Sequence[str]
+        additional simulator command line options.
+    env : Optional[Mapping[str, str]]
+        the simulator environment variables.  None to inherit the current environment.
+    fmt : str
+        the simulation output format.  Defaults to the workspace format, which BAG can load.
+        Pass 'nutbin' only if the results are read with NutbinReader.
+    """
+
+    def __init__(self, corner_table: Mapping[str, ModelListType], command: str = 'spectre',
+                 options: Sequence[str] = (), env: Optional[Mapping[str, str]] = None,
+                 fmt: str = 'psfxl') -> None:
+        self._corner_table = corner_table
+        self._command = command
+        self._options = list(options)
+        self._env = env
+        self._fmt = fmt
+
+    def get_batches(self, netlist_fname: Union[str, Path], corners: Sequence[str],
+                    work_dir: Union[str, Path]) -> List[CornerBatch]:
+        """Write the top-level netlists of all corner batches, and return the batches."""
+        netlist_fname = Path(netlist_fname).resolve()
+        work_dir = Path(work_dir).resolve()
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        ans = []
+        for group in group_corners(self._corner_table, corners):
+            nom_corner = group[0]
+            top_fname = work_dir / f'{netlist_fname.stem}_{nom_corner}_batch.scs'
+            top_fname.write_text(get_batch_netlist(netlist_fname, self._corner_table, group))
+            result_prefix = {corner: f'{corner}-' for corner in group[1:]}
+            result_prefix[nom_corner] = ''
+            ans.append(CornerBatch(top_fname, work_dir / f'{top_fname.stem}.raw', tuple(group),
+                                   result_prefix))
+        return ans
+
+    def get_command(self, batch: CornerBatch) -> List[str]:
+        return [self._command, *self._options, '-format', self._fmt, '-raw',
+                str(batch.raw_dir), str(batch.top_fname)]
+
+    def run(self, netlist_fname: Union[str, Path], corners: Sequence[str],
+            work_dir: Union[str, Path]) -> List[CornerBatch]:
+        """Simulate the netlist at all given corners.
+
+        Batches are run sequentially, each with one simulator invocation.  Raises
+        subprocess.CalledProcessError if a simulation fails.
+        """
+        batches = self.get_batches(netlist_fname, corners, work_dir)
+        for batch in batches:
+            log_fname = batch.top_fname.with_suffix('.log')
+            with open(log_fname, 'w') as log_file:
+                subprocess.run(self.get_command(batch), cwd=str(batch.top_fname.parent),
+                               env=self._env, stdout=log_file, stderr=subprocess.STDOUT,
+                               check=True)
+        return batches
+
+
+def _get_include_lines(model_list: ModelListType, indent: str) -> List[str]:
+    return [f'{indent}include "{model}" section={section}' for model, section in model_list]
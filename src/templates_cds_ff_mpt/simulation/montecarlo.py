@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module runs Monte Carlo simulations as shards on a local process pool.
+
+A Monte Carlo run of N iterations is split into shards that each simulate a contiguous
+range of iterations of the same random sequence, using the Spectre montecarlo firstrun
+and numruns parameters.  The union of all shards is therefore identical to the monolithic
+run.  Shard results are merged in iteration order as they complete, and the run stops early
+once the yield confidence interval is narrow enough.
+"""
+
+from typing import Callable, Dict, List, Tuple, Sequence, Optional
+
+import math
+import queue
+import functools
+import multiprocessing
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class MCShard:
+    corner: str
+    seed: int
+    first_run: int
+    num_runs: int
+
+
+class MCStats:
+    """Streaming statistics of a Monte Carlo measurement.
+
+    Parameters
+    ----------
+    spec_min : float
+        the lower spec limit.
+    spec_max : float
+        the upper spec limit.
+    """
+
+    def __init__(self, spec_min: float = -math.inf, spec_max: float = math.inf) -> None:
+        self.spec_min = spec_min
+        self.spec_max = spec_max
+        self.num = 0
+        self.num_pass = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.num - 1)) if self.num > 1 else 0.0
+
+    @property
+    def yield_est(self) -> float:
+        return self.num_pass / self.num if self.num else 0.0
+
+    def add_values(self, values: np.ndarray) -> None:
+        """Merge the measurement values of a shard into these statistics."""
+        values = np.asarray(values, dtype=float).ravel()
+        num_b = values.size
+        if num_b == 0:
+            return
+
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        num = self.num + num_b
+        delta = mean_b - self.mean
+        self.mean += delta * num_b / num
+        self._m2 += m2_b + delta * delta * self.num * num_b / num
+        self.num = num
+        self.num_pass += int(np.count_nonzero((values >= self.spec_min) &
+                                              (values <= self.spec_max)))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def get_yield_interval(self, z: float = 1.96) -> Tuple[float, float]:
+        """Returns the Wilson score confidence interval of the yield."""
+        if self.num == 0:
+            return 0.0, 1.0
+        n = self.num
+        p = self.num_pass / n
+        z2 = z * z
+        center = (p + z2 / (2 * n)) / (1 + z2 / n)
+        half = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+        return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def split_shards(corner: str, num_runs: int, shard_size: int, seed: int = 1) -> List[MCShard]:
+    """Split a Monte Carlo run into shards of at most shard_size iterations."""
+    return [MCShard(corner, seed, first, min(shard_size, num_runs - first + 1))
+            for first in range(1, num_runs + 1, shard_size)]
+
+
+def get_mc_statement(shard: MCShard, analyses: str, name: str = 'mc',
+                     options: str = 'variations=all sampling=standard donominal=no') -> str:
+    """Returns the Spectre montecarlo statement of the given shard.
+
+    analyses is the netlist text of the analyses to run in each iteration.
+    """
+    body = '\n'.join('    ' + line for line in analyses.strip().splitlines())
+    return (f'{name} montecarlo numruns={shard.num_runs} firstrun={shard.first_run} '
+            f'seed={shard.seed} {options} {{\n{body}\n}}\n')
+
+
+class MCScheduler:
+    """Runs Monte Carlo shards on a process pool and merges their statistics.
+
+    Parameters
+    ----------
+    run_shard : Callable[[MCShard], np.ndarray]
+        a picklable function that simulates a shard and returns one measurement per
+        iteration.
+    max_workers : int
+        the maximum number of concurrent shards.
+    """
+
+    def __init__(self, run_shard: Callable[[MCShard], np.ndarray], max_workers: int = 3
+                 ) -> None:
+        self._run_shard = run_shard
+        self._max_workers = max_workers
+
+    def run(self, shards: Sequence[MCShard], spec_min: float = -math.inf,
+            spec_max: float = math.inf, ci_width: Optional[float] = None, z: float = 1.96,
+            min_runs: int = 0) -> MCStats:
+        """Run the given shards, and return the merged statistics.
+
+        Shards must be given in iteration order, and are merged in that order: a shard that
+        completes early is held until all shards before it are merged.  If ci_width is given,
+        the run stops after the first merged shard at which the yield confidence interval is
+        narrower than ci_width and at least min_runs iterations are done.  The statistics of
+        the remaining shards are discarded, so the result does not depend on the order in
+        which shards complete, and the worker processes of shards still running are
+        terminated, so an early stop does not wait for them.
+        """
+        stats = MCStats(spec_min=spec_min, spec_max=spec_max)
+        shard_iter = enumerate(shards)
+        # map from shard index to its values, for shards that completed out of order
+        done_table: Dict[int, np.ndarray] = {}
+        next_idx = 0
+        # (shard index, values, exception) of completed shards
+        results: queue.Queue = queue.Queue()
+        pool = multiprocessing.Pool(processes=self._max_workers)
+        try:
+            num_pending = 0
+            stop = False
+            while not stop:
+                for idx, shard in shard_iter:
+                    pool.apply_async(self._run_shard, (shard,),
+                                     callback=functools.partial(_put_result, results, idx),
+                                     error_callback=functools.partial(_put_error, results, idx))
+                    num_pending += 1
+                    if num_pending >= self._max_workers:
+                        break
+                if num_pending == 0:
+                    break
+                idx, values, err = results.get()
+                num_pending -= 1
+                if err is not None:
+                    raise err
+                done_table[idx] = values
+                while not stop and next_idx in done_table:
+                    stats.add_values(done_table.pop(next_idx))
+                    next_idx += 1
+                    if ci_width is not None and stats.num >= min_runs:
+                        lo, hi = stats.get_yield_interval(z=z)
+                        stop = hi - lo < ci_width
+        finally:
+            # kill the shards still running, instead of waiting for them
+            pool.terminate()
+            pool.join()
+        return stats
+
+
+def _put_result(results: queue.Queue, idx: int, values: np.ndarray) -> None:
+    results.put((idx, values, None))
+
+
+def _put_error(results: queue.Queue, idx: int, err: BaseException) -> None:
+    results.put((idx, None, err))
@@ -0,0 +1,297 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module reads Spectre nutbin waveform files through memory maps.
+
+PSF-XL files are compressed and undocumented, so they cannot be memory-mapped.  Long
+transient simulations read by this module should request Spectre's nutbin output format
+(-format nutbin) for that run: its data is a plain point-major array of doubles, so every
+signal is a strided view into the mapped file and only the pages that are accessed are ever
+read.  The workspace default stays psfxl, since BAG loads simulation results from PSF.
+"""
+
+from typing import Dict, List, Tuple, Iterator, Optional, Sequence, Union
+
+import mmap
+import bisect
+from pathlib import Path
+
+import numpy as np
+
+
+class NutbinPlot:
+    """A single plot (analysis result) in a nutbin file.
+
+    Signals are returned as read-only views into the memory-mapped file.  The first
+    variable is the sweep variable (time, frequency, etc.).
+    """
+
+    def __init__(self, name: str, flags: str, var_names: List[str], var_units: List[str],
+                 data: np.ndarray, buf: Optional[mmap.mmap] = None, offset: int = 0) -> None:
+        self._name = name
+        self._flags = flags
+        self._var_names = var_names
+        self._var_units = var_units
+        self._var_idx = {var: idx for idx, var in enumerate(var_names)}
+        self._data = data
+        self._buf = buf
+        self._offset = offset
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def is_complex(self) -> bool:
+        return 'complex' in self._flags
+
+    @property
+    def var_names(self) -> List[str]:
+        return self._var_names
+
+    @property
+    def var_units(self) -> List[str]:
+        return self._var_units
+
+    @property
+    def num_points(self) -> int:
+        return self._data.shape[0]
+
+    @property
+    def sweep(self) -> np.ndarray:
+        return self[self._var_names[0]]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._var_idx
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._data[:, self._var_idx[name]]
+
+    def iter_windows(self, start: float, stop: float, window: float, decimate: int = 1,
+                     signals: Optional[Sequence[str]] = None, minmax: bool = False
+                     ) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """Iterate over the given sweep range, one window at a time.
+
+        Parameters
+        ----------
+        start : float
+            the sweep start value.
+        stop : float
+            the sweep stop value.
+        window : float
+            the sweep width of each window.
+        decimate : int
+            the decimation factor.
+        signals : Optional[Sequence[str]]
+            the signals to return.  Defaults to all signals.
+        minmax : bool
+            If True, each group of decimate points is replaced by its minimum and maximum, so
+            peaks are preserved.  Otherwise, every decimate-th point is returned as a view.
+
+        The mapped pages of each window are released once the next window is requested.
+
+        Yields
+        ------
+        sweep : np.ndarray
+            the sweep values of this window.
+        values : Dict[str, np.ndarray]
+            the signal values of this window.
+        """
+        if signals is None:
+            signals = self._var_names[1:]
+        xvec = self.sweep
+        if self.is_complex:
+            xvec = xvec.real
+        cur = start
+        while cur < stop:
+            nxt = min(cur + window, stop)
+            # bisect only reads O(log n) points, while np.searchsorted() would convert the
+            # whole non-native byte order array.
+            idx0 = bisect.bisect_left(xvec, cur)
+            if nxt >= stop:
+                idx1 = bisect.bisect_right(xvec, nxt, lo=idx0)
+            else:
+                idx1 = bisect.bisect_left(xvec, nxt, lo=idx0)
+            if idx1 > idx0:
+                if minmax and decimate > 1:
+                    yield (_minmax_sweep(xvec[idx0:idx1], decimate),
+                           {name: _minmax(self[name][idx0:idx1], decimate) for name in signals})
+                else:
+                    yield (xvec[idx0:idx1:decimate],
+                           {name: self[name][idx0:idx1:decimate] for name in signals})
+                self._release()
+            cur = nxt
+
+    def _release(self) -> None:
+        """Drop all mapped pages of this plot, so memory usage does not grow.
+
+        This also drops pages mapped in by bisection and kernel fault-around outside of the
+        current window.
+        """
+        if self._buf is None or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        start = self._offset - self._offset % mmap.PAGESIZE
+        stop = self._offset + self._data.shape[0] * self._data.strides[0]
+        if stop > start:
+            self._buf.madvise(mmap.MADV_DONTNEED, start, stop - start)
+
+
+class NutbinReader:
+    """Memory-mapped reader of Spectre/SPICE nutbin waveform files.
+
+    Parameters
+    ----------
+    fname : Union[str, Path]
+        the nutbin file name.
+    byteorder : str
+        the byte order of the data, '>' or '<'.  Spectre writes big-endian data; by
+        default the byte order is detected from the sweep variable of the first plot.
+    """
+
+    def __init__(self, fname: Union[str, Path], byteorder: str = '') -> None:
+        self._file = open(fname, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._plots: Dict[str, NutbinPlot] = {}
+        self._parse(byteorder)
+
+    def __enter__(self) -> 'NutbinReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def plots(self) -> Dict[str, NutbinPlot]:
+        return self._plots
+
+    def close(self) -> None:
+        # views into the memory map must be released before it can be closed
+        self._plots = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            # some signal views are still referenced; the map is closed once they are freed.
+            pass
+        self._file.close()
+
+    def _parse(self, byteorder: str) -> None:
+        buf = self._mmap
+        size = len(buf)
+        pos = 0
+        while pos < size:
+            header, pos = _read_header(buf, pos)
+            if header is None:
+                break
+            name, flags, num_vars, num_points, var_names, var_units = header
+            num_cols = 2 * num_vars if 'complex' in flags else num_vars
+            row_size = 8 * num_cols
+            # truncated files (e.g. from aborted simulations) keep all complete points
+            num_points = min(num_points, (size - pos) // row_size)
+            if not byteorder:
+                byteorder = _detect_byteorder(buf, pos, num_points, num_cols)
+            dtype = np.dtype(f'{byteorder}c16' if 'complex' in flags else f'{byteorder}f8')
+            data = np.frombuffer(buf, dtype=dtype, count=num_points * num_vars,
+                                 offset=pos).reshape(num_points, num_vars)
+            plot_name = name
+            idx = 1
+            while plot_name in self._plots:
+                plot_name = f'{name}_{idx}'
+                idx += 1
+            self._plots[plot_name] = NutbinPlot(name, flags, var_names, var_units, data, buf=buf,
+                                                offset=pos)
+            pos += num_points * row_size
+
+
+def _read_header(buf: mmap.mmap, pos: int
+                 ) -> Tuple[Optional[Tuple[str, str, int, int, List[str], List[str]]], int]:
+    name = flags = ''
+    num_vars = num_points = 0
+    var_names = []
+    var_units = []
+    in_vars = False
+    while True:
+        end = buf.find(b'\n', pos)
+        if end < 0:
+            return None, len(buf)
+        line = buf[pos:end].decode('ascii', errors='replace').strip()
+        pos = end + 1
+        if not line:
+            continue
+        key, _, val = line.partition(':')
+        key = key.strip().lower()
+        if key == 'binary':
+            return (name, flags, num_vars, num_points, var_names, var_units), pos
+        if key == 'values':
+            raise ValueError('ASCII nutmeg data is not supported.')
+        if in_vars and len(var_names) < num_vars:
+            parts = line.split()
+            var_names.append(parts[1])
+            var_units.append(parts[2] if len(parts) > 2 else '')
+        elif key == 'plotname':
+            name = val.strip()
+        elif key == 'flags':
+            flags = val.strip().lower()
+        elif key == 'no. variables':
+            num_vars = int(val)
+        elif key == 'no. points':
+            num_points = int(val)
+        elif key == 'variables':
+            in_vars = True
+            if val.strip():
+                parts = val.split()
+                var_names.append(parts[1])
+                var_units.append(parts[2] if len(parts) > 2 else '')
+
+
+def _detect_byteorder(buf: mmap.mmap, pos: int, num_points: int, num_cols: int) -> str:
+    # the sweep variable is finite and non-decreasing in the correct byte order
+    num = min(num_points, 64)
+    if num < 2:
+        return '>'
+    best = '>'
+    best_score = -1
+    for order in ('>', '<'):
+        vals = np.frombuffer(buf, dtype=f'{order}f8', count=num * num_cols, offset=pos)
+        xvec = vals[::num_cols]
+        with np.errstate(all='ignore'):
+            finite = np.all(np.isfinite(xvec)) and np.all(np.abs(xvec) < 1e30)
+            score = int(finite) + int(finite and np.all(np.diff(xvec) >= 0))
+        if score > best_score:
+            best, best_score = order, score
+    return best
+
+
+def _minmax(vec: np.ndarray, decimate: int) -> np.ndarray:
+    num = vec.shape[0] // decimate * decimate
+    ans = []
+    if num:
+        groups = np.asarray(vec[:num]).reshape(-1, decimate)
+        if np.iscomplexobj(groups):
+            groups = np.abs(groups)
+        ans.append(np.stack((groups.min(axis=1), groups.max(axis=1)), axis=1).ravel())
+    if num < vec.shape[0]:
+        rest = np.asarray(vec[num:])
+        if np.iscomplexobj(rest):
+            rest = np.abs(rest)
+        ans.append(np.array([rest.min(), rest.max()]))
+    return np.concatenate(ans) if ans else np.empty(0)
+
+
+def _minmax_sweep(xvec: np.ndarray, decimate: int) -> np.ndarray:
+    num = xvec.shape[0]
+    first = np.asarray(xvec[::decimate])
+    last = np.asarray(xvec[np.minimum(np.arange(decimate - 1, num + decimate - 1, decimate),
+                                      num - 1)])
+    return np.stack((first, last), axis=1).ravel()
@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module defines a lightweight, picklable stand-in for TechInfoCDSFFMPT.
+
+The device technology classes only need a handful of configuration sections and rule
+queries from TechInfo.  TechSnapshot stores those sections and the results of those
+queries, so device classes can be constructed in worker processes without rebuilding
+the full TechInfo object.  Rule queries that were not precomputed are evaluated from the
+len_min and sp_le_min tables of tech_params.yaml.
+"""
+
+from typing import Any, List, Tuple, Mapping, Iterable, Optional
+
+from dataclasses import dataclass
+
+from pybag.enum import Orient2D
+
+from bag.layout.tech import TechInfo
+
+from .mos.tech import MOSTechCDSFFMPT
+from .fill.tech import FillTechCDSFFMPT
+from .res.tech import ResTechCDSFFMPT
+
+# configuration sections needed by the device technology classes.
+_config_keys = ('mos', 'fill', 'res', 'res_metal', 'mos_lay_table', 'thres_layers',
+                'imp_layers', 'well_layers', 'lay_purp_list', 'margins', 'default_purpose',
+                'len_min', 'sp_le_min')
+
+_dev_tech_table = {
+    'mos': MOSTechCDSFFMPT,
+    'fill': FillTechCDSFFMPT,
+    'res': ResTechCDSFFMPT,
+}
+
+LpType = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class TechSnapshot:
+    config: Mapping[str, Any]
+    lay_purp_table: Mapping[int, List[LpType]]
+    thres_table: Mapping[Tuple[str, str], List[LpType]]
+    imp_table: Mapping[str, List[LpType]]
+    well_table: Mapping[str, List[LpType]]
+    len_table: Mapping[Tuple[str, str, Orient2D, int, int, bool], int]
+    sp_le_table: Mapping[Tuple[str, str, int, bool], int]
+
+    @classmethod
+    def from_tech_info(cls, tech_info: TechInfo,
+                       wire_specs: Optional[Iterable[Tuple[str, str, Orient2D, int]]] = None
+                       ) -> 'TechSnapshot':
+        """Create a snapshot from the given TechInfo.
+
+        wire_specs is a list of (layer, purpose, orient, width) tuples for which minimum
+        length and line-end spacing rules are precomputed.  If not given, the wires used by
+        the MOS and metal resistor device classes are used.
+        """
+        config = tech_info.config
+        snap_config = {key: config[key] for key in _config_keys if key in config}
+
+        lay_purp_table = {lay_id: tech_info.get_lay_purp_list(lay_id)
+                          for lay_id in config['lay_purp_list']}
+        thres_table = {}
+        for mos_type, thres_dict in config['thres_layers'].items():
+            for threshold in thres_dict:
+                thres_table[(mos_type, threshold)] = tech_info.get_threshold_layers(mos_type,
+                                                                                    threshold)
+        imp_table = {mos_type: tech_info.get_implant_layers(mos_type)
+                     for mos_type in config['imp_layers']}
+        well_table = {mos_type: tech_info.get_well_layers(mos_type)
+                      for mos_type in config['well_layers']}
+
+        if wire_specs is None:
+            wire_specs = _get_default_wire_specs(tech_info)
+
+        len_table = {}
+        sp_le_table = {}
+        for lay, purp, orient, w in wire_specs:
+            len_table[(lay, purp, orient, w, 0, True)] = tech_info.get_next_length(
+                lay, purp, orient, w, 0, even=True)
+            sp_le_table[(lay, purp, w, True)] = tech_info.get_min_line_end_space(
+                lay, w, purpose=purp, even=True)
+
+        return TechSnapshot(snap_config, lay_purp_table, thres_table, imp_table, well_table,
+                            len_table, sp_le_table)
+
+    def get_device_tech(self, dev_name: str, **kwargs: Any) -> Any:
+        return _dev_tech_table[dev_name](self, **kwargs)
+
+    def get_lay_purp_list(self, layer_id: int) -> List[LpType]:
+        return self.lay_purp_table[layer_id]
+
+    def get_threshold_layers(self, mos_type: str, threshold: str) -> List[LpType]:
+        return self.thres_table[(mos_type, threshold)]
+
+    def get_implant_layers(self, mos_type: str) -> List[LpType]:
+        return self.imp_table[mos_type]
+
+    def get_well_layers(self, mos_type: str) -> List[LpType]:
+        return self.well_table[mos_type]
+
+    def get_next_length(self, layer: str, purpose: str, orient: Orient2D, w: int, length: int,
+                        even: bool = False) -> int:
+        ans = self.len_table.get((layer, purpose, orient, w, length, even), None)
+        if ans is None:
+            w_al_list = self._get_rule(self.config['len_min'], layer, purpose)['w_al_list']
+            ans = length
+            for w_max, area_min, len_min in w_al_list:
+                if w <= w_max:
+                    ans = max(ans, len_min, -(-area_min // w))
+                    break
+            if even:
+                ans += ans & 1
+        return ans
+
+    def get_min_line_end_space(self, layer: str, w: int, purpose: str = '', even: bool = False
+                               ) -> int:
+        ans = self.sp_le_table.get((layer, purpose, w, even), None)
+        if ans is None:
+            sp_le_list = self._get_rule(self.config['sp_le_min'], layer, purpose)
+            ans = next(sp for w_max, sp in sp_le_list if w <= w_max)
+            if even:
+                ans += ans & 1
+        return ans
+
+    def _get_rule(self, table: Mapping[LpType, Any], layer: str, purpose: str) -> Any:
+        lay_purp = (layer, purpose or self.config['default_purpose'])
+        ans = table.get(lay_purp, None)
+        if ans is None:
+            raise ValueError(f'No rule for layer/purpose {lay_purp} in tech snapshot.')
+        return ans
+
+
+def _get_default_wire_specs(tech_info: TechInfo) -> List[Tuple[str, str, Orient2D, int]]:
+    config = tech_info.config
+    ans = []
+    mos_config = config['mos']
+    for key in ('d_wire_info', 'g_wire_info'):
+        wire_info = mos_config[key]
+        bot_layer: int = wire_info['bot_layer']
+        for idx, (w, is_horiz, *_) in enumerate(wire_info['info_list']):
+            lay, purp = tech_info.get_lay_purp_list(bot_layer + idx)[0]
+            ans.append((lay, purp, Orient2D.x if is_horiz else Orient2D.y, w))
+
+    res_config = config.get('res_metal', None)
+    if res_config is not None:
+        ans.append(('M1CA', 'drawing', Orient2D.y, res_config['conn_w']))
+
+    return ans
@@ -29,6 +29,8 @@ from . import config_fname as _config_fname
 from .mos.tech import MOSTechCDSFFMPT
 from .fill.tech import FillTechCDSFFMPT
 from .res.tech import ResTechCDSFFMPT
+from .res.estimate import MetalResEstimator, get_res_em
+from .snapshot import TechSnapshot
 
 
 class TechInfoCDSFFMPT(TechInfo):
@@ -39,6 +41,10 @@ class TechInfoCDSFFMPT(TechInfo):
         self.register_device_tech('fill', FillTechCDSFFMPT)
         self.register_device_tech('res', ResTechCDSFFMPT)
 
+    def get_snapshot(self) -> TechSnapshot:
+        """Returns a picklable snapshot that can construct device techs in worker processes."""
+        return TechSnapshot.from_tech_info(self)
+
     def get_margin(self, is_vertical: bool, edge1: Param, edge2: Optional[Param]) -> int:
         if edge2 is None:
             dev_type = edge1['dev_type']
@@ -98,12 +104,15 @@ class TechInfoCDSFFMPT(TechInfo):
         rms_dt = self.get_rms_dt(rms_dt)
 
         idc_scale = self.get_idc_scale_factor('', '', dc_temp, is_res=True)
-        idc = 1.0e-3 * w * idc_scale
-
-        irms = 1e-3 * (0.02 * rms_dt * w * (w + 0.5)) ** 0.5
+        return get_res_em(w, idc_scale, rms_dt)
 
-        ipeak = 5e-3 * 2 * w
-        return idc, irms, ipeak
+    def get_res_metal_estimator(self, dc_temp: int = -1000, rms_dt: int = -1000
+                                ) -> MetalResEstimator:
+        """Returns a vectorized resistance/EM estimator for metal resistors."""
+        dc_temp = self.get_dc_temp(dc_temp)
+        idc_scale = self.get_idc_scale_factor('', '', dc_temp, is_res=True)
+        return MetalResEstimator(self.config['res_metal']['sheet_res'], idc_scale,
+                                 self.get_rms_dt(rms_dt))
 
     # noinspection PyUnusedLocal,PyMethodMayBeStatic
     def _get_metal_idc_factor(self, layer: str, purpose: str, w: int, length: int):
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module contains NumPy helpers for the rectangle arrays stored in LayoutInfo."""
+
+from typing import Dict, Tuple, Optional, Container
+
+import numpy as np
+
+from xbase.layout.data import LayoutInfo
+
+# column indices of a rectangle array table
+XL, YL, XH, YH, NX, NY, SPX, SPY = range(8)
+
+
+def get_rect_arrays(info: LayoutInfo, lp_set: Optional[Container[Tuple[str, str]]] = None
+                    ) -> Dict[Tuple[str, str], np.ndarray]:
+    """Returns the rectangle arrays in the given LayoutInfo as NumPy tables.
+
+    Each table has one row per rectangle array, with columns (xl, yl, xh, yh, nx, ny, spx, spy).
+    If lp_set is given, only layer/purpose pairs in lp_set are returned.
+    """
+    ans = {}
+    for lay_purp, arr_list in info.lp_dict.items():
+        if lp_set is None or lay_purp in lp_set:
+            table = np.empty((len(arr_list), 8), dtype=np.int64)
+            for idx, barr in enumerate(arr_list):
+                box = barr.base
+                table[idx] = (box.xl, box.yl, box.xh, box.yh, barr.nx, barr.ny, barr.spx, barr.spy)
+            ans[lay_purp] = table
+    return ans
+
+
+def expand_rect_arrays(table: np.ndarray, dx: int = 0, dy: int = 0, nx: int = 1, ny: int = 1,
+                       spx: int = 0, spy: int = 0) -> np.ndarray:
+    """Expand a rectangle array table into an (N, 4) table of individual rectangles.
+
+    The rectangles are shifted by (dx, dy), and optionally arrayed nx x ny times with
+    pitch (spx, spy), to account for the placement of the LayoutInfo.
+    """
+    counts = table[:, NX] * table[:, NY]
+    num = int(counts.sum())
+    rep = np.repeat(table, counts, axis=0)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    local_idx = np.arange(num, dtype=np.int64) - offsets
+    shift_x = (local_idx % rep[:, NX]) * rep[:, SPX] + dx
+    shift_y = (local_idx // rep[:, NX]) * rep[:, SPY] + dy
+    ans = rep[:, :4] + np.stack((shift_x, shift_y, shift_x, shift_y), axis=1)
+
+    if nx > 1 or ny > 1:
+        inst_x = np.tile(np.arange(nx, dtype=np.int64) * spx, ny)
+        inst_y = np.repeat(np.arange(ny, dtype=np.int64) * spy, nx)
+        inst = np.stack((inst_x, inst_y, inst_x, inst_y), axis=1)
+        ans = (ans[np.newaxis, :, :] + inst[:, np.newaxis, :]).reshape(-1, 4)
+    return ans
+
+
+def normalize_rect_arrays(table: np.ndarray) -> np.ndarray:
+    """Returns a copy of a rectangle array table with zero-pitch array dimensions collapsed.
+
+    An array dimension with zero pitch only contains overlapping copies of the same
+    rectangle, so its count is set to 1.
+    """
+    table = np.array(table, dtype=np.int64).reshape(-1, 8)
+    table[table[:, SPX] == 0, NX] = 1
+    table[table[:, SPY] == 0, NY] = 1
+    return table
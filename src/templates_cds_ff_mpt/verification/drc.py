@@ -0,0 +1,517 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module implements a fast in-process DRC pre-check on generated layouts.
+
+The pre-check applies the wire width, spacing, line-end spacing, minimum length/area, and
+via enclosure rules of tech_params.yaml to generated shapes.  Abutting rectangles on the same
+layer are merged first, so a wire drawn as several pieces is checked as one shape.  It is meant
+to catch common violations before running the full Pegasus DRC, and does not replace it.
+"""
+
+from typing import Any, Dict, List, Tuple, Mapping, Sequence
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from xbase.layout.data import LayoutInfo
+
+from ..util import get_rect_arrays, expand_rect_arrays
+
+LpType = Tuple[str, str]
+BoxType = Tuple[int, int, int, int]
+
+# purpose number of the drawing purpose in the via_layers table
+_drawing_purpose = 4294967295
+
+
+@dataclass(frozen=True)
+class DRCViolation:
+    """A DRC pre-check violation.
+
+    value is the measured width, space, length, or area, and required is the rule value.
+    For spacing violations, box is the bounding box of both shapes.  For via enclosure
+    violations, value is -1 if the cut is not inside any metal shape and 0 otherwise, and
+    required is 0.
+    """
+    rule: str
+    lay_purp: LpType
+    box: BoxType
+    value: int
+    required: int
+
+
+@dataclass(frozen=True)
+class _ViaEncRule:
+    # (along, across) cut dimensions in the metal direction
+    dim: Tuple[int, int]
+    w_max: np.ndarray
+    # enclosure options for each width bin, as (along, across)
+    enc_list: List[List[Tuple[int, int]]]
+
+
+class DRCPreChecker:
+    """A DRC pre-checker using the rules in tech_params.yaml.
+
+    Rectangles of each layer/purpose pair are first merged into maximal strips, which are
+    grouped into connected shapes.  The width of a strip is its smaller dimension, and
+    width_intervals[layer_id][idx] is used for strips running in the x (idx = 0) or y (idx = 1)
+    direction.  Minimum length and area are checked on each connected shape, using its longest
+    bounding box dimension, its union area, and the smallest width of its strips.  Spacing is
+    measured across the track direction, and line-end spacing along it.  Via dimensions and
+    enclosures are given as (along, across) in the frame of the enclosing metal; the rotated
+    counterpart of each type in via_symmetry_list is added automatically.
+
+    Candidate shape pairs are found with a uniform grid, and all rules are evaluated with
+    vectorized NumPy operations.
+
+    Parameters
+    ----------
+    config : Mapping[str, Any]
+        the technology configuration dictionary (tech_params.yaml).
+    tech_params : Mapping[str, Any]
+        the process parameters dictionary (tech_config.yaml).
+    """
+
+    def __init__(self, config: Mapping[str, Any], tech_params: Mapping[str, Any]) -> None:
+        self._config = config
+        self._tech_params = tech_params
+
+        self._lp_to_id: Dict[LpType, int] = {}
+        for layer_id, lp_list in config['lay_purp_list'].items():
+            for lp in lp_list:
+                self._lp_to_id[tuple(lp)] = layer_id
+
+        # map from cut layer/purpose to (via ID, bottom layer ID, top layer ID)
+        lay_names = {}
+        for name, lay_num in config['layer'].items():
+            lay_names.setdefault(lay_num, name)
+        self._cut_table: Dict[LpType, Tuple[str, int, int]] = {}
+        for (bot_lp, top_lp), via_id in config['via_id'].items():
+            bot_id = self._lp_to_id.get(tuple(bot_lp), None)
+            top_id = self._lp_to_id.get(tuple(top_lp), None)
+            via_lays = config['via_layers'].get(via_id, None)
+            if bot_id is None or top_id is None or via_lays is None:
+                continue
+            cut_num, cut_purp = via_lays[1]
+            cut_name = lay_names.get(cut_num, None)
+            if cut_name is not None and cut_purp == _drawing_purpose:
+                self._cut_table[(cut_name, 'drawing')] = (via_id, bot_id, top_id)
+
+        self._via_rules: Dict[Tuple[str, bool], List[_ViaEncRule]] = {}
+
+    def is_vertical(self, layer_id: int) -> bool:
+        return self._tech_params['routing_grid'][layer_id][0] == 'y'
+
+    def check_layout_info(self, info: LayoutInfo) -> List[DRCViolation]:
+        return self.check_rect_arrays(get_rect_arrays(info))
+
+    def check_rect_arrays(self, tables: Mapping[LpType, np.ndarray]) -> List[DRCViolation]:
+        """Run the DRC pre-check on the given rectangle arrays.
+
+        tables maps each layer/purpose pair to a table with columns
+        (xl, yl, xh, yh, nx, ny, spx, spy).
+        """
+        # group individual rectangles by metal layer ID
+        metal_boxes: Dict[int, List[np.ndarray]] = {}
+        metal_lps: Dict[int, List[LpType]] = {}
+        cut_boxes: Dict[LpType, np.ndarray] = {}
+        for lay_purp, table in tables.items():
+            lay_purp = tuple(lay_purp)
+            table = np.asarray(table, dtype=np.int64).reshape(-1, 8)
+            if table.shape[0] == 0:
+                continue
+            if lay_purp in self._lp_to_id:
+                layer_id = self._lp_to_id[lay_purp]
+                metal_boxes.setdefault(layer_id, []).append(expand_rect_arrays(table))
+                metal_lps.setdefault(layer_id, []).append(lay_purp)
+            elif lay_purp in self._cut_table:
+                cut_boxes[lay_purp] = expand_rect_arrays(table)
+
+        ans = []
+        # map from layer ID to (merged strips in (u0, v0, u1, v1) frame, color index)
+        metal_uv: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for layer_id, box_list in metal_boxes.items():
+            uv = _to_uv(np.concatenate(box_list, axis=0), self.is_vertical(layer_id))
+            color = np.repeat(np.arange(len(box_list)), [b.shape[0] for b in box_list])
+            uv, color = _merge_strips(uv, color)
+            metal_uv[layer_id] = (uv, color)
+            ans.extend(self._check_metal(layer_id, metal_lps[layer_id], uv, color))
+        for cut_lp, boxes in cut_boxes.items():
+            ans.extend(self._check_via(cut_lp, boxes, metal_uv))
+        return ans
+
+    def _check_metal(self, layer_id: int, lp_list: List[LpType], uv: np.ndarray,
+                     color: np.ndarray) -> List[DRCViolation]:
+        config = self._config
+        is_vert = self.is_vertical(layer_id)
+        du = uv[:, 2] - uv[:, 0]
+        dv = uv[:, 3] - uv[:, 1]
+        w = np.minimum(du, dv)
+        # index into width_intervals: strips longer across the tracks run in the other direction
+        dir_idx = ((dv >= du) == is_vert).astype(int)
+        ans = []
+
+        # candidate strip pairs, used for both connectivity and spacing
+        sp_tables = [_get_rule_table(config['sp_min'][lp]) for lp in lp_list]
+        sp_sc_tables = [_get_rule_table(config['sp_sc_min'][lp]) for lp in lp_list]
+        sp_le_tables = [_get_rule_table(config['sp_le_min'][lp]) for lp in lp_list]
+        halo = max(int(tab[1].max()) for tab in sp_tables + sp_sc_tables + sp_le_tables)
+        idx_a, idx_b = _get_self_pairs(uv, halo)
+        box_a = uv[idx_a]
+        box_b = uv[idx_b]
+        gap_u = np.maximum(box_a[:, 0], box_b[:, 0]) - np.minimum(box_a[:, 2], box_b[:, 2])
+        gap_v = np.maximum(box_a[:, 1], box_b[:, 1]) - np.minimum(box_a[:, 3], box_b[:, 3])
+        same_color = color[idx_a] == color[idx_b]
+
+        # width
+        for idx, ivals in enumerate(config['width_intervals'][layer_id]):
+            ivals = np.array(ivals, dtype=float)
+            sel = np.flatnonzero(dir_idx == idx)
+            w_sel = w[sel]
+            w_ok = np.any((w_sel[:, np.newaxis] >= ivals[:, 0]) &
+                          (w_sel[:, np.newaxis] < ivals[:, 1]), axis=1)
+            req_w = ivals[np.minimum(np.searchsorted(ivals[:, 0], w_sel),
+                                     ivals.shape[0] - 1), 0]
+            for sidx in np.flatnonzero(~w_ok).tolist():
+                bidx = sel[sidx]
+                ans.append(DRCViolation('width', lp_list[color[bidx]],
+                                        _from_uv(uv[bidx], is_vert), int(w_sel[sidx]),
+                                        int(req_w[sidx])))
+
+        # minimum length and area of each connected shape, per color since rules are keyed
+        # by layer/purpose
+        # strips are connected if they overlap or share part of an edge
+        touch = same_color & (gap_u <= 0) & (gap_v <= 0) & ((gap_u < 0) | (gap_v < 0))
+        comp, num_comp = _get_components(uv.shape[0], idx_a[touch], idx_b[touch])
+        c_box = np.empty((num_comp, 4), dtype=np.int64)
+        c_box[:, :2] = np.iinfo(np.int64).max
+        c_box[:, 2:] = np.iinfo(np.int64).min
+        np.minimum.at(c_box[:, :2], comp, uv[:, :2])
+        np.maximum.at(c_box[:, 2:], comp, uv[:, 2:])
+        c_len = np.maximum(c_box[:, 2] - c_box[:, 0], c_box[:, 3] - c_box[:, 1])
+        c_w = np.full(num_comp, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(c_w, comp, w)
+        c_area = _get_union_area(uv, comp, num_comp)
+        c_color = np.empty(num_comp, dtype=np.int64)
+        c_color[comp] = color
+        for cidx, lay_purp in enumerate(lp_list):
+            len_config = config['len_min'].get(lay_purp, None)
+            if not len_config or not len_config['w_al_list']:
+                continue
+            w_al = np.array([row[:3] for row in len_config['w_al_list']], dtype=float)
+            sel = np.flatnonzero(c_color == cidx)
+            bin_idx = np.searchsorted(w_al[:, 0], c_w[sel])
+            has_rule = bin_idx < w_al.shape[0]
+            sel = sel[has_rule]
+            bin_idx = bin_idx[has_rule]
+            area_min = w_al[bin_idx, 1].astype(np.int64)
+            len_min = w_al[bin_idx, 2].astype(np.int64)
+            bad_area = c_area[sel] < area_min
+            for idx, amin in zip(sel[bad_area].tolist(), area_min[bad_area]):
+                ans.append(DRCViolation('area', lay_purp, _from_uv(c_box[idx], is_vert),
+                                        int(c_area[idx]), int(amin)))
+            bad_len = c_len[sel] < len_min
+            for idx, lmin in zip(sel[bad_len].tolist(), len_min[bad_len]):
+                ans.append(DRCViolation('length', lay_purp, _from_uv(c_box[idx], is_vert),
+                                        int(c_len[idx]), int(lmin)))
+
+        # spacing and line-end spacing
+        w_pair = np.maximum(w[idx_a], w[idx_b])
+        # rules are looked up by the color of the first shape
+        c_pair = color[idx_a]
+        req_sp = np.empty(idx_a.size, dtype=np.int64)
+        req_le = np.empty(idx_a.size, dtype=np.int64)
+        for cidx in range(len(lp_list)):
+            sel = c_pair == cidx
+            sel_sc = sel & same_color
+            sel_dc = sel & ~same_color
+            req_sp[sel_sc] = _lookup_rule(sp_sc_tables[cidx], w_pair[sel_sc])
+            req_sp[sel_dc] = _lookup_rule(sp_tables[cidx], w_pair[sel_dc])
+            req_le[sel] = _lookup_rule(sp_le_tables[cidx], w_pair[sel])
+
+        for rule, gap, other_gap, req in (('space', gap_u, gap_v, req_sp),
+                                          ('line_end_space', gap_v, gap_u, req_le)):
+            bad = np.flatnonzero((gap > 0) & (other_gap < 0) & (gap < req))
+            for pidx in bad.tolist():
+                ia = idx_a[pidx]
+                ib = idx_b[pidx]
+                bnd = np.concatenate((np.minimum(uv[ia, :2], uv[ib, :2]),
+                                      np.maximum(uv[ia, 2:], uv[ib, 2:])))
+                ans.append(DRCViolation(rule, lp_list[color[ia]], _from_uv(bnd, is_vert),
+                                        int(gap[pidx]), int(req[pidx])))
+        return ans
+
+    def _check_via(self, cut_lp: LpType, boxes: np.ndarray,
+                   metal_uv: Mapping[int, Tuple[np.ndarray, np.ndarray]]
+                   ) -> List[DRCViolation]:
+        via_id, bot_id, top_id = self._cut_table[cut_lp]
+        ans = []
+        for is_top, layer_id in ((False, bot_id), (True, top_id)):
+            is_vert = self.is_vertical(layer_id)
+            cut_uv = _to_uv(boxes, is_vert)
+            cut_dim = cut_uv[:, 2:] - cut_uv[:, :2]
+            metal = metal_uv.get(layer_id, None)
+            enc_ok = np.zeros(cut_uv.shape[0], dtype=bool)
+            enclosed = np.zeros(cut_uv.shape[0], dtype=bool)
+            if metal is not None:
+                m_uv = metal[0]
+                idx_c, idx_m = _get_cross_pairs(cut_uv, m_uv, 0)
+                c_box = cut_uv[idx_c]
+                m_box = m_uv[idx_m]
+                enc_u = np.minimum(c_box[:, 0] - m_box[:, 0], m_box[:, 2] - c_box[:, 2])
+                enc_v = np.minimum(c_box[:, 1] - m_box[:, 1], m_box[:, 3] - c_box[:, 3])
+                inside = (enc_u >= 0) & (enc_v >= 0)
+                idx_c = idx_c[inside]
+                enc_u = enc_u[inside]
+                enc_v = enc_v[inside]
+                m_w = (m_box[inside, 2] - m_box[inside, 0])
+                enclosed[idx_c] = True
+                pair_ok = np.zeros(idx_c.size, dtype=bool)
+                dim_c = cut_dim[idx_c]
+                for rule in self._get_via_rules(via_id, is_top):
+                    sel = np.flatnonzero((dim_c[:, 1] == rule.dim[0]) &
+                                         (dim_c[:, 0] == rule.dim[1]))
+                    if sel.size == 0:
+                        continue
+                    bin_idx = np.searchsorted(rule.w_max, m_w[sel])
+                    for bidx, enc_list in enumerate(rule.enc_list):
+                        bsel = sel[bin_idx == bidx]
+                        for enc_along, enc_across in enc_list:
+                            pair_ok[bsel] |= ((enc_v[bsel] >= enc_along) &
+                                              (enc_u[bsel] >= enc_across))
+                enc_ok[idx_c[pair_ok]] = True
+
+            rule_name = 'via_top_enclosure' if is_top else 'via_bot_enclosure'
+            for idx in np.flatnonzero(~enc_ok).tolist():
+                ans.append(DRCViolation(rule_name, cut_lp, tuple(boxes[idx].tolist()),
+                                        int(enclosed[idx]) - 1, 0))
+        return ans
+
+    def _get_via_rules(self, via_id: str, is_top: bool) -> List[_ViaEncRule]:
+        key = (via_id, is_top)
+        ans = self._via_rules.get(key, None)
+        if ans is not None:
+            return ans
+
+        sym_table = {}
+        for name0, name1 in self._config['via_symmetry_list']:
+            sym_table[name0] = name1
+            sym_table[name1] = name0
+        enc_key = 'top_enc' if is_top else 'bot_enc'
+        ans = []
+        names = set()
+        for via_info in self._config['via'][via_id]:
+            names.add(via_info['name'])
+        for via_info in self._config['via'][via_id]:
+            dim = tuple(via_info['dim'])
+            enc_table = via_info[enc_key]
+            w_max = np.array([row[0] for row in enc_table], dtype=float)
+            enc_list = [[tuple(enc) for enc in row[1]] for row in enc_table]
+            ans.append(_ViaEncRule(dim, w_max, enc_list))
+            sym_name = sym_table.get(via_info['name'], None)
+            if sym_name is not None and sym_name not in names:
+                ans.append(_ViaEncRule((dim[1], dim[0]), w_max,
+                                       [[(enc[1], enc[0]) for enc in row] for row in enc_list]))
+        self._via_rules[key] = ans
+        return ans
+
+
+def _to_uv(boxes: np.ndarray, is_vert: bool) -> np.ndarray:
+    """Convert (xl, yl, xh, yh) boxes to (u0, v0, u1, v1), where v is the track direction."""
+    return boxes if is_vert else boxes[:, [1, 0, 3, 2]]
+
+
+def _from_uv(box: np.ndarray, is_vert: bool) -> BoxType:
+    box = box.tolist()
+    return tuple(box) if is_vert else (box[1], box[0], box[3], box[2])
+
+
+def _get_rule_table(table: Sequence[Tuple[float, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    return (np.array([row[0] for row in table], dtype=float),
+            np.array([row[1] for row in table], dtype=np.int64))
+
+
+def _lookup_rule(table: Tuple[np.ndarray, np.ndarray], w: np.ndarray) -> np.ndarray:
+    w_max, vals = table
+    return vals[np.minimum(np.searchsorted(w_max, w), vals.size - 1)]
+
+
+def _get_cell_size(boxes: np.ndarray, halo: int) -> int:
+    """Pick a grid cell size a few times the typical shape size."""
+    dims = np.concatenate((boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]))
+    return max(int(np.median(dims)) * 4, 4 * halo, 1)
+
+
+def _get_cell_entries(boxes: np.ndarray, halo: int, cell: int
+                      ) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (cell key, box index) for each grid cell overlapped by each bloated box."""
+    c0 = (boxes[:, :2] - halo) // cell
+    c1 = (boxes[:, 2:] + halo) // cell
+    nu = c1[:, 0] - c0[:, 0] + 1
+    nv = c1[:, 1] - c0[:, 1] + 1
+    counts = nu * nv
+    box_idx = np.repeat(np.arange(boxes.shape[0], dtype=np.int64), counts)
+    local = np.arange(box_idx.size, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts,
+                                                                counts)
+    cu = c0[box_idx, 0] + local % nu[box_idx]
+    cv = c0[box_idx, 1] + local // nu[box_idx]
+    # pack cell coordinates into a single sortable key
+    key = (cu << 32) + (cv & 0xFFFFFFFF)
+    return key, box_idx
+
+
+def _get_self_pairs(boxes: np.ndarray, halo: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns all index pairs (a < b) of boxes that may be within halo of each other."""
+    cell = _get_cell_size(boxes, halo)
+    key, box_idx = _get_cell_entries(boxes, halo, cell)
+    order = np.lexsort((box_idx, key))
+    key = key[order]
+    box_idx = box_idx[order]
+    # pair each entry with all later entries in the same cell
+    grp_end = np.searchsorted(key, key, side='right')
+    counts = grp_end - np.arange(key.size) - 1
+    first = np.repeat(np.arange(key.size, dtype=np.int64), counts)
+    second = first + 1 + np.arange(first.size, dtype=np.int64) - np.repeat(
+        np.cumsum(counts) - counts, counts)
+    pairs = np.unique(box_idx[first] * boxes.shape[0] + box_idx[second])
+    return pairs // boxes.shape[0], pairs % boxes.shape[0]
+
+
+def _get_cross_pairs(boxes_a: np.ndarray, boxes_b: np.ndarray, halo: int
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns all index pairs (a, b) of boxes that may be within halo of each other."""
+    cell = _get_cell_size(boxes_b, halo)
+    key_a, idx_a = _get_cell_entries(boxes_a, halo, cell)
+    key_b, idx_b = _get_cell_entries(boxes_b, 0, cell)
+    order = np.argsort(key_b, kind='stable')
+    key_b = key_b[order]
+    idx_b = idx_b[order]
+    start = np.searchsorted(key_b, key_a, side='left')
+    counts = np.searchsorted(key_b, key_a, side='right') - start
+    first = np.repeat(idx_a, counts)
+    pos = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(
+        first.size, dtype=np.int64)
+    pairs = np.unique(first * boxes_b.shape[0] + idx_b[pos])
+    return pairs // boxes_b.shape[0], pairs % boxes_b.shape[0]
+
+
+def _merge_strips(boxes: np.ndarray, color: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge same-color boxes that overlap or abut along a common edge into maximal strips.
+
+    Boxes with the same u span that touch in v, or with the same v span that touch in u, are
+    replaced by their union until no such pair remains.
+    """
+    num = -1
+    while boxes.shape[0] != num:
+        num = boxes.shape[0]
+        for axis in (0, 1):
+            boxes, color = _merge_along(boxes, color, axis)
+    return boxes, color
+
+
+def _merge_along(boxes: np.ndarray, color: np.ndarray, axis: int
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge same-color boxes with the same span across axis that touch along axis."""
+    other = 1 - axis
+    lo = boxes[:, axis]
+    order = np.lexsort((lo, boxes[:, other + 2], boxes[:, other], color))
+    boxes = boxes[order]
+    color = color[order]
+    num_box = boxes.shape[0]
+    lo = boxes[:, axis]
+    hi = boxes[:, axis + 2]
+    new_key = np.ones(num_box, dtype=bool)
+    new_key[1:] = ((color[1:] != color[:-1]) | (boxes[1:, other] != boxes[:-1, other]) |
+                   (boxes[1:, other + 2] != boxes[:-1, other + 2]))
+    # running maximum of hi within each key, offset so that keys do not interact
+    key_idx = np.cumsum(new_key) - 1
+    hi_min = int(hi.min())
+    span = int(hi.max()) - hi_min + 1
+    run_max = np.maximum.accumulate(key_idx * span + (hi - hi_min)) - key_idx * span + hi_min
+    new_grp = new_key.copy()
+    new_grp[1:] |= lo[1:] > run_max[:-1]
+    if np.all(new_grp):
+        return boxes, color
+    starts = np.flatnonzero(new_grp)
+    ends = np.append(starts[1:], num_box) - 1
+    ans = boxes[starts]
+    ans[:, axis + 2] = run_max[ends]
+    return ans, color[starts]
+
+
+def _get_components(num: int, idx_a: np.ndarray, idx_b: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Returns the connected component index of each of num nodes, and the number of components.
+
+    idx_a and idx_b are the node index pairs of the edges.
+    """
+    # propagate the smallest node index through each component
+    labels = np.arange(num, dtype=np.int64)
+    while True:
+        new_labels = labels.copy()
+        min_label = np.minimum(labels[idx_a], labels[idx_b])
+        np.minimum.at(new_labels, idx_a, min_label)
+        np.minimum.at(new_labels, idx_b, min_label)
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    uniq, comp = np.unique(labels, return_inverse=True)
+    return comp, uniq.size
+
+
+def _get_union_area(boxes: np.ndarray, comp: np.ndarray, num_comp: int) -> np.ndarray:
+    """Returns the area of the union of the boxes in each component."""
+    # components of a single box are the common case
+    counts = np.bincount(comp, minlength=num_comp)
+    single = counts[comp] == 1
+    ans = np.zeros(num_comp, dtype=np.int64)
+    ans[comp[single]] = ((boxes[single, 2] - boxes[single, 0]) *
+                         (boxes[single, 3] - boxes[single, 1]))
+    if np.all(single):
+        return ans
+    boxes = boxes[~single]
+    comp = comp[~single]
+
+    # cut every box into slabs at the v coordinates of all boxes of its component
+    v_min = int(boxes[:, 1].min())
+    v_span = int(boxes[:, 3].max()) - v_min + 1
+    key0 = comp * v_span + (boxes[:, 1] - v_min)
+    key1 = comp * v_span + (boxes[:, 3] - v_min)
+    keys = np.unique(np.concatenate((key0, key1)))
+    start = np.searchsorted(keys, key0)
+    counts = np.searchsorted(keys, key1) - start
+    box_idx = np.repeat(np.arange(boxes.shape[0], dtype=np.int64), counts)
+    slab = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(
+        box_idx.size, dtype=np.int64)
+
+    # merge the u intervals in each slab
+    order = np.lexsort((boxes[box_idx, 0], slab))
+    slab = slab[order]
+    box_idx = box_idx[order]
+    u0 = boxes[box_idx, 0]
+    u1 = boxes[box_idx, 2]
+    u_min = int(u0.min())
+    u_span = int(u1.max()) - u_min + 1
+    run_max = np.maximum.accumulate(slab * u_span + (u1 - u_min)) - slab * u_span + u_min
+    new_grp = np.ones(slab.size, dtype=bool)
+    new_grp[1:] = (slab[1:] != slab[:-1]) | (u0[1:] > run_max[:-1])
+    starts = np.flatnonzero(new_grp)
+    ends = np.append(starts[1:], slab.size) - 1
+    slab = slab[starts]
+    area = (run_max[ends] - u0[starts]) * (keys[slab + 1] - keys[slab])
+    np.add.at(ans, comp[box_idx[starts]], area)
+    return ans
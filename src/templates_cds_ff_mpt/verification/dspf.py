@@ -0,0 +1,283 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module reads QRC DSPF parasitic netlists into compact NumPy arrays.
+
+The file is read in large blocks, and the resistor and capacitor lines of each block are
+parsed together into NumPy arrays of node IDs, values, layers, and drawn widths/lengths.
+Memory grows by a few dozen bytes per element instead of one Python object per field; only the
+unique node, layer, and net names are kept as Python strings.
+
+The reader understands the options in qrc.custom.cmd: parasitic resistor models, lengths and
+widths written as '$' comments, explicit via resistors (layer comments on via layers), ':'
+sub-node characters, and '@' device finger delimiters.
+"""
+
+from typing import Dict, List, Tuple, Iterator, Sequence, Union
+
+import re
+from pathlib import Path
+from dataclasses import dataclass
+
+import numpy as np
+
+_finger_delim = '@'
+_res_chars = ('R', 'r')
+_cap_chars = ('C', 'c')
+_elem_chars = ('R', 'r', 'C', 'c')
+_spice_scale = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'm': 1e-3, 'u': 1e-6,
+                'n': 1e-9, 'p': 1e-12, 'f': 1e-15, 'a': 1e-18}
+
+
+@dataclass(frozen=True)
+class DSPFData:
+    """The parasitic elements of a DSPF file.
+
+    Node IDs index node_names, and layer IDs index layer_names (-1 if unknown).  Widths and
+    lengths are in microns, and NaN if not given.
+    """
+    subckt_name: str
+    ports: Tuple[str, ...]
+    node_names: List[str]
+    layer_names: List[str]
+    net_caps: Dict[str, float]
+    instances: List[str]
+    res_nodes: np.ndarray
+    res_val: np.ndarray
+    res_layer: np.ndarray
+    res_w: np.ndarray
+    res_l: np.ndarray
+    cap_nodes: np.ndarray
+    cap_val: np.ndarray
+    cap_layer: np.ndarray
+
+    @property
+    def num_res(self) -> int:
+        return self.res_val.size
+
+    @property
+    def num_cap(self) -> int:
+        return self.cap_val.size
+
+    def get_node_net(self, sub_node_char: str = ':') -> List[str]:
+        """Returns the net name of each node, with the sub-node suffix removed."""
+        return [name.rsplit(sub_node_char, 1)[0] for name in self.node_names]
+
+    def get_layer_id(self, layer: str) -> int:
+        try:
+            return self.layer_names.index(layer)
+        except ValueError:
+            raise ValueError(f'Layer {layer} not found in DSPF file.') from None
+
+
+def get_device_name(inst_name: str) -> str:
+    """Returns the device name of a finger instance, with the finger suffix removed."""
+    return inst_name.split(_finger_delim, 1)[0]
+
+
+def read_dspf(fname: Union[str, Path], block_size: int = 1 << 22) -> DSPFData:
+    """Read a DSPF file into NumPy arrays.
+
+    The file is read in blocks of about block_size characters.  The element lines of each
+    block are parsed together with whole-block regular expressions and NumPy conversions.
+    """
+    node_ids: Dict[str, int] = {}
+    # elements without a layer comment have layer ID -1
+    layer_ids: Dict[str, int] = {'': -1}
+    net_caps: Dict[str, float] = {}
+    instances: List[str] = []
+    subckt_name = ''
+    ports: Tuple[str, ...] = ()
+
+    res_chunks = [_parse_elements('', node_ids, layer_ids, True)]
+    cap_chunks = [_parse_elements('', node_ids, layer_ids, False)]
+    for lines in _iter_blocks(fname, block_size):
+        res_text = '\n'.join([line for line in lines if line[:1] in _res_chars])
+        if res_text:
+            res_chunks.append(_parse_elements(res_text, node_ids, layer_ids, True))
+        cap_text = '\n'.join([line for line in lines if line[:1] in _cap_chars])
+        if cap_text:
+            cap_chunks.append(_parse_elements(cap_text, node_ids, layer_ids, False))
+        for line in [line for line in lines if line[:1] not in _elem_chars]:
+            first = line[:1]
+            if first == '*':
+                if line.startswith('*|NET '):
+                    tokens = line.split()
+                    net_caps[tokens[1]] = _parse_value(tokens[2]) if len(tokens) > 2 else 0.0
+            elif first == '.':
+                tokens = line.split()
+                if tokens[0].upper() == '.SUBCKT' and not subckt_name:
+                    subckt_name = tokens[1]
+                    ports = tuple(tok for tok in tokens[2:] if '=' not in tok)
+            elif first:
+                instances.append(line.split(None, 1)[0])
+
+    res_nodes, res_val, res_layer, res_w, res_l = (np.concatenate(arrs)
+                                                   for arrs in zip(*res_chunks))
+    cap_nodes, cap_val, cap_layer = (np.concatenate(arrs) for arrs in zip(*cap_chunks))
+    return DSPFData(
+        subckt_name=subckt_name,
+        ports=ports,
+        node_names=list(node_ids),
+        layer_names=list(layer_ids)[1:],
+        net_caps=net_caps,
+        instances=instances,
+        res_nodes=res_nodes,
+        res_val=res_val,
+        res_layer=res_layer,
+        res_w=res_w,
+        res_l=res_l,
+        cap_nodes=cap_nodes,
+        cap_val=cap_val,
+        cap_layer=cap_layer,
+    )
+
+
+def _parse_elements(text: str, node_ids: Dict[str, int], layer_ids: Dict[str, int],
+                    is_res: bool) -> Tuple[np.ndarray, ...]:
+    """Parse newline-separated resistor or capacitor lines.
+
+    Returns (nodes, values, layer IDs) for capacitors, and (nodes, values, layer IDs, widths,
+    lengths) for resistors.  New node and layer names are added to node_ids and layer_ids;
+    layer_ids must map the empty name to -1.
+    """
+    num = text.count('\n') + 1 if text else 0
+    fields = _elem_re.findall(text)
+    if len(fields) != num:
+        raise ValueError('Malformed DSPF element line, expected: '
+                         '<name> <node> <node> [<model>] [r=|c=]<value>')
+    if fields:
+        node1, node2, vals = zip(*fields)
+    else:
+        node1 = node2 = vals = ()
+
+    nodes = np.empty((num, 2), dtype=np.int32)
+    _add_names(node_ids, node1)
+    _add_names(node_ids, node2)
+    nodes[:, 0] = np.fromiter(map(node_ids.__getitem__, node1), dtype=np.int32, count=num)
+    nodes[:, 1] = np.fromiter(map(node_ids.__getitem__, node2), dtype=np.int32, count=num)
+    lay_names = _find_comments(_layer_re, text, num)
+    _add_names(layer_ids, lay_names, offset=1)
+    layers = np.fromiter(map(layer_ids.__getitem__, lay_names), dtype=np.int16, count=num)
+    if not is_res:
+        return nodes, _to_float_array(vals), layers
+    return (nodes, _to_float_array(vals), layers,
+            _to_float_array(_find_comments(_width_re, text, num)),
+            _to_float_array(_find_comments(_len_re, text, num)))
+
+
+def _add_names(table: Dict[str, int], names: Sequence[str], offset: int = 0) -> None:
+    """Assign IDs to new names, in order of first appearance.
+
+    offset is the number of preset entries in table that do not count towards the IDs.
+    """
+    new_names = [name for name in dict.fromkeys(names) if name not in table]
+    start = len(table) - offset
+    table.update(zip(new_names, range(start, start + len(new_names))))
+
+
+def _find_comments(patterns: Tuple['re.Pattern', 're.Pattern'], text: str, num: int
+                   ) -> List[str]:
+    """Returns the value of a comment on every line, or an empty string if it is missing.
+
+    QRC usually writes the same comments on every element, so first try a plain search.  It
+    matches at most once per line, so it is aligned with the lines if it finds num values.
+    """
+    ans = patterns[0].findall(text)
+    if len(ans) == num:
+        return ans
+    if not ans:
+        return [''] * num
+    return patterns[1].findall(text)
+
+
+def _get_comment_re(keys: str) -> Tuple['re.Pattern', 're.Pattern']:
+    """Returns the plain and the line-aligned regular expressions of a comment.
+
+    Both expressions capture the value of the first matching comment of a line, and skip the
+    rest of the line.  The line-aligned expression also matches lines without the comment.
+    """
+    return (re.compile(r'\$(?:' + keys + r')=(\S+)[^\n]*', re.I),
+            re.compile(r'^[^$\n]*(?:\$(?!(?:' + keys + r')=)[^$\n]*)*'
+                       r'(?:\$(?:' + keys + r')=(\S+)[^\n]*)?$', re.M | re.I))
+
+
+_indent_re = re.compile(r'^[ \t]+', re.M)
+# the value may follow a model name, and may be written as r=<value> or c=<value>
+_elem_re = re.compile(r'^\S+[ \t]+(\S+)[ \t]+(\S+)[ \t]+(?:[A-Za-z_][^\s=$]*[ \t]+)?'
+                      r'(?:[A-Za-z_]\w*=)?(\S+)[^\n]*$', re.M)
+_layer_re = _get_comment_re('lvl|layer')
+_width_re = _get_comment_re('w|width')
+_len_re = _get_comment_re('l|length')
+
+
+def _to_float_array(vals: Sequence[str]) -> np.ndarray:
+    """Convert value strings to floats, with empty strings converted to NaN."""
+    vals = [val or 'nan' for val in vals]
+    try:
+        return np.array(vals, dtype=np.float64)
+    except ValueError:
+        return np.array([_parse_value(val) for val in vals], dtype=np.float64)
+
+
+def _iter_blocks(fname: Union[str, Path], block_size: int) -> Iterator[List[str]]:
+    """Yield the logical lines of the file in blocks, with '+' continuation lines joined."""
+    carry = ''
+    with open(fname, 'r') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            block = carry + data
+            # keep the last logical line, since it may continue in the next block.  A line
+            # break is only known to end a logical line if the next line starts in this block.
+            pos = len(block)
+            while True:
+                pos = block.rfind('\n', 0, pos)
+                if pos < 0:
+                    break
+                first = block[pos + 1:pos + 64].lstrip(' \t')[:1]
+                if first and first != '+':
+                    break
+            if pos < 0:
+                carry = block
+            else:
+                carry = block[pos + 1:]
+                yield _get_lines(block[:pos])
+    if carry:
+        yield _get_lines(carry)
+
+
+def _get_lines(block: str) -> List[str]:
+    if '\n ' in block or '\n\t' in block or block[:1].isspace():
+        block = _indent_re.sub('', block)
+    return block.replace('\n+', ' ').split('\n')
+
+
+def _parse_value(token: str) -> float:
+    token = token.rsplit('=', 1)[-1]
+    try:
+        return float(token)
+    except ValueError:
+        pass
+    lower = token.lower()
+    for suffix in ('meg', 't', 'g', 'k', 'm', 'u', 'n', 'p', 'f', 'a'):
+        idx = lower.find(suffix)
+        if idx > 0:
+            try:
+                return float(lower[:idx]) * _spice_scale[suffix]
+            except ValueError:
+                continue
+    raise ValueError(f'Cannot parse value: {token}')
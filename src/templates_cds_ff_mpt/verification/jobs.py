@@ -0,0 +1,363 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module implements a cached, deduplicating job queue for LVS and RCX runs.
+
+Each job is keyed by the hash of its layout, its source netlist and the files it includes,
+its rendered control file, its command, and the content of its linked setup files.  A job
+whose key has a completed run directory is not run again, duplicate submissions of a pending
+job share the same future, and queued jobs are started smallest first.
+
+The key is computed again when a queued job starts, together with creating its run directory,
+so a job whose inputs were edited while it was queued runs and is cached under the key of the
+edited inputs.  If the inputs change while the tool is running, the run is not cached.
+"""
+
+from typing import Any, Dict, List, Set, Tuple, Mapping, Sequence, Optional, Union
+
+import os
+import re
+import json
+import heapq
+import hashlib
+import functools
+import threading
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from jinja2 import Template, StrictUndefined
+
+_done_name = 'done.json'
+_log_name = 'run.log'
+_hash_chunk_size = 1 << 20
+# CDL include statements
+_include_re = re.compile(r'[ \t]*\.inc(?:lude)?[ \t]+[\'"]?([^\'"\s]+)', re.I)
+
+# a linked file, either a file name or (file name, link name)
+LinkType = Union[str, Tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class VerificationJob:
+    """An LVS or RCX job.
+
+    The control file template is rendered with cell_name, layout_file, netlist_file, and
+    the entries of params.
+    """
+    kind: str
+    cell_name: str
+    layout_fname: Path
+    netlist_fname: Path
+    ctl_template: Path
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class VerificationResult:
+    key: str
+    run_dir: Path
+    returncode: int
+    cached: bool
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0
+
+    @property
+    def log_fname(self) -> Path:
+        return self.run_dir / _log_name
+
+
+class VerificationQueue:
+    """Runs LVS and RCX jobs, skipping jobs whose inputs have not changed.
+
+    Each job runs in the directory <root_dir>/<kind>/<key>, with the rendered control file
+    and the linked setup files.  The control file name is appended to the job command.
+    Only successful runs are reused.  The key of a queued job is computed from its inputs
+    when it starts, so the result key may differ from the key at submission.
+
+    Parameters
+    ----------
+    root_dir : Union[str, Path]
+        the root run directory.
+    commands : Mapping[str, Sequence[str]]
+        map from job kind to the tool command.
+    link_files : Optional[Mapping[str, Sequence[LinkType]]]
+        map from job kind to the setup files linked into each run directory.
+    max_workers : int
+        the maximum number of concurrent tool processes.
+    env : Optional[Mapping[str, str]]
+        the tool environment variables.  None to inherit the current environment.
+    """
+
+    def __init__(self, root_dir: Union[str, Path], commands: Mapping[str, Sequence[str]],
+                 link_files: Optional[Mapping[str, Sequence[LinkType]]] = None,
+                 max_workers: int = 2, env: Optional[Mapping[str, str]] = None) -> None:
+        self._root_dir = Path(root_dir).resolve()
+        self._commands = {kind: list(cmd) for kind, cmd in commands.items()}
+        self._link_files = {kind: [_get_link_info(val) for val in val_list]
+                            for kind, val_list in (link_files or {}).items()}
+        self._max_workers = max_workers
+        self._env = env
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        # map from job key to its future, for jobs submitted in this session
+        self._futures: Dict[str, Future] = {}
+        # heap of (size, submit order, key, job)
+        self._queue: List[Tuple[int, int, str, VerificationJob]] = []
+        # futures of the jobs whose tool is running
+        self._running: Set[Future] = set()
+        self._num_submit = 0
+        self._num_running = 0
+        # map from file name to ((mtime, size), content hash)
+        self._file_hash: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        # map from netlist file name to ((mtime, size), included file names)
+        self._file_includes: Dict[str, Tuple[Tuple[int, int], Tuple[str, ...]]] = {}
+
+    def __enter__(self) -> 'VerificationQueue':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """Wait for all queued and running jobs, then stop the workers."""
+        while True:
+            with self._lock:
+                pending = [fut for fut in self._futures.values() if not fut.done()]
+            if not pending:
+                break
+            for fut in pending:
+                fut.exception()
+        self._executor.shutdown(wait=True)
+
+    def render_control(self, job: VerificationJob) -> str:
+        with open(job.ctl_template, 'r') as f:
+            template = Template(f.read(), undefined=StrictUndefined, keep_trailing_newline=True)
+        return template.render(cell_name=job.cell_name, layout_file=str(job.layout_fname),
+                               netlist_file=str(job.netlist_fname), **job.params)
+
+    def get_key(self, job: VerificationJob, ctl_content: str) -> str:
+        """Compute the key of a job from the content of all its inputs."""
+        link_info = [(name, self._get_hash(src))
+                     for src, name in self._link_files.get(job.kind, [])]
+        data = json.dumps([job.kind, job.cell_name, self._get_hash(job.layout_fname),
+                           self._get_hash(job.netlist_fname),
+                           self._get_include_info(job.netlist_fname), ctl_content,
+                           self._commands[job.kind], link_info])
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def get_run_dir(self, job: VerificationJob, key: str) -> Path:
+        return self._root_dir / job.kind / key
+
+    def submit(self, job: VerificationJob) -> 'Future[VerificationResult]':
+        """Submit a job.
+
+        Returns a completed future if the job has a successful run with identical inputs, and
+        the existing future if an identical job was already submitted in this session.
+        """
+        if job.kind not in self._commands:
+            raise ValueError(f'No command for job kind: {job.kind}')
+        ctl_content = self.render_control(job)
+        key = self.get_key(job, ctl_content)
+        with self._lock:
+            future = self._futures.get(key, None)
+            if future is not None and _is_reusable(future):
+                return future
+
+            future = Future()
+            self._futures[key] = future
+            run_dir = self.get_run_dir(job, key)
+            done_info = _read_done_info(run_dir)
+            if done_info is not None:
+                future.set_result(VerificationResult(key, run_dir, 0, True))
+                return future
+
+            size = _get_path_size(job.layout_fname) + _get_path_size(job.netlist_fname)
+            heapq.heappush(self._queue, (size, self._num_submit, key, job))
+            self._num_submit += 1
+            self._dispatch()
+        return future
+
+    def run(self, jobs: Sequence[VerificationJob]) -> List[VerificationResult]:
+        """Submit all jobs, and return their results in the same order."""
+        futures = [self.submit(job) for job in jobs]
+        return [fut.result() for fut in futures]
+
+    def _dispatch(self) -> None:
+        # must be called with the lock held
+        while self._queue and self._num_running < self._max_workers:
+            _, _, key, job = heapq.heappop(self._queue)
+            self._num_running += 1
+            self._executor.submit(self._run_job, self._futures[key], job)
+
+    def _run_job(self, future: Future, job: VerificationJob) -> None:
+        try:
+            result = self._run_tool(future, job)
+        except BaseException as ex:
+            future.set_exception(ex)
+        else:
+            if isinstance(result, Future):
+                result.add_done_callback(functools.partial(_copy_result, future))
+            else:
+                future.set_result(result)
+        finally:
+            with self._lock:
+                self._running.discard(future)
+                self._num_running -= 1
+                self._dispatch()
+
+    def _run_tool(self, future: Future, job: VerificationJob
+                  ) -> Union[VerificationResult, Future]:
+        """Run the tool, or return the future of a running job with the same inputs."""
+        # the inputs may have been edited while the job was queued
+        ctl_content = self.render_control(job)
+        key = self.get_key(job, ctl_content)
+        run_dir = self.get_run_dir(job, key)
+        with self._lock:
+            other = self._futures.get(key, None)
+            # only share running or finished jobs; queued jobs compute their key again when
+            # they start, and may end up sharing this job instead.
+            if other is not None and other is not future and (
+                    _is_reusable(other) if other.done() else other in self._running):
+                return other
+            self._futures[key] = future
+            self._running.add(future)
+        if _read_done_info(run_dir) is not None:
+            return VerificationResult(key, run_dir, 0, True)
+
+        run_dir.mkdir(parents=True, exist_ok=True)
+        ctl_fname = run_dir / Path(job.ctl_template).name
+        ctl_fname.write_text(ctl_content)
+        for src, name in self._link_files.get(job.kind, []):
+            link = run_dir / name
+            if link.is_symlink() or link.exists():
+                link.unlink()
+            link.symlink_to(os.path.abspath(src))
+
+        cmd = self._commands[job.kind] + [str(ctl_fname)]
+        with open(run_dir / _log_name, 'w') as log_file:
+            proc = subprocess.run(cmd, cwd=str(run_dir), env=self._env, stdout=log_file,
+                                  stderr=subprocess.STDOUT)
+        # only cache the run if no input changed while the tool was running
+        if proc.returncode == 0 and self.get_key(job, self.render_control(job)) == key:
+            tmp_fname = run_dir / (_done_name + '.tmp')
+            tmp_fname.write_text(json.dumps(dict(kind=job.kind, cell_name=job.cell_name)))
+            os.replace(tmp_fname, run_dir / _done_name)
+        return VerificationResult(key, run_dir, proc.returncode, False)
+
+    def _get_include_info(self, fname: Union[str, Path]) -> List[Tuple[str, str]]:
+        """Returns (file name, content hash) of all files included by a netlist, recursively.
+
+        Relative paths are resolved from the directory of the including file, and missing
+        files are hashed as empty.
+        """
+        ans = []
+        visited = {os.path.abspath(fname)}
+        stack = list(reversed(self._get_includes(os.path.abspath(fname))))
+        while stack:
+            inc_fname = stack.pop()
+            if inc_fname not in visited:
+                visited.add(inc_fname)
+                try:
+                    ans.append((inc_fname, self._get_hash(inc_fname)))
+                    stack.extend(reversed(self._get_includes(inc_fname)))
+                except OSError:
+                    ans.append((inc_fname, ''))
+        return ans
+
+    def _get_includes(self, fname: str) -> Tuple[str, ...]:
+        stat = os.stat(fname)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            info = self._file_includes.get(fname, None)
+        if info is None or info[0] != stat_key:
+            base_dir = os.path.dirname(fname)
+            names = []
+            with open(fname, 'r', errors='replace') as f:
+                for line in f:
+                    match = _include_re.match(line)
+                    if match:
+                        name = os.path.expandvars(match.group(1))
+                        names.append(os.path.normpath(os.path.join(base_dir, name)))
+            info = (stat_key, tuple(names))
+            with self._lock:
+                self._file_includes[fname] = info
+        return info[1]
+
+    def _get_hash(self, fname: Union[str, Path]) -> str:
+        fname = os.path.abspath(fname)
+        if os.path.isdir(fname):
+            hasher = hashlib.sha256()
+            for path in sorted(Path(fname).rglob('*')):
+                if path.is_file():
+                    hasher.update(str(path.relative_to(fname)).encode('utf-8'))
+                    hasher.update(self._get_hash(path).encode('ascii'))
+            return hasher.hexdigest()
+
+        stat = os.stat(fname)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            info = self._file_hash.get(fname, None)
+        if info is None or info[0] != stat_key:
+            hasher = hashlib.sha256()
+            with open(fname, 'rb') as f:
+                for chunk in iter(lambda: f.read(_hash_chunk_size), b''):
+                    hasher.update(chunk)
+            info = (stat_key, hasher.hexdigest())
+            with self._lock:
+                self._file_hash[fname] = info
+        return info[1]
+
+
+def _get_link_info(val: LinkType) -> Tuple[str, str]:
+    if isinstance(val, str):
+        val = os.path.expandvars(val)
+        return val, os.path.basename(val)
+    src, name = val
+    return os.path.expandvars(src), name
+
+
+def _is_reusable(future: Future) -> bool:
+    """Returns True if the future is pending or has a successful result."""
+    if not future.done():
+        return True
+    return future.exception() is None and future.result().success
+
+
+def _copy_result(future: Future, src: Future) -> None:
+    ex = src.exception()
+    if ex is None:
+        future.set_result(src.result())
+    else:
+        future.set_exception(ex)
+
+
+def _read_done_info(run_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(run_dir / _done_name, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _get_path_size(fname: Union[str, Path]) -> int:
+    path = Path(fname)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+    return path.stat().st_size
@@ -13,21 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-# -*- coding: utf-8 -*-
-
-from typing import Any
-
-
-from bag.design.module import MosModuleBase
-from bag.design.database import ModuleDB
-from bag.util.immutable import Param
-
-
-# noinspection PyPep8Naming
-class BAG_prim__nmos4_18(MosModuleBase):
-    """design module for BAG_prim__nmos4_18.
-    """
-
-    def __init__(self, database: ModuleDB, params: Param, **kwargs: Any) -> None:
-        MosModuleBase.__init__(self, '', database, params, **kwargs)
+import sys
+from pathlib import Path
 
+# the technology package is not installed, it is on the BAG workspace PYTHONPATH
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
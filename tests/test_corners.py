@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import json
+
+from templates_cds_ff_mpt.simulation.corners import CornerBatchRunner
+
+# a stand-in for spectre that records its command line, and writes one result file per
+# analysis and altergroup, re-running only the analyses that precede each altergroup.
+_fake_spectre = '''#!{python}
+import re
+import sys
+import json
+from pathlib import Path
+
+args = sys.argv[1:]
+with open('calls.jsonl', 'a') as f:
+    f.write(json.dumps(args) + '\\n')
+
+raw_dir = Path(args[args.index('-raw') + 1])
+raw_dir.mkdir(parents=True, exist_ok=True)
+analyses = []
+for line in Path(args[-1]).read_text().splitlines():
+    line = line.strip()
+    match = re.match(r'include "(.*)"$', line)
+    if match:
+        for sub_line in Path(match.group(1)).read_text().splitlines():
+            ana = re.match(r'(\\w+) (tran|dc|ac)\\b', sub_line)
+            if ana:
+                analyses.append(ana.group(1))
+                (raw_dir / f'{{ana.group(1)}}.{{ana.group(2)}}').write_text('')
+    match = re.match(r'(\\w+) altergroup {{', line)
+    if match:
+        for name in analyses:
+            (raw_dir / f'{{match.group(1)}}-{{name}}.tran').write_text('')
+'''
+
+_netlist = '''simulator lang=spectre
+R0 (out 0) resistor r=1k
+V0 (out 0) vsource dc=1
+tran0 tran stop=1n
+'''
+
+_corner_table = {
+    'tt': [('/models/a.scs', 'tt'), ('/models/b.scs', 'nom')],
+    'ss': [('/models/a.scs', 'ss'), ('/models/b.scs', 'nom')],
+    'ff': [('/models/a.scs', 'ff'), ('/models/b.scs', 'nom')],
+    'hot': [('/models/c.scs', 'hot')],
+}
+
+
+def _make_runner(tmp_path):
+    script = tmp_path / 'fake_spectre'
+    script.write_text(_fake_spectre.format(python=sys.executable))
+    script.chmod(0o755)
+    netlist = tmp_path / 'tb.scs'
+    netlist.write_text(_netlist)
+    return CornerBatchRunner(_corner_table, command=str(script), options=['+aps'],
+                             fmt='nutbin'), netlist
+
+
+def test_batch_single_invocation_per_model_files(tmp_path):
+    runner, netlist = _make_runner(tmp_path)
+    work_dir = tmp_path / 'work'
+    batches = runner.run(netlist, ['tt', 'ss', 'hot', 'ff'], work_dir)
+
+    assert [batch.corners for batch in batches] == [('tt', 'ss', 'ff'), ('hot',)]
+    with open(work_dir / 'calls.jsonl', 'r') as f:
+        calls = [json.loads(line) for line in f]
+    assert calls == [['+aps', '-format', 'nutbin', '-raw', str(batch.raw_dir),
+                      str(batch.top_fname)] for batch in batches]
+
+
+def test_altergroups_follow_analyses(tmp_path):
+    runner, netlist = _make_runner(tmp_path)
+    batch = runner.run(netlist, ['tt', 'ss', 'ff'], tmp_path / 'work')[0]
+
+    lines = [line.strip() for line in batch.top_fname.read_text().splitlines()]
+    net_idx = lines.index(f'include "{netlist.resolve()}"')
+    assert lines[:net_idx] == ['simulator lang=spectre', '',
+                               'include "/models/a.scs" section=tt',
+                               'include "/models/b.scs" section=nom']
+    # the analyses are in the included netlist, and every altergroup comes after it
+    assert lines[net_idx + 1:] == ['', 'ss altergroup {', 'include "/models/a.scs" section=ss',
+                                   'include "/models/b.scs" section=nom', '}',
+                                   '', 'ff altergroup {', 'include "/models/a.scs" section=ff',
+                                   'include "/models/b.scs" section=nom', '}']
+
+    assert batch.result_prefix == {'tt': '', 'ss': 'ss-', 'ff': 'ff-'}
+    for corner in batch.corners:
+        assert (batch.raw_dir / f'{batch.result_prefix[corner]}tran0.tran').is_file()
+
+
+def test_default_format_is_loadable_by_bag(tmp_path):
+    runner = CornerBatchRunner(_corner_table)
+    batch = runner.get_batches(tmp_path / 'tb.scs', ['tt'], tmp_path / 'work')[0]
+    cmd = runner.get_command(batch)
+    assert cmd[cmd.index('-format') + 1] == 'psfxl'
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from pybag.core import BBox
+
+from templates_cds_ff_mpt.fill.density import DensityMap
+
+
+def _get_raster_coverage(rects, size, pixel):
+    """Exact coverage of the union of rects, from a unit-resolution boolean raster."""
+    grid = np.zeros((size, size), dtype=bool)
+    for xl, yl, xh, yh in rects:
+        grid[max(yl, 0):max(yh, 0), max(xl, 0):max(xh, 0)] = True
+    num = size // pixel
+    return grid.reshape(num, pixel, num, pixel).sum(axis=(1, 3))
+
+
+def test_overlapping_rects():
+    dmap = DensityMap(BBox(0, 0, 100, 100), 10)
+    dmap.add_rects(np.array([[0, 0, 60, 60], [30, 30, 90, 90]]))
+
+    cov = dmap.coverage
+    assert cov.max() == 100
+    assert cov.sum() == 60 * 60 * 2 - 30 * 30
+    assert dmap.get_window_density(100, 100, 100, 100)[0, 0] == pytest.approx(0.63)
+
+
+def test_overlaps_across_calls():
+    dmap = DensityMap(BBox(0, 0, 100, 100), 10)
+    rects = np.array([[5, 5, 45, 25], [15, 0, 25, 95]])
+    dmap.add_rects(rects)
+    dmap.add_rects(rects[:1])
+    np.testing.assert_array_equal(dmap.coverage, _get_raster_coverage(rects, 100, 10))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_rects_match_raster(seed):
+    rng = np.random.default_rng(seed)
+    lo = rng.integers(-10, 120, size=(200, 2))
+    rects = np.concatenate((lo, lo + rng.integers(1, 30, size=(200, 2))), axis=1)
+    dmap = DensityMap(BBox(0, 0, 120, 120), 8)
+    dmap.add_rects(rects[:100])
+    dmap.add_rects(rects[100:])
+    np.testing.assert_array_equal(dmap.coverage, _get_raster_coverage(rects, 120, 8))
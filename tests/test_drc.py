@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+
+import numpy as np
+
+from bag.io import read_yaml
+
+from templates_cds_ff_mpt import config
+from templates_cds_ff_mpt.res.tech import _get_unit_rects
+from templates_cds_ff_mpt.verification.drc import DRCPreChecker
+
+_tech_params = read_yaml(Path(__file__).resolve().parents[1] / 'tech_config.yaml')
+
+_m1 = ('M1CA', 'drawing')
+
+
+def _get_checker():
+    return DRCPreChecker(config, _tech_params)
+
+
+def _get_tables(rects):
+    """Returns rectangle array tables from a list of (lay_purp, box, nx, ny, spx, spy)."""
+    tables = {}
+    for lay_purp, box, nx, ny, spx, spy in rects:
+        tables.setdefault(lay_purp, []).append(list(box) + [nx, ny, spx, spy])
+    return {lay_purp: np.array(rows, dtype=np.int64) for lay_purp, rows in tables.items()}
+
+
+def test_res_unit_cell_array():
+    res_config = config['res_metal']
+    x_pitch = res_config['x_pitch']
+    conn_w = res_config['conn_w']
+    sp_le = config['sp_le_min'][_m1][0][1]
+    # the minimum unit cell size of ResTechCDSFFMPT
+    w = 3 * x_pitch
+    h = 6 * res_config['y_pitch']
+
+    # the horizontal straps are shorter than the minimum length and area on their own
+    rects = []
+    for lay_purp, (xl, yl, xh, yh), nx, spx in _get_unit_rects(w, h, x_pitch, conn_w, sp_le):
+        for idx in range(nx):
+            box = (xl + idx * spx, yl, xh + idx * spx, yh)
+            rects.append((lay_purp, box, 4, 3, w, h))
+    assert _get_checker().check_rect_arrays(_get_tables(rects)) == []
+
+
+def test_merged_wires():
+    rects = [
+        # a 64 x 400 wire drawn as two abutting pieces
+        (_m1, (0, 0, 64, 200), 1, 1, 0, 0),
+        (_m1, (0, 200, 64, 400), 1, 1, 0, 0),
+        # a 64 x 200 wire, which is too small
+        (_m1, (500, 0, 564, 200), 1, 1, 0, 0),
+    ]
+    ans = _get_checker().check_rect_arrays(_get_tables(rects))
+    assert [(v.rule, v.box, v.value) for v in ans] == [('area', (500, 0, 564, 200), 12800)]
@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from templates_cds_ff_mpt.verification.dspf import read_dspf, get_device_name
+
+_sample = '''*|DSPF 1.3
+.SUBCKT inv in out VDD VSS
+*|NET out 1.2f
+R1 out out:1 12.5 $lvl=M1 $w=0.05 $l=0.2
+R2 out:1 out:2 r=3.0 $layer=M2
+R3 out:2 in rm1 r=4.5 $lvl=V1 $l=0.1
+  + $lvl=M9
+R4 in in:1 rm2 2k
+C1 out VSS 1.5f $lvl=M1
+C2 in VSS cm c=2e-16
+XMN0@1 out in VSS VSS nch_svt
+.ENDS
+'''
+
+
+@pytest.mark.parametrize('block_size', [1, 16, 1 << 22])
+def test_read_sample(tmp_path, block_size):
+    fname = tmp_path / 'inv.spf'
+    fname.write_text(_sample)
+    data = read_dspf(fname, block_size=block_size)
+
+    assert data.subckt_name == 'inv'
+    assert data.ports == ('in', 'out', 'VDD', 'VSS')
+    assert data.net_caps == {'out': pytest.approx(1.2e-15)}
+    assert [get_device_name(name) for name in data.instances] == ['XMN0']
+    assert data.node_names[:4] == ['out', 'out:1', 'out:2', 'in']
+
+    np.testing.assert_allclose(data.res_val, [12.5, 3.0, 4.5, 2000.0])
+    np.testing.assert_array_equal(data.res_nodes, [[0, 1], [1, 2], [2, 3], [3, 4]])
+    # the first layer comment of a line wins
+    assert [data.layer_names[idx] if idx >= 0 else '' for idx in data.res_layer] == [
+        'M1', 'M2', 'V1', '']
+    np.testing.assert_array_equal(data.res_w, [0.05, np.nan, np.nan, np.nan])
+    np.testing.assert_array_equal(data.res_l, [0.2, np.nan, 0.1, np.nan])
+    np.testing.assert_allclose(data.cap_val, [1.5e-15, 2e-16])
+    np.testing.assert_array_equal(data.cap_layer, [data.get_layer_id('M1'), -1])
+
+
+def test_comments_aligned_with_lines(tmp_path):
+    # as many layer comments as lines, but not one per line
+    fname = tmp_path / 'test.spf'
+    fname.write_text('R1 a b 1 $lvl=M1 $layer=M2\nR2 b c 2\nR3 c d 3 $lvl=M3\n')
+    data = read_dspf(fname)
+    assert [data.layer_names[idx] if idx >= 0 else '' for idx in data.res_layer] == [
+        'M1', '', 'M3']
+
+
+def test_malformed_line(tmp_path):
+    fname = tmp_path / 'test.spf'
+    fname.write_text('R1 a b\n')
+    with pytest.raises(ValueError):
+        read_dspf(fname)
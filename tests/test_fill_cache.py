@@ -0,0 +1,38 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+
+from bag.io import read_yaml
+from bag.util.immutable import Param
+
+from templates_cds_ff_mpt.tech import TechInfoCDSFFMPT
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def test_cache_shared_across_device_techs():
+    tech_info = TechInfoCDSFFMPT(read_yaml(_root_dir / 'tech_config.yaml'))
+    edge = Param()
+    fill_tech = tech_info.get_device_tech('fill')
+    fill_tech.reset_fill_cache()
+    info = fill_tech.get_fill_info('nch', 'standard', 4000, 3000, edge, edge, edge, edge)
+
+    # get_device_tech() returns a new object, which finds the tile computed by the first one
+    fill_tech = tech_info.get_device_tech('fill')
+    assert fill_tech.get_fill_info('nch', 'standard', 4000, 3000, edge, edge, edge, edge) is info
+    stats = fill_tech.fill_cache_stats
+    assert (stats.num_tiles, stats.hits, stats.misses) == (2, 1, 1)
+    assert (stats.num_x_solve, stats.num_y_solve) == (1, 1)
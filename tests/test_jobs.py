@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+from templates_cds_ff_mpt.verification.jobs import VerificationJob, VerificationQueue
+
+# a stand-in for the LVS tool that records the cell it ran on, checks the linked rule file,
+# and waits for a go file when running the 'blocker' cell.
+_fake_tool = '''#!{python}
+import os
+import sys
+import time
+from pathlib import Path
+
+cell_name = Path(sys.argv[-1]).read_text().split()[1]
+with open(os.environ['CALLS_FILE'], 'a') as f:
+    f.write(cell_name + '\\n')
+if not Path('rules').is_file():
+    sys.exit(2)
+if cell_name == 'blocker':
+    for _ in range(1000):
+        if os.path.exists(os.environ['GO_FILE']):
+            break
+        time.sleep(0.01)
+'''
+
+_ctl_template = '''cell {{ cell_name }}
+layout {{ layout_file }}
+netlist {{ netlist_file }}
+'''
+
+
+def _make_queue(tmp_path, max_workers=2):
+    tool = tmp_path / 'fake_lvs'
+    tool.write_text(_fake_tool.format(python=sys.executable))
+    tool.chmod(0o755)
+    (tmp_path / 'lvs.ctl').write_text(_ctl_template)
+    (tmp_path / 'rules').write_text('rules\n')
+    env = dict(os.environ, CALLS_FILE=str(tmp_path / 'calls.txt'),
+               GO_FILE=str(tmp_path / 'go'))
+    return VerificationQueue(tmp_path / 'runs', dict(lvs=[str(tool)]),
+                             link_files=dict(lvs=[str(tmp_path / 'rules')]),
+                             max_workers=max_workers, env=env)
+
+
+def _make_job(tmp_path, cell_name):
+    layout = tmp_path / f'{cell_name}.gds'
+    layout.write_text(f'layout {cell_name}\n')
+    netlist = tmp_path / f'{cell_name}.cdl'
+    (tmp_path / f'{cell_name}_sub.cdl').write_text('.SUBCKT sub a b\n.ENDS\n')
+    netlist.write_text(f".INCLUDE '{cell_name}_sub.cdl'\n.SUBCKT {cell_name} a b\n.ENDS\n")
+    return VerificationJob('lvs', cell_name, layout, netlist, tmp_path / 'lvs.ctl')
+
+
+def _get_calls(tmp_path):
+    fname = tmp_path / 'calls.txt'
+    return fname.read_text().split() if fname.exists() else []
+
+
+def test_cached_and_deduplicated(tmp_path):
+    job = _make_job(tmp_path, 'inv')
+    with _make_queue(tmp_path) as queue:
+        fut0 = queue.submit(job)
+        assert queue.submit(job) is fut0
+        result = fut0.result()
+        assert result.success and not result.cached
+        assert (result.run_dir / 'rules').is_symlink()
+
+        # a new queue only finds the completed run directory
+        with _make_queue(tmp_path) as queue2:
+            result = queue2.submit(job).result()
+        assert result.success and result.cached
+    assert _get_calls(tmp_path) == ['inv']
+
+
+def test_include_change_reruns(tmp_path):
+    job = _make_job(tmp_path, 'inv')
+    with _make_queue(tmp_path) as queue:
+        key0 = queue.run([job])[0].key
+        with open(tmp_path / 'inv_sub.cdl', 'a') as f:
+            f.write('* edited\n')
+        result = queue.run([job])[0]
+    assert result.key != key0 and not result.cached
+    assert _get_calls(tmp_path) == ['inv', 'inv']
+
+
+def test_edit_while_queued(tmp_path):
+    blocker = _make_job(tmp_path, 'blocker')
+    job = _make_job(tmp_path, 'inv')
+    with _make_queue(tmp_path, max_workers=1) as queue:
+        fut_block = queue.submit(blocker)
+        fut = queue.submit(job)
+        key0 = queue.get_key(job, queue.render_control(job))
+
+        # edit the netlist while the job waits for the only worker
+        with open(job.netlist_fname, 'a') as f:
+            f.write('* edited\n')
+        (tmp_path / 'go').write_text('')
+        assert fut_block.result().success
+        result = fut.result()
+
+        assert result.success
+        assert result.key != key0
+        assert result.key == queue.get_key(job, queue.render_control(job))
+        assert (result.run_dir / 'done.json').is_file()
+        assert not queue.get_run_dir(job, key0).exists()
+        assert queue.submit(job) is fut
+    assert _get_calls(tmp_path) == ['blocker', 'inv']
@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import functools
+
+import numpy as np
+import pytest
+
+from templates_cds_ff_mpt.simulation.montecarlo import (
+    MCShard, MCStats, MCScheduler, split_shards
+)
+
+
+def _get_values(first_run: int, num_runs: int) -> np.ndarray:
+    """The measurement of each iteration, as a function of the iteration index only."""
+    return np.array([np.random.default_rng(idx).normal() for idx in
+                     range(first_run, first_run + num_runs)])
+
+
+def _run_shard(shard: MCShard) -> np.ndarray:
+    """A stand-in simulator, where the first shard completes last."""
+    if shard.first_run == 1:
+        time.sleep(0.5)
+    return _get_values(shard.first_run, shard.num_runs)
+
+
+def _run_shard_slow_after(last_run: int, shard: MCShard) -> np.ndarray:
+    """A stand-in simulator that hangs on shards after the given iteration."""
+    if shard.first_run > last_run:
+        time.sleep(60)
+    return _get_values(shard.first_run, shard.num_runs)
+
+
+def _get_prefix_stats(shards, spec_max, ci_width, min_runs):
+    stats = MCStats(spec_max=spec_max)
+    for shard in shards:
+        stats.add_values(_get_values(shard.first_run, shard.num_runs))
+        if stats.num >= min_runs:
+            lo, hi = stats.get_yield_interval()
+            if hi - lo < ci_width:
+                break
+    return stats
+
+
+def test_shards_match_monolithic_run():
+    shards = split_shards('tt', 95, 10)
+    stats = MCScheduler(_run_shard, max_workers=4).run(shards, spec_max=1.0)
+
+    values = _get_values(1, 95)
+    assert stats.num == 95
+    assert stats.num_pass == np.count_nonzero(values <= 1.0)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(ddof=1))
+
+
+@pytest.mark.parametrize('max_workers', [1, 3, 6])
+def test_early_stop_on_iteration_prefix(max_workers):
+    shards = split_shards('tt', 400, 10)
+    expected = _get_prefix_stats(shards, 1.0, 0.15, 50)
+    assert 50 < expected.num < 400
+
+    stats = MCScheduler(_run_shard, max_workers=max_workers).run(
+        shards, spec_max=1.0, ci_width=0.15, min_runs=50)
+    assert stats.num == expected.num
+    assert stats.num_pass == expected.num_pass
+    assert stats.mean == pytest.approx(expected.mean)
+
+
+def test_early_stop_kills_running_shards():
+    shards = split_shards('tt', 400, 10)
+    expected = _get_prefix_stats(shards, 1.0, 0.15, 50)
+
+    # the shards after the stopping point are still running when the run stops
+    run_shard = functools.partial(_run_shard_slow_after, expected.num)
+    start = time.perf_counter()
+    stats = MCScheduler(run_shard, max_workers=4).run(shards, spec_max=1.0, ci_width=0.15,
+                                                      min_runs=50)
+    assert time.perf_counter() - start < 30
+    assert stats.num == expected.num
@@ -0,0 +1,36 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from templates_cds_ff_mpt.simulation.cache import SimResultCache
+
+
+def _write_tb(tb_dir, sub_text='R0 (a 0) resistor r=1k\n'):
+    tb_dir.mkdir(parents=True, exist_ok=True)
+    (tb_dir / 'leaf.scs').write_text(sub_text)
+    (tb_dir / 'sub.scs').write_text(f'include "{tb_dir / "leaf.scs"}"\n')
+    (tb_dir / 'models.scs').write_text('section tt\nendsection tt\n')
+    netlist = tb_dir / 'tb.scs'
+    netlist.write_text(f'simulator lang=spectre\ninclude "{tb_dir / "sub.scs"}"\n'
+                       'tran0 tran stop=1n\n')
+    return netlist, [(str(tb_dir / 'models.scs'), 'tt')]
+
+
+def test_key_independent_of_paths(tmp_path):
+    cache = SimResultCache(tmp_path / 'cache', 1 << 20)
+    key0 = cache.get_key(*_write_tb(tmp_path / 'run0'))
+    # the same testbench in another directory, with nested includes by absolute path
+    assert cache.get_key(*_write_tb(tmp_path / 'run1')) == key0
+    # include file contents still matter
+    assert cache.get_key(*_write_tb(tmp_path / 'run2', 'R0 (a 0) resistor r=2k\n')) != key0
@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2020 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+
+from pybag.enum import Orient2D
+
+from bag.io import read_yaml
+
+from templates_cds_ff_mpt.tech import TechInfoCDSFFMPT
+from templates_cds_ff_mpt.snapshot import TechSnapshot
+
+_root_dir = Path(__file__).resolve().parents[1]
+
+
+def test_fallback_rules_match_tech_info():
+    tech_info = TechInfoCDSFFMPT(read_yaml(_root_dir / 'tech_config.yaml'))
+    # no precomputed rules, so every query is evaluated from the tech_params tables
+    snapshot = TechSnapshot.from_tech_info(tech_info, wire_specs=[])
+    config = tech_info.config
+
+    bad_len = []
+    for lay, purp in config['len_min']:
+        for w in range(32, 1000, 8):
+            for length in (0, 15, 400):
+                for even in (False, True):
+                    args = (lay, purp, Orient2D.y, w, length)
+                    if (snapshot.get_next_length(*args, even=even) !=
+                            tech_info.get_next_length(*args, even=even)):
+                        bad_len.append((args, even))
+    assert bad_len == []
+
+    bad_sp_le = []
+    for lay, purp in config['sp_le_min']:
+        for w in range(32, 1000, 8):
+            for even in (False, True):
+                if (snapshot.get_min_line_end_space(lay, w, purpose=purp, even=even) !=
+                        tech_info.get_min_line_end_space(lay, w, purpose=purp, even=even)):
+                    bad_sp_le.append((lay, purp, w, even))
+    assert bad_sp_le == []